@@ -1,36 +1,121 @@
 import pandas as pd
 from pathlib import Path
-from pandas import ExcelFile
+import argparse
+import hashlib
+import json
+import os
+
+import correcciones
+import entidades
+import esquema
+import historico_sqlite
+import historico_store
+import instrumentacion
+import lector_excel
 
 BASE = Path(__file__).resolve().parent
 HIST = BASE / "output" / "history" / "HISTORICO_UNIQUE.xlsx"
+STORE_DIR = HIST.parent / "store"
+SQLITE_PATH = HIST.parent / historico_sqlite.DB_PATH.name
+SHEETS = ("DATA_SI","DATA_NO","DATA_INVALIDOS","DATA_SIN_RESPUESTA")
+AUDIT_COLS = ("entidad","name","snapshot_date","source_file")  # solo lo que mira audit_sheet
+MIN_LARGO = 4   # nombres más cortos no cuentan como entidad (como antes)
+
+# 🎯 La lista base de entidades vive en entidades.py (la comparte con detector_swap.py)
+ENTIDADES = entidades.ENTIDADES
+
+# =========================
+# Estado de la auditoría (--solo-nuevos)
+# =========================
+# auditoria_estado.json guarda el resultado por (snapshot_date, source_file, hoja)
+# de lo ya auditado, la versión del diario de correcciones y una firma de las
+# entidades conocidas. Con --solo-nuevos solo se leen y auditan los pares que no
+# están ahí; los tocados por correcciones nuevas se vuelven a auditar, y si
+# cambian las entidades (o la similitud) se audita todo de nuevo.
+ESTADO_PATH = HIST.parent / "auditoria_estado.json"
+
+def firma_entidades(conocidas=None) -> str:
+    conocidas = entidades.conocidas() if conocidas is None else conocidas
+    texto = json.dumps([sorted(conocidas), entidades.SIMILITUD, MIN_LARGO], ensure_ascii=False)
+    return hashlib.sha1(texto.encode("utf-8")).hexdigest()
+
+def cargar_estado() -> dict:
+    if ESTADO_PATH.exists():
+        try:
+            with open(ESTADO_PATH, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            print(f"[Aviso] No se pudo leer {ESTADO_PATH}; se audita todo.")
+    return {"filas": [], "correcciones": 0, "entidades": None}
+
+def guardar_estado(filas: list):
+    ESTADO_PATH.parent.mkdir(parents=True, exist_ok=True)
+    data = {"filas": filas, "correcciones": correcciones.version(), "entidades": firma_entidades()}
+    tmp = ESTADO_PATH.with_name(f".{ESTADO_PATH.name}.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, ESTADO_PATH)
+
+def filas_vigentes(estado: dict) -> list:
+    """Filas del estado que siguen valiendo (sin correcciones nuevas ni cambio de entidades)."""
+    if estado.get("entidades") != firma_entidades():
+        if estado.get("filas"):
+            print("[Aviso] Cambiaron las entidades conocidas: se audita todo de nuevo.")
+        return []
+    tocados = correcciones.afectados(estado.get("correcciones", 0))
+    return [r for r in estado.get("filas", []) if (r["snapshot_date"], r["source_file"]) not in tocados]
 
-# 🎯 Lista base de entidades (ajústala a tu realidad; agrega más si aplica)
-ENTIDADES = {
-    "BANCO CAJA SOCIAL","BANCO DE BOGOTA","BANCOLOMBIA","DAVIVIENDA","FNG",
-    "COLPATRIA","FALABELLA","BANCO AGRARIO","BBVA","AV VILLAS","ITAU","BANCO POPULAR"
-}
-
-def is_like_entidad(x: str) -> bool:
-    if not isinstance(x, str): return False
-    s = x.strip().upper()
-    if len(s) < 4: return False
-    # heurística: si el “nombre” coincide 100% con una palabra típica de entidad
-    return s in ENTIDADES
-
-def audit_sheet(df: pd.DataFrame, sheet_name: str):
-    if df.empty: 
+# =========================
+# Lectura (solo AUDIT_COLS, sin los pares ya auditados)
+# =========================
+def _sin_pares(df: pd.DataFrame, omitir: set) -> pd.DataFrame:
+    if not omitir or df.empty:
+        return df
+    pares = pd.MultiIndex.from_arrays([df[c].astype(str) for c in ("snapshot_date", "source_file")])
+    return df[~pares.isin(list(omitir))]
+
+def leer_hojas(omitir: set = None) -> dict:
+    """{hoja: DataFrame} con AUDIT_COLS desde el almacén Parquet, historico.sqlite o HIST (en ese orden)."""
+    omitir = omitir or set()
+    cols = list(AUDIT_COLS)
+    if historico_store.store_exists(STORE_DIR):
+        saltar = {historico_store.partition_path(sh, snap, src, STORE_DIR)
+                  for sh in SHEETS for snap, src in omitir}
+        hojas = {}
+        for sh in SHEETS:
+            parts = [p for p in historico_store.list_partitions(sh, STORE_DIR) if p not in saltar]
+            frames = [historico_store.read_partition(p, cols) for p in parts]
+            hojas[sh] = _sin_pares(pd.concat(frames, ignore_index=True), omitir) if frames else pd.DataFrame(columns=cols)
+        return hojas
+    if historico_sqlite.db_exists(SQLITE_PATH):
+        con = historico_sqlite.conectar(SQLITE_PATH)
+        try:
+            return {sh: historico_sqlite.read_table(sh, columns=cols, excluir=omitir, con=con) for sh in SHEETS}
+        finally:
+            con.close()
+    hojas = lector_excel.leer_hojas(HIST, SHEETS, columnas=AUDIT_COLS)
+    return {sh: _sin_pares(df, omitir) for sh, df in hojas.items()}
+
+def hay_historico() -> bool:
+    return historico_store.store_exists(STORE_DIR) or historico_sqlite.db_exists(SQLITE_PATH) or HIST.exists()
+
+# =========================
+# Auditoría
+# =========================
+def audit_sheet(df: pd.DataFrame, sheet_name: str, indice: entidades.IndiceEntidades = None):
+    if df.empty:
         return []
-    # normaliza
-    for c in ("entidad","name","snapshot_date","source_file"):
-        if c not in df.columns: df[c] = pd.NA
-        df[c] = df[c].astype("string")
-    df["name_UP"] = df["name"].str.upper()
+    indice = indice or entidades.IndiceEntidades()
+    claves = {}
+    for c in ("snapshot_date","source_file"):
+        s = df[c] if c in df.columns else pd.Series(pd.NA, index=df.index)
+        claves[c] = s if isinstance(s.dtype, pd.CategoricalDtype) else s.astype("string")  # las compactas ya son texto
+    name = df["name"] if "name" in df.columns else pd.Series(pd.NA, index=df.index, dtype="string")
 
-    # % de filas por día con name que “parece” entidad
+    # % de filas por día con name que “parece” entidad (cada valor distinto se evalúa una vez)
     res = (
-        df.assign(flag=df["name"].apply(is_like_entidad))
-          .groupby(["snapshot_date","source_file"], dropna=False)["flag"]
+        pd.DataFrame({**claves, "flag": indice.marcar(name, MIN_LARGO)}, index=df.index)
+          .groupby(["snapshot_date","source_file"], dropna=False, observed=True)["flag"]
           .mean()
           .reset_index()
           .rename(columns={"flag":"pct_name_parece_entidad"})
@@ -39,21 +124,59 @@ def audit_sheet(df: pd.DataFrame, sheet_name: str):
     res["sheet"] = sheet_name
     return res.to_dict("records")
 
-def main():
-    if not HIST.exists():
+def estimar_memoria(budget_mb: float):
+    """Estimación de memoria de las hojas a auditar, desde una muestra de cada una."""
+    ests = []
+    for sh in SHEETS:
+        try:
+            muestra, filas = esquema.muestra_libro(HIST, sh, columnas=AUDIT_COLS)
+        except KeyError:
+            continue
+        ests.append(esquema.estimar(muestra, filas, esquema.AUDITORIA))
+    esquema.reportar("de la auditoría", esquema.sumar(ests), budget_mb)
+
+def main(corrida=None, memory_budget_mb: float = None, solo_nuevos: bool = False):
+    if not hay_historico():
         print(f"[ERROR] No existe {HIST}")
         return
+    if memory_budget_mb and HIST.exists():
+        estimar_memoria(memory_budget_mb)
+    previas = filas_vigentes(cargar_estado()) if solo_nuevos else []
+    omitir = {(r["snapshot_date"], r["source_file"]) for r in previas}
+    with instrumentacion.etapa(corrida, "lectura") as e:
+        hojas = correcciones.aplicar_hojas(leer_hojas(omitir))
+        for df in hojas.values():
+            esquema.compactar(df, esquema.AUDITORIA)
+        e["filas_out"] = sum(len(df) for df in hojas.values())
+    if solo_nuevos:
+        print(f"Auditando solo lo nuevo: {len(omitir)} día(s)/archivo(s) ya auditados se omiten.")
+    filas = previas + auditar_filas(hojas, corrida)
+    guardar_estado(filas)
+    resumir(filas)
+
+def auditar_filas(hojas: dict, corrida=None) -> list:
+    """Resultado por (snapshot_date, source_file, hoja) de hojas DATA_* ya en memoria."""
+    indice = entidades.IndiceEntidades()
     out_rows = []
-    with ExcelFile(HIST) as xf:
-        for sh in ("DATA_SI","DATA_NO","DATA_INVALIDOS","DATA_SIN_RESPUESTA"):
-            if sh not in xf.sheet_names: 
-                continue
-            df = pd.read_excel(HIST, sheet_name=sh)
-            out_rows += audit_sheet(df, sh)
+    for sh, df in hojas.items():
+        with instrumentacion.etapa(corrida, f"{sh}/auditoria", len(df)) as e:
+            filas = audit_sheet(df, sh, indice)
+            e["filas_out"] = len(filas)
+        out_rows += filas
+    for r in out_rows:  # mismo formato que el estado guardado
+        r["snapshot_date"], r["source_file"] = str(r["snapshot_date"]), str(r["source_file"])
+        r["pct_name_parece_entidad"] = float(r["pct_name_parece_entidad"])
+    return out_rows
+
+def auditar_hojas(hojas: dict, corrida=None) -> pd.DataFrame:
+    """Audita hojas DATA_* ya en memoria e imprime el resumen; devuelve el resumen por día."""
+    return resumir(auditar_filas(hojas, corrida))
+
+def resumir(out_rows: list) -> pd.DataFrame:
     out = pd.DataFrame(out_rows)
     if out.empty:
         print("Sin datos para auditar.")
-        return
+        return out
     # Resumen por día (tomando el máximo entre hojas para ser conservadores)
     dia = (out.groupby(["snapshot_date","source_file"], dropna=False)["pct_name_parece_entidad"]
               .max()
@@ -69,6 +192,14 @@ def main():
         print(sospechosos.to_string(index=False))
     else:
         print("\n✅ No se detectaron días con indicios fuertes de cruce de columnas.")
+    return dia
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Audita el histórico buscando días con columnas cruzadas.")
+    parser.add_argument("--memory-budget-mb", "--memory-budget", type=float, default=None,
+                        help="Antes de auditar, estima la memoria de las hojas y avisa si supera este presupuesto en MB.")
+    parser.add_argument("--solo-nuevos", action="store_true",
+                        help="Audita solo los días/archivos agregados desde la última auditoría (ver auditoria_estado.json).")
+    args = parser.parse_args()
+    with instrumentacion.Corrida("auditar_hist") as corrida:
+        main(corrida, args.memory_budget_mb, args.solo_nuevos)
@@ -0,0 +1,68 @@
+import pandas as pd
+from pathlib import Path
+
+import voxinplant_consolidador as vc
+from benchmarks import referencia
+
+# =========================
+# Objetivos a nivel de función
+# =========================
+# Se invocan desde benchmarks.entorno en un proceso aparte con cwd = carpeta de
+# trabajo. Cada uno carga sus datos (sin medir) y devuelve la función a medir.
+
+REPORTE_PARQUET = Path("datos") / "reporte.parquet"
+# REDISCAR de la referencia; las columnas y exclusiones de estado_numeros se prueban en la etapa 'rediscar'
+REDISCAR_REFERENCIA = referencia.BASE_COLS + ["Intentos totales"]
+MANUAL_PATH = Path("output") / "history" / "MANUAL_SNAPSHOT.xlsx"
+
+
+def nucleo(variante: str, scope: str = "template"):
+    """Clasificación + únicos sobre un DataFrame ya cargado (sin Excel de por medio)."""
+    df = pd.read_parquet(REPORTE_PARQUET)
+    if variante == "referencia":
+        return lambda: referencia.consolidar(df, scope)
+
+    def actual():
+        # Sin tope y sin estado de días anteriores: REDISCAR = únicos sin respuesta, como la referencia
+        hojas, _, _ = vc.consolidar_df(vc.normalizar_reporte(df.copy()), scope, max_intentos=0, estado_previo=False)
+        hojas.pop("RESUMEN")
+        hojas["REDISCAR"] = hojas["REDISCAR"][REDISCAR_REFERENCIA]
+        return hojas
+    return actual
+
+
+def manual(variante: str):
+    """Carga y normalización de MANUAL_SNAPSHOT.xlsx."""
+    if variante == "referencia":
+        return lambda: {"manual": referencia.load_manual(MANUAL_PATH)}
+
+    import fusionar_historicos as fh
+    return lambda: {"manual": fh.load_manual(MANUAL_PATH)}
+
+
+def _literal(s: pd.Series) -> pd.DataFrame:
+    """Cada valor como tipo + repr: compara byte a byte, no solo el texto."""
+    return pd.DataFrame({"valor": [f"{type(v).__name__}:{v!r}" for v in s]})
+
+
+def manual_casos(variante: str):
+    """load_manual y el teléfono principal (fila por fila vs por columnas) sobre casos borde."""
+    hojas = pd.read_excel(MANUAL_PATH, sheet_name=None)
+    if variante == "referencia":
+        def correr():
+            out = {"manual": referencia.load_manual(MANUAL_PATH)}
+            for sh, df in hojas.items():
+                col = "TELEFONO1 INVALIDO" if "TELEFONO1 INVALIDO" in df.columns else "Telefono1"
+                out[f"telefono/{sh}"] = _literal(df.apply(lambda r: referencia.take_first_nonnull(r, [col]), axis=1))
+            return out
+        return correr
+
+    import fusionar_historicos as fh
+
+    def correr():
+        out = {"manual": fh.load_manual(MANUAL_PATH)}
+        for sh, df in hojas.items():
+            col = "TELEFONO1 INVALIDO" if "TELEFONO1 INVALIDO" in df.columns else "Telefono1"
+            out[f"telefono/{sh}"] = _literal(fh.first_nonblank(df, [col]))
+        return out
+    return correr
@@ -0,0 +1,135 @@
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import importlib
+import json
+import os
+import runpy
+import shutil
+import subprocess
+import sys
+import time
+
+from instrumentacion import rss_pico_mb, cpu_s
+
+# =========================
+# Entorno de medición
+# =========================
+# Cada variante corre en un proceso nuevo, dentro de una carpeta de trabajo con
+# copia de los scripts (BASE_DIR = carpeta de trabajo), así inbox/, output/,
+# cache/ y logs/ quedan aislados y el pico de memoria es solo de esa corrida.
+#
+# Objetivos:
+#   - "script.py":  se ejecuta como __main__ con los argumentos dados.
+#   - "modulo:fn":  fn(*args) prepara (sin medir) y devuelve una función sin
+#                   argumentos; se mide solo esa llamada. Si devuelve un dict de
+#                   DataFrames, se guardan sus huellas para comparar variantes.
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+
+
+def preparar_ws(ws: Path) -> Path:
+    """Carpeta de trabajo limpia con los scripts del repo y el paquete benchmarks."""
+    ws = Path(ws)
+    if ws.exists():
+        shutil.rmtree(ws)
+    ws.mkdir(parents=True)
+    for p in REPO_DIR.glob("*.py"):
+        shutil.copy2(p, ws / p.name)
+    shutil.copytree(REPO_DIR / "benchmarks", ws / "benchmarks",
+                    ignore=shutil.ignore_patterns("__pycache__"))
+    (ws / "inbox").mkdir()
+    return ws
+
+
+def clonar_ws(origen: Path, destino: Path) -> Path:
+    destino = Path(destino)
+    if destino.exists():
+        shutil.rmtree(destino)
+    shutil.copytree(origen, destino)
+    return destino
+
+
+def huella(df: pd.DataFrame) -> str:
+    """Resumen del contenido (valores como texto, en orden) para comparar salidas."""
+    if df is None:
+        return "None"
+    txt = df.reset_index(drop=True).astype("string").fillna("<NA>")
+    h = pd.util.hash_pandas_object(txt, index=False).to_numpy()
+    # Suma ponderada por posición: sensible al orden de las filas
+    pesos = np.arange(1, len(h) + 1, dtype=np.uint64)
+    return f"{len(df)}x{df.shape[1]}:{int((h * pesos).sum()):x}:{'|'.join(map(str, df.columns))}"
+
+
+def huellas_libro(path: Path, ordenar=False, omitir=("RESUMEN",), columnas: dict = None) -> dict:
+    """Huella por hoja de un libro leído como texto (iguala tipos de celda).
+
+    columnas: {hoja: columnas a comparar} para hojas que agregan columnas a las de la referencia.
+    """
+    with pd.ExcelFile(path) as xf:
+        sheets = {sh: xf.parse(sh, dtype=str) for sh in xf.sheet_names if sh not in omitir}
+    out = {}
+    for sh, df in sheets.items():
+        if columnas and sh in columnas:
+            df = df[[c for c in columnas[sh] if c in df.columns]]
+        if ordenar and len(df.columns):
+            df = df.sort_values(by=list(df.columns), na_position="last")
+        out[sh] = huella(df)
+    return out
+
+
+def huellas_csv(path: Path, ordenar=True, omitir_cols=()) -> dict:
+    df = pd.read_csv(path, dtype=str, encoding="utf-8-sig")
+    df = df.drop(columns=[c for c in omitir_cols if c in df.columns])
+    if ordenar and len(df.columns):
+        df = df.sort_values(by=list(df.columns), na_position="last")
+    return {path.name: huella(df)}
+
+
+# =========================
+# Medición en proceso aparte
+# =========================
+def medir(ws: Path, objetivo: str, args=(), timeout: float = None) -> dict:
+    """Corre `objetivo` en un proceso nuevo con cwd=ws y devuelve sus métricas."""
+    ws = Path(ws)
+    metricas = ws / ".metricas.json"
+    metricas.unlink(missing_ok=True)
+    cmd = [sys.executable, "-m", "benchmarks.entorno", str(metricas), objetivo, *map(str, args)]
+    proc = subprocess.run(cmd, cwd=ws, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                          text=True, timeout=timeout)
+    if proc.returncode != 0 or not metricas.exists():
+        return {"error": (proc.stderr or "").strip().splitlines()[-1:] or ["sin métricas"]}
+    return json.loads(metricas.read_text(encoding="utf-8"))
+
+
+def _ejecutar(metricas_path: str, objetivo: str, args: list):
+    rss_base = rss_pico_mb()
+    huellas = None
+    if objetivo.endswith(".py"):
+        sys.argv = [objetivo, *args]
+        t0, c0 = time.perf_counter(), cpu_s()
+        runpy.run_path(objetivo, run_name="__main__")
+    else:
+        mod, fn = objetivo.split(":")
+        correr = getattr(importlib.import_module(mod), fn)(*args)
+        rss_base = rss_pico_mb()
+        t0, c0 = time.perf_counter(), cpu_s()
+        res = correr()
+        if isinstance(res, dict):
+            huellas = {k: huella(v) for k, v in res.items()}
+    wall = time.perf_counter() - t0
+    cpu = cpu_s() - c0
+    out = {
+        "wall_s": round(wall, 4),
+        "cpu_s": round(cpu, 4),
+        "rss_pico_mb": round(rss_pico_mb(), 1),
+        "rss_base_mb": round(rss_base, 1),
+    }
+    if huellas is not None:
+        out["huellas"] = huellas
+    Path(metricas_path).write_text(json.dumps(out), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.getcwd())
+    _ejecutar(sys.argv[1], sys.argv[2], sys.argv[3:])
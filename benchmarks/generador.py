@@ -0,0 +1,186 @@
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+import voxinplant_consolidador as vc
+from salidas import EscritorConsolidado
+
+# =========================
+# Generador de datos sintéticos
+# =========================
+# Reportes Voximplant con las columnas de REQUIRED_COLUMNS, y MANUAL_SNAPSHOT /
+# HISTORICO_UNIQUE con la forma que esperan fusionar_historicos y auditar_hist.
+
+EXCEL_MAX_ROWS = 1_048_575  # filas de datos por hoja (+ encabezado)
+
+ENTIDADES = [
+    "BANCO CAJA SOCIAL", "BANCO DE BOGOTA", "BANCOLOMBIA", "DAVIVIENDA", "FNG",
+    "COLPATRIA", "FALABELLA", "BANCO AGRARIO", "BBVA", "AV VILLAS", "ITAU", "BANCO POPULAR",
+]
+OTROS_RESULTADOS = ["No answer", "Busy", "Failed", "Voicemail"]
+
+
+def generar_reporte(n_rows: int, snapshot_date: str = "2025-11-10", seed: int = 0,
+                    dup_rate: float = 0.35, answer_rate: float = 0.55, invalid_rate: float = 0.08,
+                    btn_dist=(0.35, 0.20, 0.45), null_rate: float = 0.01) -> pd.DataFrame:
+    """DataFrame con la forma de un reporte crudo de Voximplant.
+
+    dup_rate:     fracción de filas que son reintentos de un contacto ya visto.
+    answer_rate:  fracción de filas 'Call answered'.
+    invalid_rate: fracción de filas 'Invalid number'.
+    btn_dist:     probabilidades de btn_input (1, 2, vacío) entre las contestadas.
+    null_rate:    fracción de celdas vacías en entidad/name/teléfonos.
+    """
+    rng = np.random.default_rng(seed)
+    n_contacts = max(1, int(n_rows * (1 - dup_rate)))
+    contact = np.concatenate([
+        np.arange(min(n_contacts, n_rows)),
+        rng.integers(0, n_contacts, max(0, n_rows - n_contacts)),
+    ])
+    rng.shuffle(contact)
+
+    ent_idx = contact % len(ENTIDADES)
+    phone = 3000000000 + (contact * 7919) % 999_999_999
+    # Algunos contactos se marcan a un teléfono distinto al de la plantilla
+    phone_b = np.where(rng.random(n_rows) < 0.1, phone + rng.integers(1, 1000, n_rows), phone)
+
+    r = rng.random(n_rows)
+    result = np.where(r < answer_rate, "Call answered",
+                      np.where(r < answer_rate + invalid_rate, "Invalid number",
+                               rng.choice(OTROS_RESULTADOS, n_rows)))
+    p1, p2, p0 = btn_dist
+    tot = p1 + p2 + p0
+    btn = rng.choice(np.array([1.0, 2.0, np.nan]), n_rows, p=[p1 / tot, p2 / tot, p0 / tot])
+    btn = np.where(result == "Call answered", btn, np.nan)
+
+    start = pd.Timestamp(snapshot_date) + pd.Timedelta(hours=8)
+    fecha = start + pd.to_timedelta(rng.integers(0, 10 * 3600, n_rows), unit="s")
+
+    def con_nulos(values):
+        s = pd.Series(values)
+        return s.where(rng.random(n_rows) >= null_rate)
+
+    return pd.DataFrame({
+        vc.COL_FECHA: fecha,
+        vc.COL_RESULT: result,
+        vc.COL_BTN: btn,
+        vc.COL_ENTIDAD: con_nulos(np.array(ENTIDADES, dtype=object)[ent_idx]),
+        vc.COL_NAME: con_nulos(np.char.add("CLIENTE ", contact.astype(str)).astype(object)),
+        vc.COL_PHONE_TEMPLATE: con_nulos(phone.astype("float64")),
+        vc.COL_PHONE_DIALED: con_nulos(phone_b.astype("float64")),
+        vc.COL_ATTEMPT_NUM: rng.integers(1, 4, n_rows),
+        vc.COL_DURATION: np.where(result == "Call answered", rng.integers(5, 180, n_rows), 0),
+    })[vc.REQUIRED_COLUMNS]
+
+
+def escribir_libro(sheets: dict, path: Path):
+    """Escribe hojas a xlsx con el escritor en streaming (rápido para tamaños grandes)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    for name, df in sheets.items():
+        if len(df) > EXCEL_MAX_ROWS:
+            raise ValueError(f"{name}: {len(df)} filas excede el máximo de Excel ({EXCEL_MAX_ROWS})")
+    with EscritorConsolidado(path, ("xlsx",)) as out:
+        for name, df in sheets.items():
+            out.write_frame(name, df)
+    return path
+
+
+def generar_manual(n_rows: int, seed: int = 1, fecha_inicio: str = "2025-06-01", dias: int = 60) -> dict:
+    """Hojas de MANUAL_SNAPSHOT.xlsx (Localizados, RespondenNO, TelefonosInvalidos, Contesta_NoResponde)."""
+    rng = np.random.default_rng(seed)
+    shares = {"Localizados": 0.4, "RespondenNO": 0.25, "TelefonosInvalidos": 0.15, "Contesta_NoResponde": 0.2}
+    sheets = {}
+    offset = 0
+    for sh, share in shares.items():
+        n = max(1, int(n_rows * share))
+        ids = np.arange(offset, offset + n)
+        offset += n
+        fecha = pd.Timestamp(fecha_inicio) + pd.to_timedelta(rng.integers(0, dias, n), unit="D")
+        tel = (3000000000 + (ids * 104729) % 999_999_999).astype("float64")
+        df = pd.DataFrame({
+            "Tipo Identificación": rng.choice(["CC", "CE", "NIT"], n),
+            "Nº Identificación": 10_000_000 + ids,
+            "Nombre": np.char.add("Cliente Manual ", ids.astype(str)).astype(object),
+            "Email": np.char.add(np.char.add("cliente", ids.astype(str)), "@correo.com").astype(object),
+            # ~2% vacíos y ~1% celdas en blanco (texto " "): ejercitan la selección del teléfono principal
+            "Telefono1": pd.Series(tel).where(rng.random(n) > 0.02).astype(object).mask(rng.random(n) < 0.01, " "),
+            "Telefono2": pd.Series(tel + 1).where(rng.random(n) > 0.7),
+            "Telefono3": np.nan,
+            "Fecha": fecha,
+            "Confirma Identidad": "SI" if sh == "Localizados" else ("NO" if sh == "RespondenNO" else np.nan),
+        })
+        if sh == "TelefonosInvalidos":
+            df["TELEFONO1 INVALIDO"] = tel
+        sheets[sh] = df
+    return sheets
+
+
+def generar_manual_casos() -> dict:
+    """MANUAL_SNAPSHOT chico con casos borde para la carga del manual.
+
+    Telefono1 en blanco / con espacios / como texto / entero / con ".0", filas
+    completamente vacías en medio de la hoja y fechas NaT, como texto o inválidas.
+    """
+    vacia = {}
+    casos = [
+        {"Telefono1": 3001234567.0, "Fecha": pd.Timestamp("2025-06-01")},
+        {"Telefono1": " ", "Telefono2": 3001234568.0, "Fecha": pd.Timestamp("2025-06-01")},
+        {"Telefono1": "", "Telefono2": 3001234569.0, "Fecha": pd.Timestamp("2025-06-02")},
+        {"Telefono1": " \t ", "Fecha": pd.Timestamp("2025-06-02")},
+        {"Telefono1": np.nan, "Telefono3": 3001234570.0, "Fecha": pd.Timestamp("2025-06-02")},
+        vacia,
+        {"Telefono1": "300 123 4571", "Fecha": pd.NaT},
+        {"Telefono1": 3001234572, "Fecha": "2025-06-03"},
+        {"Telefono1": "3001234573.0", "Fecha": "no es fecha"},
+        {"Nombre": np.nan, "Telefono1": 3001234574.0, "Fecha": pd.Timestamp("2025-06-04")},
+        {"Nombre": "  Juan  PEREZ ", "Telefono1": "+57 300-123-4575", "Fecha": pd.Timestamp("2025-06-04")},
+        vacia,
+        vacia,
+        {"Telefono1": 3001234576.0, "Fecha": pd.Timestamp("2025-06-05 17:45:00")},
+    ]
+    sheets = {}
+    for k, sh in enumerate(("Localizados", "RespondenNO", "TelefonosInvalidos", "Contesta_NoResponde")):
+        filas = []
+        for i, caso in enumerate(casos):
+            if caso is vacia:
+                filas.append({})
+                continue
+            fila = {"Tipo Identificación": "CC", "Nº Identificación": 1000 * k + i,
+                    "Nombre": f"Cliente Caso {k}-{i}", "Email": f"caso{k}{i}@correo.com", **caso}
+            if sh == "TelefonosInvalidos":
+                fila["TELEFONO1 INVALIDO"] = fila.pop("Telefono1", np.nan)
+            elif sh != "Contesta_NoResponde":
+                fila["Confirma Identidad"] = "SI" if sh == "Localizados" else "NO"
+            filas.append(fila)
+        cols = [c for c in ("Tipo Identificación", "Nº Identificación", "Nombre", "Email", "Telefono1",
+                            "Telefono2", "Telefono3", "Fecha", "Confirma Identidad", "TELEFONO1 INVALIDO")
+                if any(c in f for f in filas)]
+        sheets[sh] = pd.DataFrame(filas).reindex(columns=cols).astype(object)
+    return sheets
+
+
+def generar_historico(n_rows: int, dias: int = 30, seed: int = 2, fecha_inicio: str = "2025-10-01",
+                      swap_dia: int = None) -> dict:
+    """Hojas DATA_* de HISTORICO_UNIQUE.xlsx repartidas en `dias` snapshots.
+
+    swap_dia: índice de día cuyas columnas entidad/name quedan cruzadas (para auditar/corregir).
+    """
+    rng = np.random.default_rng(seed)
+    per_day = max(1, n_rows // max(1, dias))
+    frames = {sh: [] for sh in vc.HISTORY_SHEETS}
+    for d in range(dias):
+        day = (pd.Timestamp(fecha_inicio) + pd.Timedelta(days=d)).date().isoformat()
+        raw = vc.normalizar_reporte(generar_reporte(per_day, day, seed=seed + d, dup_rate=0.0))
+        cat, _ = vc.clasificar(raw)
+        cols = vc.BASE_COLS
+        for sh, bit in zip(vc.HISTORY_SHEETS, (vc.CAT_SI, vc.CAT_NO, vc.CAT_INVALIDOS, vc.CAT_SIN_RESPUESTA)):
+            part = raw.loc[(cat & bit) != 0, cols].copy()
+            if sh == "DATA_SIN_RESPUESTA":
+                part["Intentos totales"] = rng.integers(1, 6, len(part))
+            if swap_dia is not None and d == swap_dia:
+                part[[vc.COL_ENTIDAD, vc.COL_NAME]] = part[[vc.COL_NAME, vc.COL_ENTIDAD]].to_numpy()
+            part["snapshot_date"] = day
+            part["source_file"] = f"Report_{day}.xlsx"
+            frames[sh].append(part)
+    return {sh: pd.concat(parts, ignore_index=True) for sh, parts in frames.items()}
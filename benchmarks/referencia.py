@@ -0,0 +1,180 @@
+import pandas as pd
+from pathlib import Path
+
+# =========================
+# Implementaciones de referencia
+# =========================
+# Copia congelada de la lógica original (antes de las rutas rápidas), solo para
+# comprobar que cada optimización produce exactamente la misma salida.
+# No usar en producción.
+
+COL_FECHA = "Date of call start"
+COL_RESULT = "Attempt result"
+COL_BTN = "btn_input"
+COL_ENTIDAD = "entidad"
+COL_NAME = "name"
+COL_PHONE_TEMPLATE = "Phone"
+COL_PHONE_DIALED = "Phone B"
+COL_ATTEMPT_NUM = "Attempt number"
+COL_DURATION = "Call duration"
+
+REQUIRED_COLUMNS = [
+    COL_FECHA, COL_RESULT, COL_BTN, COL_ENTIDAD, COL_NAME,
+    COL_PHONE_TEMPLATE, COL_PHONE_DIALED, COL_ATTEMPT_NUM, COL_DURATION
+]
+
+BASE_COLS = [
+    COL_FECHA, COL_ENTIDAD, COL_NAME,
+    COL_PHONE_TEMPLATE, COL_PHONE_DIALED,
+    COL_RESULT, COL_BTN, COL_ATTEMPT_NUM, COL_DURATION,
+]
+
+
+def normalize_btn_series(s: pd.Series) -> pd.Series:
+    s_norm = (
+        s.astype(str)
+         .str.strip()
+         .replace({"": pd.NA, "nan": pd.NA, "None": pd.NA}, regex=False)
+    )
+    s_norm = s_norm.where(~s_norm.isin(["1.0", "2.0"]), s_norm.str.replace(".0", "", regex=False))
+    s_norm = s_norm.where(s_norm.isin(["1", "2"]), s_norm)
+    return s_norm
+
+
+def unique_keys(scope: str):
+    if scope == "dialed":
+        return [COL_ENTIDAD, COL_PHONE_DIALED]
+    return [COL_ENTIDAD, COL_NAME, COL_PHONE_TEMPLATE]
+
+
+def make_unique_by_category(df_cat: pd.DataFrame, scope: str) -> pd.DataFrame:
+    keys = unique_keys(scope)
+    if COL_FECHA in df_cat.columns:
+        df_cat = df_cat.sort_values(by=[COL_FECHA] + keys, ascending=True, na_position="last")
+    return df_cat.drop_duplicates(subset=keys, keep="last")
+
+
+def consolidar(df: pd.DataFrame, scope: str = "template") -> dict:
+    """Hojas del consolidado (sin RESUMEN) tal como las arma la versión original."""
+    df = df.copy()
+    for col in REQUIRED_COLUMNS:
+        if col not in df.columns:
+            df[col] = pd.NA
+    df[COL_BTN] = normalize_btn_series(df[COL_BTN])
+    df[COL_FECHA] = pd.to_datetime(df[COL_FECHA], errors="coerce")
+    for col in [COL_PHONE_TEMPLATE, COL_PHONE_DIALED]:
+        df[col] = df[col].astype(str).str.replace(r"\.0$", "", regex=True).str.strip()
+
+    df_si = df[df[COL_BTN] == "1"].copy()
+    df_no = df[df[COL_BTN] == "2"].copy()
+    df_invalidos = df[df[COL_RESULT] == "Invalid number"].copy()
+    mask_sinresp = (df[COL_RESULT] == "Call answered") & (df[COL_BTN].isna())
+    exclude = set(df_si[COL_PHONE_DIALED].dropna()) | set(df_no[COL_PHONE_DIALED].dropna())
+    df_sinresp = df[mask_sinresp & (~df[COL_PHONE_DIALED].isin(exclude))].copy()
+    for sub in (df_si, df_no, df_invalidos, df_sinresp):
+        sub.sort_values(by=[COL_FECHA, COL_PHONE_DIALED], inplace=True)
+
+    u_si_df = make_unique_by_category(df_si, scope)
+    u_no_df = make_unique_by_category(df_no, scope)
+    u_inv_df = make_unique_by_category(df_invalidos, scope)
+    u_sin_df = make_unique_by_category(df_sinresp, scope)
+
+    df_sinresp["Detalle"] = "Contestó pero no seleccionó opción"
+    intentos_por_num = df.groupby(COL_PHONE_DIALED).size().rename("Intentos totales").reset_index()
+    df_sinresp = df_sinresp.merge(intentos_por_num, how="left", on=COL_PHONE_DIALED)
+
+    keys = unique_keys(scope)
+    intentos_scope = df.groupby(keys).size().rename("Intentos totales").reset_index()
+    u_sin_df = u_sin_df.merge(intentos_scope, how="left", on=keys)
+    u_sin_df.sort_values(by=["Intentos totales", COL_FECHA], ascending=[True, True], inplace=True)
+
+    return {
+        "SI": df_si[BASE_COLS],
+        "NO": df_no[BASE_COLS],
+        "INVALIDOS": df_invalidos[BASE_COLS],
+        "SIN_RESPUESTA": df_sinresp[BASE_COLS + ["Detalle", "Intentos totales"]],
+        "UNIQUE_SI": u_si_df[BASE_COLS],
+        "UNIQUE_NO": u_no_df[BASE_COLS],
+        "UNIQUE_INVALIDOS": u_inv_df[BASE_COLS],
+        "UNIQUE_SIN_RESPUESTA": u_sin_df[BASE_COLS + ["Intentos totales"]],
+        "REDISCAR": u_sin_df[BASE_COLS + ["Intentos totales"]],
+    }
+
+
+# --- fusionar_historicos.load_manual original ---
+def norm_name(s: pd.Series) -> pd.Series:
+    return s.astype(str).str.strip().str.lower()
+
+
+def norm_phone(s: pd.Series) -> pd.Series:
+    s = s.astype(str).str.replace(r"\.0$", "", regex=True).str.strip()
+    s = s.str.replace(r"[^\d+]", "", regex=True)
+    return s
+
+
+def to_date_only(s: pd.Series) -> pd.Series:
+    d = pd.to_datetime(s, errors="coerce")
+    return d.dt.date.astype("string")
+
+
+def take_first_nonnull(row, cols):
+    for c in cols:
+        if c in row and pd.notna(row[c]) and str(row[c]).strip() != "":
+            return row[c]
+    return pd.NA
+
+
+def load_manual(path: Path) -> pd.DataFrame:
+    mapping = {
+        "Localizados": "SI",
+        "RespondenNO": "NO",
+        "TelefonosInvalidos": "INVALIDO",
+        "Contesta_NoResponde": "NO RESPONDE",
+    }
+    frames = []
+    with pd.ExcelFile(path) as xf:
+        sheet_names = xf.sheet_names
+    for sh, cat in mapping.items():
+        if sh not in sheet_names:
+            continue
+        df = pd.read_excel(path, sheet_name=sh)
+        df = df.rename(columns={c: c.strip() for c in df.columns})
+        out = pd.DataFrame({
+            "tipo_id": df.get("Tipo Identificación", pd.NA),
+            "num_id": df.get("Nº Identificación", pd.NA),
+            "name": df.get("Nombre", pd.NA),
+            "email": df.get("Email", pd.NA),
+            "telefono1": df.get("Telefono1", pd.NA),
+            "telefono2": df.get("Telefono2", pd.NA),
+            "telefono3": df.get("Telefono3", pd.NA),
+            "telefono_invalido": df.get("TELEFONO1 INVALIDO", pd.NA),
+            "confirma_identidad": df.get("Confirma Identidad", pd.NA),
+            "fecha_llamada": df.get("Fecha", pd.NA),
+        })
+        out["source"] = "manual"
+        out["categoria"] = cat
+        out["telefono"] = out.apply(
+            lambda r: r["telefono_invalido"] if cat == "INVALIDO" else take_first_nonnull(r, ["telefono1"]),
+            axis=1
+        )
+        for col in ["name", "email"]:
+            out[col] = norm_name(out[col])
+        for col in ["telefono", "telefono1", "telefono2", "telefono3", "telefono_invalido"]:
+            out[col] = norm_phone(out[col])
+        out["fecha_llamada"] = to_date_only(out["fecha_llamada"])
+        out["snapshot_date"] = out["fecha_llamada"]
+        out["source_file"] = path.name
+        out["entidad"] = pd.NA
+        if cat == "INVALIDO":
+            out["confirma_identidad"] = out["confirma_identidad"].fillna("INVALIDO")
+        frames.append(out)
+    if not frames:
+        return pd.DataFrame()
+    manual = pd.concat(frames, ignore_index=True)
+    manual = manual.dropna(subset=["name", "telefono"], how="any")
+    return manual[[
+        "snapshot_date", "source_file", "source", "categoria", "confirma_identidad",
+        "tipo_id", "num_id", "name", "email",
+        "telefono", "telefono1", "telefono2", "telefono3", "telefono_invalido",
+        "entidad", "fecha_llamada"
+    ]]
@@ -0,0 +1,478 @@
+import pandas as pd
+from pathlib import Path
+from datetime import datetime
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+
+from benchmarks import generador, referencia
+from benchmarks.entorno import (REPO_DIR, preparar_ws, clonar_ws, medir,
+                                huellas_libro, huellas_csv)
+
+# =========================
+# Suite de benchmarks
+# =========================
+# Uso:  python -m benchmarks.run --sizes 10000,100000,1000000 --stages nucleo,consolidacion
+#
+# Etapas (cada variante en su propio proceso y carpeta de trabajo):
+#   nucleo         clasificación + únicos sobre DataFrame: referencia vs actual
+#   consolidacion  voxinplant_consolidador.py: en memoria, --streaming (también con bloques chicos) y caché caliente
+#                  (--max-intentos 0 sin estado previo; REDISCAR se compara en las columnas de la referencia)
+#   rediscar       REDISCAR del segundo día contra el estado del primero: columnas agregadas y exclusiones
+#   historial      agregar un día al histórico: backend excel vs parquet vs sqlite
+#   fusion         fusionar_historicos.py: completo vs --incremental
+#   fusion_colision  igual, con un archivo nuevo sobre un snapshot ya fusionado cuyas claves chocan
+#   auditoria      auditar_hist.py
+#   correccion     corregir_swap_dia.py
+#   manual         load_manual: referencia vs actual
+#   manual_casos   load_manual y teléfono principal sobre casos borde (blancos, filas vacías, NaT)
+#   pipeline       día con swap: los cuatro scripts en secuencia vs pipeline_diario.py
+#
+# Los tamaños que pasan el máximo de filas de Excel solo corren 'nucleo'
+# (y las etapas cuyo libro sí cabe en una hoja).
+#
+# Con --check (CI) corre solo las etapas que comparan salidas, en tamaño chico,
+# sin escribir en el repo (todo queda en la carpeta temporal; no agrega a
+# logs/benchmarks.jsonl) y sale con código 1 si alguna variante difiere o falla:
+#   python -B -m benchmarks.run --check
+
+ETAPAS = ("nucleo", "consolidacion", "rediscar", "historial", "fusion", "fusion_colision", "auditoria", "correccion", "manual", "manual_casos",
+          "pipeline")
+DEFAULT_SIZES = "10000,100000"
+ETAPAS_CHECK = ("nucleo", "consolidacion", "rediscar", "historial", "fusion", "fusion_colision", "manual", "manual_casos", "pipeline")
+CHECK_SIZES = "2000"
+LOG_FILE = REPO_DIR / "logs" / "benchmarks.jsonl"
+
+REPORT_DATE = "2025-11-12"
+HIST_INICIO = "2025-10-13"
+HIST_DIAS = 30
+SWAP_DIA = 29                 # 2025-11-11, el día que corrige corregir_swap_dia.OBJETIVOS
+FILAS_DIA_HISTORIAL = 10_000  # tamaño del reporte nuevo en la etapa historial
+REDISCAR_REF = {"REDISCAR": referencia.BASE_COLS + ["Intentos totales"]}
+TOPE_REDISCAR = 3             # --max-intentos de la etapa rediscar
+
+
+def fila(etapa: str, variante: str, n: int, metricas: dict) -> dict:
+    return {"etapa": etapa, "variante": variante, "filas": n, **metricas}
+
+
+def marcar_equivalencia(filas: list, huellas: dict):
+    """Compara cada variante con la primera (la de referencia) por huella de salida."""
+    base = None
+    for f in filas:
+        h = huellas.get(f["variante"], f.pop("huellas", None))
+        if h is None or "error" in f:
+            continue
+        if base is None:
+            base = h
+            f["equivalente"] = True
+            continue
+        difs = sorted(k for k in set(base) | set(h) if base.get(k) != h.get(k))
+        f["equivalente"] = not difs
+        if difs:
+            f["difiere"] = difs
+
+
+def omitido(etapa: str, n: int, motivo: str) -> dict:
+    return {"etapa": etapa, "variante": "-", "filas": n, "omitido": motivo}
+
+
+# =========================
+# Etapas
+# =========================
+def etapa_nucleo(base: Path, n: int, args) -> list:
+    ws = preparar_ws(base / "nucleo")
+    (ws / "datos").mkdir()
+    generador.generar_reporte(n, REPORT_DATE, seed=n).to_parquet(ws / "datos" / "reporte.parquet", index=False)
+    filas = [fila("nucleo", v, n, medir(ws, "benchmarks.casos:nucleo", [v, args.scope], args.timeout))
+             for v in ("referencia", "actual")]
+    marcar_equivalencia(filas, {})
+    return filas
+
+
+def reporte_xlsx(ws: Path, n: int) -> Path:
+    path = ws / "inbox" / f"Report_{REPORT_DATE}.xlsx"
+    generador.escribir_libro({"Sheet1": generador.generar_reporte(n, REPORT_DATE, seed=n)}, path)
+    return path
+
+
+def etapa_consolidacion(base: Path, n: int, args) -> list:
+    if n > generador.EXCEL_MAX_ROWS:
+        return [omitido("consolidacion", n, "excede filas de Excel")]
+    ws = preparar_ws(base / "consolidacion")
+    src = reporte_xlsx(ws, n)
+    salida = Path("output") / "daily" / f"{src.stem}_consolidado.xlsx"
+    scope = ["--unique-scope", args.scope, "--max-intentos", "0"]
+
+    huellas = {}
+    if args.verificar:
+        ref = referencia.consolidar(pd.read_excel(src), args.scope)
+        ref_path = generador.escribir_libro(ref, base / "referencia_consolidado.xlsx")
+        huellas["referencia"] = huellas_libro(ref_path)
+
+    variantes = {
+        "memoria": ["--no-cache"],
+        "streaming": ["--streaming", "--no-cache"],
+        # Bloques chicos: ejercita la reducción de únicos entre bloques
+        "streaming_bloques": ["--streaming", "--no-cache", "--chunk-rows", str(max(1, n // 10))],
+        "cache_caliente": [],
+    }
+    filas = [{"etapa": "consolidacion", "variante": "referencia", "filas": n}] if args.verificar else []
+    for var, flags in variantes.items():
+        vws = clonar_ws(ws, base / f"consolidacion-{var}")
+        if var == "cache_caliente":
+            # Primera corrida (sin medir) llena la caché; se devuelve el reporte al inbox
+            medir(vws, "voxinplant_consolidador.py", scope, args.timeout)
+            shutil.move(str(vws / "archive_raw" / src.name), vws / "inbox" / src.name)
+            shutil.rmtree(vws / "output")
+        m = medir(vws, "voxinplant_consolidador.py", scope + flags, args.timeout)
+        if args.verificar and "error" not in m:
+            huellas[var] = huellas_libro(vws / salida, columnas=REDISCAR_REF)
+        filas.append(fila("consolidacion", var, n, m))
+        shutil.rmtree(vws)
+    marcar_equivalencia(filas, huellas)
+    return filas
+
+
+def rediscar_esperado(dia1: pd.DataFrame, dia2: pd.DataFrame, max_intentos: int, scope: str) -> pd.DataFrame:
+    """REDISCAR del día 2 con el estado del día 1, calculado aparte con la referencia + pandas."""
+    def tel(df):
+        return df[referencia.COL_PHONE_DIALED].astype(str).str.replace(r"\.0$", "", regex=True).str.strip()
+
+    base = referencia.consolidar(dia2, scope)["REDISCAR"]
+    t1 = tel(dia1)
+    btn1 = referencia.normalize_btn_series(dia1[referencia.COL_BTN])
+    resueltos = set(t1[btn1.isin(["1", "2"]).fillna(False)].dropna())
+    ultimo = pd.to_datetime(dia1[referencia.COL_FECHA], errors="coerce").groupby(t1).max()
+
+    p = base[referencia.COL_PHONE_DIALED]
+    antes = p.map(t1.value_counts()).fillna(0)
+    fuera = p.isin(resueltos) | ((antes >= max_intentos) if max_intentos else False)
+    out = base.assign(**{
+        "Intentos acumulados": (antes + p.map(tel(dia2).value_counts())).astype("Int64"),
+        "Último intento previo": p.map(ultimo.dt.strftime("%Y-%m-%d %H:%M:%S")),
+    })
+    return out[~fuera.to_numpy(dtype=bool)]
+
+
+def etapa_rediscar(base: Path, n: int, args) -> list:
+    if n > generador.EXCEL_MAX_ROWS:
+        return [omitido("rediscar", n, "excede filas de Excel")]
+    ws = preparar_ws(base / "rediscar")
+    dia2 = (pd.Timestamp(REPORT_DATE) + pd.Timedelta(days=1)).date().isoformat()
+    d1 = generador.generar_reporte(n, REPORT_DATE, seed=n)
+    # Día 2: los mismos números otra vez, todos sin responder, más contactos nuevos
+    d2 = d1.assign(**{"Date of call start": pd.to_datetime(d1["Date of call start"]) + pd.Timedelta(days=1),
+                      "btn_input": None, "Attempt result": "Call answered"})
+    d2 = pd.concat([d2, generador.generar_reporte(max(1, n // 4), dia2, seed=n + 1)], ignore_index=True)
+    rep1 = generador.escribir_libro({"Sheet1": d1}, ws / "inbox" / f"Report_{REPORT_DATE}.xlsx")
+    rep2 = generador.escribir_libro({"Sheet1": d2}, ws / f"Report_{dia2}.xlsx")
+    flags = ["--unique-scope", args.scope, "--max-intentos", TOPE_REDISCAR, "--no-cache"]
+
+    filas = [{"etapa": "rediscar", "variante": "esperado", "filas": len(d2)}]
+    medir(ws, "voxinplant_consolidador.py", flags, args.timeout)   # día 1: deja el estado
+    shutil.move(str(rep2), ws / "inbox" / rep2.name)
+    m = medir(ws, "voxinplant_consolidador.py", flags, args.timeout)
+    filas.append(fila("rediscar", "actual", len(d2), m))
+    if "error" not in m:
+        esperado = rediscar_esperado(pd.read_excel(ws / "archive_raw" / rep1.name),
+                                     pd.read_excel(ws / "archive_raw" / rep2.name), TOPE_REDISCAR, args.scope)
+        esp_path = generador.escribir_libro({"REDISCAR": esperado}, base / "rediscar_esperado.xlsx")
+        huellas = {"esperado": huellas_libro(esp_path),
+                   "actual": {"REDISCAR": huellas_libro(ws / "output" / "daily" / f"{rep2.stem}_consolidado.xlsx")["REDISCAR"]}}
+        marcar_equivalencia(filas, huellas)
+    shutil.rmtree(ws)
+    return filas
+
+
+def escribir_historico(ws: Path, sheets: dict):
+    generador.escribir_libro(sheets, ws / "output" / "history" / "HISTORICO_UNIQUE.xlsx")
+
+
+def etapa_historial(base: Path, n: int, args) -> list:
+    hist = generador.generar_historico(n, HIST_DIAS, fecha_inicio=HIST_INICIO)
+    ws = preparar_ws(base / "historial")
+    try:
+        escribir_historico(ws, hist)
+    except ValueError as e:
+        return [omitido("historial", n, str(e))]
+    generador.escribir_libro({"Sheet1": generador.generar_reporte(FILAS_DIA_HISTORIAL, REPORT_DATE)},
+                             ws / "inbox" / f"Report_{REPORT_DATE}.xlsx")
+
+    huellas, filas = {}, []
+    almacen = {"parquet": "historico_store.py", "sqlite": "historico_sqlite.py"}
+    for var in ("excel", "parquet", "sqlite"):
+        vws = clonar_ws(ws, base / f"historial-{var}")
+        if var in almacen:
+            medir(vws, almacen[var], ["--import-xlsx"], args.timeout)
+        m = medir(vws, "voxinplant_consolidador.py", ["--no-cache", "--history-backend", var], args.timeout)
+        if args.verificar and "error" not in m:
+            if var in almacen:
+                medir(vws, almacen[var], ["--export-xlsx"], args.timeout)
+            huellas[var] = huellas_libro(vws / "output" / "history" / "HISTORICO_UNIQUE.xlsx", ordenar=True)
+        filas.append(fila("historial", var, n, m))
+        shutil.rmtree(vws)
+    marcar_equivalencia(filas, huellas)
+    return filas
+
+
+def ws_historico(base: Path, n: int):
+    """Carpeta con MANUAL_SNAPSHOT + HISTORICO_UNIQUE (con un día cruzado) para fusión/auditoría."""
+    ws = base / "historico"
+    if (ws / "output" / "history" / "HISTORICO_UNIQUE.xlsx").exists():
+        return ws, None
+    hist = generador.generar_historico(n, HIST_DIAS, fecha_inicio=HIST_INICIO, swap_dia=SWAP_DIA)
+    preparar_ws(ws)
+    try:
+        escribir_historico(ws, hist)
+        generador.escribir_libro(generador.generar_manual(max(1, n // 5)),
+                                 ws / "output" / "history" / "MANUAL_SNAPSHOT.xlsx")
+    except ValueError as e:
+        shutil.rmtree(ws)
+        return None, str(e)
+    # Versión sin el último día, para medir la fusión incremental de un día nuevo
+    ultimo = max(df["snapshot_date"].max() for df in hist.values())
+    previo = {sh: df[df["snapshot_date"] != ultimo] for sh, df in hist.items()}
+    generador.escribir_libro(previo, ws / "HISTORICO_PREVIO.xlsx")
+    return ws, None
+
+
+def etapa_fusion(base: Path, n: int, args) -> list:
+    ws, error = ws_historico(base, n)
+    if ws is None:
+        return [omitido("fusion", n, error)]
+    hist_path = Path("output") / "history" / "HISTORICO_UNIQUE.xlsx"
+    csv_path = Path("output") / "history" / "BASE_HISTORICA_UNIFICADA.csv"
+
+    huellas, filas = {}, []
+    for var in ("completo", "incremental"):
+        vws = clonar_ws(ws, base / f"fusion-{var}")
+        flags = []
+        if var == "incremental":
+            # Estado sembrado con todos los días menos el último (sin medir)
+            shutil.copy2(vws / hist_path, vws / "HISTORICO_COMPLETO.xlsx")
+            shutil.copy2(vws / "HISTORICO_PREVIO.xlsx", vws / hist_path)
+            medir(vws, "fusionar_historicos.py", [], args.timeout)
+            shutil.copy2(vws / "HISTORICO_COMPLETO.xlsx", vws / hist_path)
+            flags = ["--incremental"]
+        m = medir(vws, "fusionar_historicos.py", flags, args.timeout)
+        if args.verificar and "error" not in m:
+            huellas[var] = huellas_csv(vws / csv_path)
+        filas.append(fila("fusion", var, n, m))
+        shutil.rmtree(vws)
+    marcar_equivalencia(filas, huellas)
+    return filas
+
+
+def etapa_fusion_colision(base: Path, n: int, args) -> list:
+    """Completo vs --incremental cuando un source_file nuevo repite claves de un snapshot ya fusionado."""
+    hist = generador.generar_historico(n, 5, fecha_inicio=HIST_INICIO)
+    si = hist["DATA_SI"]
+    ultimo = si[si["snapshot_date"] == si["snapshot_date"].max()]
+    # Mismas claves (snapshot_date, categoria, name, telefono), otras columnas: gana la fila nueva
+    choque = ultimo.assign(source_file=ultimo["source_file"].str.replace(".xlsx", "_b.xlsx", regex=False),
+                           entidad=ultimo["entidad"].iloc[::-1].to_numpy(),
+                           **{"Date of call start": ultimo["Date of call start"] + pd.Timedelta(hours=1)})
+    completo = {**hist, "DATA_SI": pd.concat([si, choque], ignore_index=True)}
+    ws = preparar_ws(base / "fusion_colision")
+    hist_path = ws / "output" / "history" / "HISTORICO_UNIQUE.xlsx"
+    csv_path = Path("output") / "history" / "BASE_HISTORICA_UNIFICADA.csv"
+
+    huellas, filas = {}, []
+    for var in ("completo", "incremental"):
+        vws = clonar_ws(ws, base / f"fusion_colision-{var}")
+        vhist = vws / hist_path.relative_to(ws)
+        flags = []
+        if var == "incremental":
+            escribir_historico(vws, hist)
+            medir(vws, "fusionar_historicos.py", [], args.timeout)
+            # Con filas reemplazadas el CSV se regenera desde las partes al exportar
+            flags = ["--incremental", "--export-xlsx"]
+        generador.escribir_libro(completo, vhist)
+        m = medir(vws, "fusionar_historicos.py", flags, args.timeout)
+        if args.verificar and "error" not in m:
+            huellas[var] = huellas_csv(vws / csv_path)
+        filas.append(fila("fusion_colision", var, n, m))
+        shutil.rmtree(vws)
+    shutil.rmtree(ws)
+    marcar_equivalencia(filas, huellas)
+    return filas
+
+
+def etapa_script(etapa: str, script: str):
+    def correr(base: Path, n: int, args) -> list:
+        ws, error = ws_historico(base, n)
+        if ws is None:
+            return [omitido(etapa, n, error)]
+        vws = clonar_ws(ws, base / etapa)
+        m = medir(vws, script, [], args.timeout)
+        shutil.rmtree(vws)
+        return [fila(etapa, "actual", n, m)]
+    return correr
+
+
+def etapa_manual(base: Path, n: int, args) -> list:
+    ws, error = ws_historico(base, n)
+    if ws is None:
+        return [omitido("manual", n, error)]
+    filas = [fila("manual", v, n // 5, medir(ws, "benchmarks.casos:manual", [v], args.timeout))
+             for v in ("referencia", "actual")]
+    marcar_equivalencia(filas, {})
+    return filas
+
+
+def etapa_manual_casos(base: Path, n: int, args) -> list:
+    # Los casos son fijos: no dependen de n
+    ws = preparar_ws(base / "manual_casos")
+    casos = generador.generar_manual_casos()
+    generador.escribir_libro(casos, ws / "output" / "history" / "MANUAL_SNAPSHOT.xlsx")
+    filas = [fila("manual_casos", v, sum(len(df) for df in casos.values()),
+                  medir(ws, "benchmarks.casos:manual_casos", [v], args.timeout))
+             for v in ("referencia", "actual")]
+    marcar_equivalencia(filas, {})
+    shutil.rmtree(ws)
+    return filas
+
+
+def medir_secuencia(ws: Path, pasos: list, timeout: float = None) -> dict:
+    """Corre varios scripts seguidos; suma tiempos y toma el mayor pico de memoria."""
+    total = {"wall_s": 0.0, "cpu_s": 0.0, "rss_pico_mb": 0.0}
+    for script, flags in pasos:
+        m = medir(ws, script, flags, timeout)
+        if "error" in m:
+            return {"error": [f"{script}: {m['error'][0] if m['error'] else ''}"]}
+        total["wall_s"] = round(total["wall_s"] + m["wall_s"], 4)
+        total["cpu_s"] = round(total["cpu_s"] + m["cpu_s"], 4)
+        total["rss_pico_mb"] = max(total["rss_pico_mb"], m["rss_pico_mb"])
+    return total
+
+
+def etapa_pipeline(base: Path, n: int, args) -> list:
+    ws, error = ws_historico(base, n)
+    if ws is None:
+        return [omitido("pipeline", n, error)]
+    hist_path = Path("output") / "history" / "HISTORICO_UNIQUE.xlsx"
+    csv_path = Path("output") / "history" / "BASE_HISTORICA_UNIFICADA.csv"
+    # Reporte del día del swap (columnas entidad/name cruzadas) sobre el histórico sin ese día
+    dia = (pd.Timestamp(HIST_INICIO) + pd.Timedelta(days=SWAP_DIA)).date().isoformat()
+    rep = generador.generar_reporte(FILAS_DIA_HISTORIAL, dia)
+    rep[["entidad", "name"]] = rep[["name", "entidad"]].to_numpy()
+
+    secuencia = [("voxinplant_consolidador.py", ["--unique-scope", args.scope]), ("corregir_swap_dia.py", []),
+                 ("auditar_hist.py", []), ("fusionar_historicos.py", [])]
+    huellas, filas = {}, []
+    for var in ("secuencial", "pipeline"):
+        vws = clonar_ws(ws, base / f"pipeline-{var}")
+        shutil.copy2(vws / "HISTORICO_PREVIO.xlsx", vws / hist_path)
+        generador.escribir_libro({"Sheet1": rep}, vws / "inbox" / f"Report_{dia}.xlsx")
+        if var == "secuencial":
+            m = medir_secuencia(vws, secuencia, args.timeout)
+        else:
+            m = medir(vws, "pipeline_diario.py", ["--corregir-swap", "--unique-scope", args.scope], args.timeout)
+        if args.verificar and "error" not in m:
+            # telefono1/telefono_invalido del automático pasan sin normalizar: en la secuencia salen
+            # del Excel releído (Phone como float, "…0.0") y en el pipeline del texto en memoria
+            huellas[var] = {**huellas_libro(vws / hist_path, ordenar=True),
+                            **huellas_csv(vws / csv_path, omitir_cols=("telefono1", "telefono_invalido"))}
+        filas.append(fila("pipeline", var, n, m))
+        shutil.rmtree(vws)
+    marcar_equivalencia(filas, huellas)
+    return filas
+
+
+CORREDORES = {
+    "nucleo": etapa_nucleo,
+    "consolidacion": etapa_consolidacion,
+    "rediscar": etapa_rediscar,
+    "historial": etapa_historial,
+    "fusion": etapa_fusion,
+    "fusion_colision": etapa_fusion_colision,
+    "auditoria": etapa_script("auditoria", "auditar_hist.py"),
+    "correccion": etapa_script("correccion", "corregir_swap_dia.py"),
+    "manual": etapa_manual,
+    "manual_casos": etapa_manual_casos,
+    "pipeline": etapa_pipeline,
+}
+
+
+# =========================
+# Reporte
+# =========================
+def imprimir_tabla(filas: list):
+    cols = ["etapa", "variante", "filas", "wall_s", "cpu_s", "rss_pico_mb", "equivalente"]
+    df = pd.DataFrame(filas)
+    for c in cols:
+        if c not in df.columns:
+            df[c] = pd.NA
+    extra = [c for c in ("difiere", "omitido", "error") if c in df.columns]
+    print(df[cols + extra].to_string(index=False, na_rep=""))
+
+
+def registrar(filas: list, path: Path = LOG_FILE):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with open(path, "a", encoding="utf-8") as f:
+        for r in filas:
+            f.write(json.dumps({"fecha": now, **r}, ensure_ascii=False, default=str) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de los scripts con datos sintéticos.")
+    parser.add_argument("--sizes", default=None,
+                        help=f"Filas por reporte/histórico, separadas por coma "
+                             f"(default: {DEFAULT_SIZES}; con --check: {CHECK_SIZES}).")
+    parser.add_argument("--stages", default=None,
+                        help=f"Etapas a correr, separadas por coma: {', '.join(ETAPAS)} "
+                             f"(con --check, por defecto: {', '.join(ETAPAS_CHECK)}).")
+    parser.add_argument("--check", action="store_true",
+                        help="Verificación para CI: tamaño chico, solo etapas que comparan salidas, sin escribir "
+                             "logs/benchmarks.jsonl; código de salida 1 si alguna variante difiere o falla.")
+    parser.add_argument("--scope", choices=["template", "dialed"], default="template",
+                        help="Alcance de únicos para nucleo/consolidacion.")
+    parser.add_argument("--no-verificar", dest="verificar", action="store_false",
+                        help="No compara las salidas entre variantes (ahorra releer los libros).")
+    parser.add_argument("--timeout", type=float, default=None, help="Límite en segundos por variante.")
+    parser.add_argument("--dir", type=Path, default=None, help="Carpeta de trabajo (default: temporal).")
+    parser.add_argument("--conservar", action="store_true", help="No borra la carpeta de trabajo al terminar.")
+    args = parser.parse_args()
+    if args.check:
+        args.verificar = True
+    sizes_txt = args.sizes or (CHECK_SIZES if args.check else DEFAULT_SIZES)
+    etapas_txt = args.stages or ",".join(ETAPAS_CHECK if args.check else ETAPAS)
+
+    sizes = [int(s.replace("_", "")) for s in sizes_txt.split(",") if s.strip()]
+    etapas = [e.strip() for e in etapas_txt.split(",") if e.strip()]
+    invalidas = [e for e in etapas if e not in CORREDORES]
+    if invalidas:
+        parser.error(f"Etapas no válidas: {', '.join(invalidas)}")
+
+    root = Path(args.dir or tempfile.mkdtemp(prefix="vox_bench_"))
+    filas = []
+    try:
+        for n in sizes:
+            base = root / f"n{n}"
+            base.mkdir(parents=True, exist_ok=True)
+            for etapa in etapas:
+                print(f"⏱️  {etapa} | {n} filas ...", flush=True)
+                filas += CORREDORES[etapa](base, n, args)
+    finally:
+        if not args.conservar:
+            shutil.rmtree(root, ignore_errors=True)
+
+    print()
+    imprimir_tabla(filas)
+    if args.check:
+        fallas = [f for f in filas if "error" in f or f.get("equivalente") is False]
+        if fallas:
+            print(f"\n[ERROR] {len(fallas)} variante(s) difieren de la referencia o fallaron.")
+            sys.exit(1)
+        print("\n✅ Todas las variantes coinciden con la referencia.")
+        return
+    registrar(filas)
+    print(f"\n📝 Resultados agregados a {LOG_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import pandas as pd
+from pathlib import Path
+import hashlib
+import inspect
+import os
+
+# =========================
+# Caché de reportes parseados (por hash de contenido)
+# =========================
+# Guarda el DataFrame ya normalizado de cada reporte crudo en Parquet, con
+# nombre <sha256 del archivo>-<versión de normalización>.parquet. Si cambia el
+# código de normalización cambia la versión y la entrada vieja deja de usarse
+# (y se borra al guardar la nueva). Se expulsan las entradas menos usadas
+# cuando la carpeta pasa de MAX_CACHE_MB.
+BASE_DIR = Path(__file__).resolve().parent
+CACHE_DIR = BASE_DIR / "cache" / "reportes"
+MAX_CACHE_MB = 2048
+HASH_BLOCK = 1024 * 1024
+
+
+def hash_archivo(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def firma_codigo(*objs) -> str:
+    """Versión corta derivada del código fuente (o repr) de los objetos dados."""
+    h = hashlib.sha256()
+    for o in objs:
+        try:
+            src = inspect.getsource(o)
+        except (TypeError, OSError):
+            src = repr(o)
+        h.update(src.encode("utf-8"))
+    return h.hexdigest()[:12]
+
+
+def _entry(file_hash: str, version: str, cache_dir: Path) -> Path:
+    return cache_dir / f"{file_hash}-{version}.parquet"
+
+
+def disponible() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def cargar(file_hash: str, version: str, cache_dir: Path = CACHE_DIR):
+    """DataFrame cacheado o None si no hay entrada para ese hash+versión."""
+    p = _entry(file_hash, version, cache_dir)
+    if not p.exists():
+        return None
+    try:
+        df = pd.read_parquet(p)
+    except Exception:
+        return None
+    os.utime(p)  # marca de uso para la expulsión LRU
+    return df
+
+
+def _convertible(df: pd.DataFrame) -> bool:
+    """Solo se cachea si Parquet conserva los tipos (sin columnas object mezcladas)."""
+    import pyarrow as pa
+
+    for c in df.columns:
+        if df[c].dtype == object:
+            try:
+                pa.array(df[c], from_pandas=True)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                return False
+    return True
+
+
+def guardar(file_hash: str, version: str, df: pd.DataFrame, cache_dir: Path = CACHE_DIR,
+            max_mb: float = MAX_CACHE_MB) -> bool:
+    if not _convertible(df):
+        return False
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    # Entradas del mismo archivo con otra versión de normalización ya no sirven
+    for old in cache_dir.glob(f"{file_hash}-*.parquet"):
+        old.unlink(missing_ok=True)
+    p = _entry(file_hash, version, cache_dir)
+    tmp = p.with_suffix(".tmp")
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, p)
+    expulsar(cache_dir, max_mb)
+    return True
+
+
+def expulsar(cache_dir: Path = CACHE_DIR, max_mb: float = MAX_CACHE_MB):
+    """Borra las entradas menos recientemente usadas hasta quedar bajo max_mb."""
+    entries = [(p, p.stat()) for p in cache_dir.glob("*.parquet")]
+    total = sum(st.st_size for _, st in entries)
+    limit = max_mb * 1024 * 1024
+    for p, st in sorted(entries, key=lambda e: e[1].st_mtime):
+        if total <= limit:
+            break
+        p.unlink(missing_ok=True)
+        total -= st.st_size
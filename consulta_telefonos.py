@@ -0,0 +1,351 @@
+import argparse
+import functools
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, unquote, urlparse
+
+import numpy as np
+import pandas as pd
+
+import entidades
+import fusionar_historicos
+import telefonos
+
+# =========================
+# Consulta del historial de un número (servicio local)
+# =========================
+# "¿Qué pasó con este número?" sin abrir BASE_HISTORICA_UNIFICADA.xlsx.
+# Lee la base unificada de fusionar_historicos desde sus partes Parquet
+# (output/history/unificada/part-*.parquet; si no hay partes, desde el CSV) y
+# arma un índice compacto por campo: hash 64-bit de la clave normalizada → fila,
+# en dos arreglos numpy ordenados (búsqueda binaria, sin un dict por valor).
+# Las filas se guardan por columna como códigos int32 + valores distintos, así
+# armar una respuesta es indexar arreglos numpy (sin pandas por consulta).
+#   telefono  telefono/telefono1/2/3, limpios como en la fusión y en +57 si son
+#             colombianos (3001234567, 573001234567 y +57 300 123 4567 son el mismo)
+#   name      mayúsculas, sin tildes ni espacios de sobra
+#   entidad   forma canónica de entidades.py ("BANCOLOMBIA S.A." = BANCOLOMBIA)
+# Los resultados pasan por una caché LRU. Cada POLL_SECONDS se revisa la carpeta
+# de partes: si solo hay partes nuevas (fusión --incremental) se leen e indexan
+# solo esas; si cambió o desapareció una ya cargada (fusión completa) se recarga
+# todo. La caché se invalida con cada recarga.
+PARTS_DIR = fusionar_historicos.PARTS_DIR
+CSV_PATH = fusionar_historicos.OUT_CSV
+HOST = "127.0.0.1"   # solo local
+PORT = 8765
+POLL_SECONDS = 5.0
+CACHE_SIZE = 4096
+LIMITE = 50          # filas por respuesta (las más recientes); el resumen cuenta todas
+
+CAMPOS = {
+    "telefono": ("telefono", "telefono1", "telefono2", "telefono3"),
+    "name": ("name",),
+    "entidad": ("entidad",),
+}
+
+
+def clave_telefono(s: pd.Series) -> pd.Series:
+    # Sin memo: el servicio no lo guarda nunca y con cada recarga solo crecería
+    return telefonos.normalizar(s, "fusion", e164=True, memo=False)
+
+
+def clave_name(s: pd.Series) -> pd.Series:
+    s = entidades.normalizar(s).str.normalize("NFKD").str.replace("[\u0300-\u036f]", "", regex=True)
+    return s.str.replace(r"\s+", " ", regex=True)
+
+
+CLAVES = {"telefono": clave_telefono, "name": clave_name, "entidad": entidades.canonico}
+
+
+def clave(campo: str, valor) -> str:
+    """Clave normalizada de un valor buscado (igual a la que se indexa)."""
+    if campo == "telefono":
+        return telefonos.normalizar_valor(valor, "fusion", e164=True)
+    return _clave_texto(campo, str(valor))
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def _clave_texto(campo: str, valor: str) -> str:
+    out = CLAVES[campo](pd.Series([valor], dtype="string")).iloc[0]
+    return "" if pd.isna(out) else out
+
+
+def _hash(valores: np.ndarray) -> np.ndarray:
+    return pd.util.hash_array(np.asarray(valores, dtype=object))
+
+
+# =========================
+# Índice
+# =========================
+class _Estado:
+    """Lo cargado en un momento dado; se reemplaza entero (nunca se modifica) al recargar."""
+
+    def __init__(self, generacion: int, firmas: dict, partes: list, inicios: np.ndarray, indices: dict):
+        self.generacion = generacion
+        self.firmas = firmas      # path → (tamaño, mtime_ns)
+        self.partes = partes      # por parte: {columna: (códigos, valores)}
+        self.inicios = inicios    # fila global donde empieza cada parte
+        self.indices = indices    # campo → (hashes ordenados, filas globales)
+
+    @property
+    def filas(self) -> int:
+        return int(self.inicios[-1]) if len(self.inicios) else 0
+
+
+class IndiceTelefonos:
+    """Índice en memoria de la base unificada para consultas por teléfono, name o entidad."""
+
+    def __init__(self, parts_dir: Path = PARTS_DIR, csv_path: Path = CSV_PATH, cache_size: int = CACHE_SIZE):
+        self.parts_dir = Path(parts_dir)
+        self.csv_path = Path(csv_path)
+        self._estado = _Estado(0, {}, [], np.zeros(1, dtype="int64"), {})
+        self._lock = threading.Lock()
+        self._resolver = functools.lru_cache(maxsize=cache_size)(self._buscar)
+        self.actualizar()
+
+    # ---------- carga ----------
+    def fuentes(self) -> dict:
+        """{path: (tamaño, mtime_ns)} de las partes (o del CSV si no hay partes)."""
+        partes = sorted(self.parts_dir.glob("part-*.parquet")) if self.parts_dir.exists() else []
+        if not partes and self.csv_path.exists():
+            partes = [self.csv_path]
+        firmas = {}
+        for p in partes:
+            try:
+                st = p.stat()
+            except FileNotFoundError:   # la fusión la reemplazó justo ahora; se verá en la próxima
+                continue
+            firmas[p] = (st.st_size, st.st_mtime_ns)
+        return firmas
+
+    def actualizar(self) -> int:
+        """Carga lo nuevo; devuelve cuántas partes se leyeron (0 = sin cambios)."""
+        with self._lock:
+            previo = self._estado
+            firmas = self.fuentes()
+            if firmas == previo.firmas:
+                return 0
+            completa = any(firmas.get(p) != f for p, f in previo.firmas.items())
+            base = _Estado(previo.generacion, {}, [], np.zeros(1, dtype="int64"), {}) if completa else previo
+            nuevas = [p for p in firmas if p not in base.firmas]
+
+            partes, inicios, indices = list(base.partes), [int(x) for x in base.inicios], dict(base.indices)
+            for p in nuevas:
+                df = pd.read_csv(p, dtype=str, encoding="utf-8-sig") if p.suffix == ".csv" else pd.read_parquet(p)
+                desde = inicios[-1]
+                for campo, cols in CAMPOS.items():
+                    indices[campo] = _agregar(indices.get(campo), *_claves(df, campo, cols, desde))
+                partes.append(_columnas(df))
+                inicios.append(desde + len(df))
+
+            self._estado = _Estado(previo.generacion + 1, firmas, partes, np.array(inicios, dtype="int64"), indices)
+            self._resolver.cache_clear()
+            return len(nuevas)
+
+    # ---------- consulta ----------
+    def buscar(self, telefono=None, name=None, entidad=None, limite: int = LIMITE) -> dict:
+        """Historial de un teléfono (o de un name / una entidad): resumen + las `limite` filas más recientes."""
+        pedidos = {c: v for c, v in (("telefono", telefono), ("name", name), ("entidad", entidad)) if v not in (None, "")}
+        if len(pedidos) != 1:
+            raise ValueError("Indica exactamente uno: telefono, name o entidad")
+        (campo, valor), = pedidos.items()
+        return self._resolver(self._estado.generacion, campo, clave(campo, valor), int(limite))
+
+    def _buscar(self, generacion: int, campo: str, clave_: str, limite: int) -> dict:
+        # generacion solo separa la caché entre recargas; se responde con lo cargado ahora
+        estado = self._estado
+        filas = np.array([], dtype="int64")
+        if clave_ and campo in estado.indices:
+            hashes, posiciones = estado.indices[campo]
+            h = _hash([clave_])[0]
+            filas = np.unique(posiciones[np.searchsorted(hashes, h, "left"):np.searchsorted(hashes, h, "right")])
+        out = {"campo": campo, "clave": clave_, "total": int(len(filas)), "resumen": {}, "filas": []}
+        if not len(filas):
+            return out
+        parte = np.searchsorted(estado.inicios, filas, side="right") - 1
+
+        # Resumen sobre todas las coincidencias (solo dos columnas)
+        fecha_fila = np.array(["" if v is None else str(v) for v in _valores(estado, filas, parte, "snapshot_date")])
+        fechas = [f for f in fecha_fila if f]
+        categorias = [str(v) for v in _valores(estado, filas, parte, "categoria") if v is not None]
+        out["resumen"] = {
+            "registros": int(len(filas)),
+            "dias": len(set(fechas)),
+            "primera_fecha": min(fechas, default=None),
+            "ultima_fecha": max(fechas, default=None),
+            "por_categoria": dict(Counter(categorias).most_common()),
+        }
+
+        # Filas: las `limite` más recientes por snapshot_date (el orden de carga de las partes no
+        # sigue la fecha: backfills, recargas), en orden de fecha; a igual fecha, la cargada después
+        orden = np.argsort(fecha_fila, kind="stable")
+        elegidas = orden[-limite:] if limite > 0 else orden[:0]
+        ultimas, parte = filas[elegidas], parte[elegidas]
+        cols = list(estado.partes[int(parte[0])]) if len(ultimas) else []
+        valores = [_valores(estado, ultimas, parte, c) for c in cols]
+        out["filas"] = [dict(zip(cols, fila)) for fila in zip(*valores)]
+        return out
+
+    def estado(self) -> dict:
+        e = self._estado
+        info = self._resolver.cache_info()
+        return {"filas": e.filas, "partes": len(e.partes), "generacion": e.generacion,
+                "claves": {c: int(len(h)) for c, (h, _) in e.indices.items()},
+                "cache": {"hits": info.hits, "misses": info.misses, "tamano": info.currsize}}
+
+
+def _columnas(df: pd.DataFrame) -> dict:
+    """{columna: (códigos int32, valores distintos)}; código -1 = vacío."""
+    out = {}
+    for c in df.columns:
+        codigos, distintos = pd.factorize(df[c])
+        valores = np.empty(len(distintos) + 1, dtype=object)   # el último es el vacío (código -1)
+        valores[:-1] = np.asarray(distintos, dtype=object)
+        out[c] = (codigos.astype("int32"), valores)
+    return out
+
+
+def _valores(estado: _Estado, filas: np.ndarray, parte: np.ndarray, col: str) -> list:
+    """Valores de una columna en esas filas globales (en ese orden)."""
+    out = np.empty(len(filas), dtype=object)
+    for i in np.unique(parte):
+        en = parte == i
+        columna = estado.partes[i].get(col)
+        if columna is not None:
+            codigos, valores = columna
+            out[en] = valores[codigos[filas[en] - estado.inicios[i]]]
+    return out.tolist()
+
+
+def _claves(df: pd.DataFrame, campo: str, cols: tuple, desde: int) -> tuple:
+    """(hashes, filas globales) de las claves no vacías de un campo en un DataFrame."""
+    hashes, filas = [], []
+    for c in cols:
+        if c not in df.columns:
+            continue
+        s = df[c]
+        ok = (s.notna() & (s.astype("string").str.strip() != "")).fillna(False).to_numpy()
+        if not ok.any():
+            continue
+        codigos, distintos = pd.factorize(s[ok])   # normaliza y hashea cada valor distinto una vez
+        k = CLAVES[campo](pd.Series(distintos)).astype("string")
+        validas = k.notna() & (k != "")
+        h = _hash(k.fillna("").to_numpy(dtype=object))
+        usar = validas.to_numpy()[codigos]
+        hashes.append(h[codigos][usar])
+        filas.append((np.flatnonzero(ok) + desde)[usar])
+    if not hashes:
+        return np.array([], dtype="uint64"), np.array([], dtype="int64")
+    return np.concatenate(hashes), np.concatenate(filas).astype("int64")
+
+
+def _agregar(previo, hashes: np.ndarray, filas: np.ndarray) -> tuple:
+    """Inserta claves nuevas en los arreglos ordenados (O(n + m), sin reordenar todo)."""
+    orden = np.argsort(hashes, kind="stable")
+    hashes, filas = hashes[orden], filas[orden]
+    if previo is None or not len(previo[0]):
+        return hashes, filas
+    pos = np.searchsorted(previo[0], hashes, side="right")
+    return np.insert(previo[0], pos, hashes), np.insert(previo[1], pos, filas)
+
+
+# =========================
+# Servicio HTTP/JSON
+# =========================
+#   GET /telefono/<numero>[?limite=N]
+#   GET /buscar?telefono=...|name=...|entidad=...[&limite=N]
+#   GET /estado
+class _Manejador(BaseHTTPRequestHandler):
+    indice: IndiceTelefonos = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        try:
+            limite = int(params.pop("limite", LIMITE))
+            if url.path == "/estado":
+                return self._json(200, self.indice.estado())
+            if url.path.startswith("/telefono/"):
+                return self._json(200, self.indice.buscar(telefono=unquote(url.path[len("/telefono/"):]), limite=limite))
+            if url.path == "/buscar":
+                return self._json(200, self.indice.buscar(limite=limite, **{k: v for k, v in params.items() if k in CAMPOS}))
+        except ValueError as e:
+            return self._json(400, {"error": str(e)})
+        self._json(404, {"error": f"Ruta no encontrada: {url.path}"})
+
+    def _json(self, codigo: int, data: dict):
+        cuerpo = json.dumps(data, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(codigo)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, fmt, *args):   # sin una línea por consulta en consola
+        pass
+
+
+def vigilar(indice: IndiceTelefonos, parar: threading.Event, poll_s: float = POLL_SECONDS):
+    """Recarga en segundo plano las partes nuevas de la base unificada."""
+    while not parar.wait(poll_s):
+        try:
+            n = indice.actualizar()
+        except Exception as e:   # una parte a medio escribir o ilegible: se reintenta en el próximo sondeo
+            print(f"[Aviso] No se pudo recargar la base unificada: {e}")
+            continue
+        if n:
+            print(f"🔄 {n} parte(s) nueva(s) cargada(s): {indice.estado()['filas']} filas")
+
+
+def servir(indice: IndiceTelefonos, host: str = HOST, port: int = PORT, poll_s: float = POLL_SECONDS):
+    manejador = type("Manejador", (_Manejador,), {"indice": indice})
+    parar = threading.Event()
+    hilo = threading.Thread(target=vigilar, args=(indice, parar, poll_s), daemon=True)
+    hilo.start()
+    with ThreadingHTTPServer((host, port), manejador) as srv:
+        print(f"📞 Consulta de teléfonos en http://{host}:{port}/telefono/<numero>  (Ctrl+C para salir)")
+        try:
+            srv.serve_forever()
+        except KeyboardInterrupt:
+            print("\n🛑 Servicio detenido.")
+        finally:
+            parar.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consulta local del historial de un teléfono en la base unificada.")
+    parser.add_argument("numero", nargs="?", default=None,
+                        help="Consulta un número y sale (sin levantar el servicio).")
+    parser.add_argument("--name", default=None, help="Consulta por name en lugar de teléfono y sale.")
+    parser.add_argument("--entidad", default=None, help="Consulta por entidad en lugar de teléfono y sale.")
+    parser.add_argument("--limite", type=int, default=LIMITE, help="Filas a mostrar (las más recientes).")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--poll", type=float, default=POLL_SECONDS,
+                        help="Segundos entre revisiones de partes nuevas de la base unificada.")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    indice = IndiceTelefonos()
+    e = indice.estado()
+    if not e["partes"]:
+        print(f"[ERROR] No hay base unificada en {PARTS_DIR} ni {CSV_PATH}; corre fusionar_historicos.py primero.")
+        return
+    print(f"✅ {e['filas']} filas indexadas ({e['partes']} parte(s)) en {time.perf_counter() - t0:.1f}s")
+
+    if args.numero or args.name or args.entidad:
+        try:
+            res = indice.buscar(telefono=args.numero, name=args.name, entidad=args.entidad, limite=args.limite)
+        except ValueError as err:
+            parser.error(str(err))
+        print(json.dumps(res, ensure_ascii=False, indent=1, default=str))
+        return
+    servir(indice, args.host, args.port, args.poll)
+
+
+if __name__ == "__main__":
+    main()
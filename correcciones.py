@@ -0,0 +1,282 @@
+import argparse
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+# =========================
+# Diario de correcciones del histórico
+# =========================
+# output/history/correcciones.jsonl: una corrección por línea, solo se agregan
+# (nunca se reescribe HISTORICO_UNIQUE ni el almacén). El histórico guarda los
+# datos tal como llegaron en los reportes; quien lo lee (fusionar_historicos,
+# auditar_hist, pipeline_diario) aplica las correcciones al cargar, en bloque
+# por columna.
+#
+# Cada entrada lleva versión de formato ("v"), un id creciente y el alcance
+# (snapshot_date, source_file); opcionalmente "hojas" para limitarla a algunas
+# DATA_*. Tipos:
+#   swap      intercambia dos columnas (por defecto entidad ↔ name)
+#   eliminar  quita las filas del día/archivo (o solo las de `columna` ∈ `valores`)
+#   remapear  reemplaza valores de `columna` según `mapa` {viejo: nuevo}
+#   anular    desactiva la entrada `anula` (para revertir sin borrar líneas)
+# Registrar dos veces la misma corrección no hace nada: aplicar el diario es
+# idempotente y correrlo de nuevo ya no deshace un swap. Un swap dice "estas dos
+# columnas vienen cruzadas", no "intercambiarlas otra vez": por día/archivo, hoja
+# y par de columnas se aplica a lo sumo uno, aunque haya varias entradas que lo
+# cubran (p. ej. una limitada a DATA_SI y otra para todas las hojas).
+BASE_DIR = Path(__file__).resolve().parent
+JOURNAL_PATH = BASE_DIR / "output" / "history" / "correcciones.jsonl"
+
+VERSION = 1
+TIPOS = ("swap", "eliminar", "remapear", "anular")
+SWAP_COLS = ["entidad", "name"]
+
+_CACHE = {}   # path → (firma del archivo, entradas)
+
+
+def cargar(path: Path = JOURNAL_PATH) -> list:
+    """Todas las entradas del diario, en orden de id (memoizado por tamaño/fecha del archivo)."""
+    path = Path(path)
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return []
+    firma = (st.st_size, st.st_mtime_ns)
+    previo = _CACHE.get(path)
+    if previo and previo[0] == firma:
+        return previo[1]
+
+    entradas = []
+    with open(path, "r", encoding="utf-8") as f:
+        for n, linea in enumerate(f, 1):
+            if not linea.strip():
+                continue
+            try:
+                ent = json.loads(linea)
+            except ValueError:
+                print(f"[Aviso] {path.name}:{n}: línea ilegible, se ignora.")
+                continue
+            if ent.get("v", 1) > VERSION or ent.get("tipo") not in TIPOS:
+                print(f"[Aviso] {path.name}:{n}: entrada no soportada ({ent.get('tipo')}, v{ent.get('v')}), se ignora.")
+                continue
+            entradas.append(ent)
+    entradas.sort(key=lambda e: e["id"])
+    _CACHE[path] = (firma, entradas)
+    return entradas
+
+
+def activas(entradas: list) -> list:
+    """Entradas que se aplican: sin las 'anular' ni las anuladas."""
+    anuladas = {e["anula"] for e in entradas if e["tipo"] == "anular"}
+    return [e for e in entradas if e["tipo"] != "anular" and e["id"] not in anuladas]
+
+
+def version(path: Path = JOURNAL_PATH) -> int:
+    """Id de la última entrada (0 si el diario está vacío)."""
+    entradas = cargar(path)
+    return entradas[-1]["id"] if entradas else 0
+
+
+def afectados(desde: int, path: Path = JOURNAL_PATH) -> set:
+    """Pares (snapshot_date, source_file) tocados por entradas con id > desde (incluye las anuladas)."""
+    entradas = cargar(path)
+    por_id = {e["id"]: e for e in entradas}
+    pares = set()
+    for e in entradas:
+        if e["id"] <= desde:
+            continue
+        objetivo = por_id.get(e["anula"]) if e["tipo"] == "anular" else e
+        if objetivo:
+            pares.add((objetivo["snapshot_date"], objetivo["source_file"]))
+    return pares
+
+
+def tiene_swap(snapshot_date: str, source_file: str, path: Path = JOURNAL_PATH) -> bool:
+    """¿Hay un swap entidad ↔ name activo para ese día/archivo en todas las hojas?"""
+    return any(e["tipo"] == "swap" and "hojas" not in e
+               and (e["snapshot_date"], e["source_file"]) == (str(snapshot_date), str(source_file))
+               and sorted(e.get("columnas", SWAP_COLS)) == sorted(SWAP_COLS)
+               for e in activas(cargar(path)))
+
+
+def _clave(ent: dict) -> str:
+    """Identidad de una corrección (sin id ni metadatos), para no registrarla dos veces."""
+    return json.dumps({k: v for k, v in ent.items() if k not in ("v", "id", "creado", "nota")}, sort_keys=True)
+
+
+def agregar(tipo: str, snapshot_date: str = None, source_file: str = None, nota: str = "",
+            path: Path = JOURNAL_PATH, **params) -> tuple:
+    """Agrega una corrección al diario. Devuelve (id, nueva); si ya estaba activa, (id existente, False)."""
+    if tipo not in TIPOS:
+        raise ValueError(f"Tipo de corrección desconocido: {tipo}")
+    # Mismo contenido en otro orden = misma corrección
+    for k in ("valores", "hojas"):
+        if params.get(k) is not None:
+            params[k] = sorted({str(v) for v in params[k]})
+    ent = {"tipo": tipo, **params}
+    if tipo != "anular":
+        ent.update(snapshot_date=str(snapshot_date), source_file=str(source_file))
+    entradas = cargar(path)
+    clave = _clave(ent)
+    vigentes = activas(entradas) if tipo != "anular" else [e for e in entradas if e["tipo"] == "anular"]
+    for e in vigentes:
+        if _clave(e) == clave:
+            return e["id"], False
+    if tipo == "anular" and params.get("anula") not in {e["id"] for e in entradas}:
+        raise ValueError(f"No existe la corrección {params.get('anula')}")
+
+    ent = {"v": VERSION, "id": (entradas[-1]["id"] if entradas else 0) + 1, **ent,
+           "creado": datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+    if nota:
+        ent["nota"] = nota
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(ent, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    return ent["id"], True
+
+
+# =========================
+# Aplicación (al leer el histórico)
+# =========================
+def _texto(s: pd.Series) -> pd.Series:
+    """Valores como texto para comparar con el diario (teléfonos float sin '.0')."""
+    if pd.api.types.is_float_dtype(s.dtype):
+        s = s.round().astype("Int64")
+    return s.astype("string").str.strip()
+
+
+def _sin_categoria(s: pd.Series) -> pd.Series:
+    # una columna category no admite valores nuevos: se pasa a object
+    return s.astype(object) if isinstance(s.dtype, pd.CategoricalDtype) else s
+
+
+def aplicar(df: pd.DataFrame, hoja: str, entradas: list = None, path: Path = JOURNAL_PATH) -> pd.DataFrame:
+    """Devuelve `df` con las correcciones activas de `hoja` aplicadas (sin modificar el original)."""
+    entradas = activas(cargar(path) if entradas is None else entradas)
+    entradas = [e for e in entradas if hoja in e.get("hojas", [hoja])]
+    if not entradas or df.empty or "snapshot_date" not in df.columns or "source_file" not in df.columns:
+        return df
+
+    snap = df["snapshot_date"].astype("string")
+    src = df["source_file"].astype("string")
+    pares = {(e["snapshot_date"], e["source_file"]) for e in entradas}
+    if not pd.MultiIndex.from_arrays([snap, src]).isin(list(pares)).any():
+        return df   # ninguna corrección toca estas filas
+
+    df = df.copy(deep=False)
+    swaps = set()   # (snapshot_date, source_file, columnas) ya intercambiados en esta hoja
+    for e in entradas:
+        mask = (snap == e["snapshot_date"]) & (src == e["source_file"])
+        mask = mask.fillna(False).to_numpy(dtype=bool)
+        if not mask.any():
+            continue
+        if e["tipo"] == "swap":
+            a, b = e.get("columnas", SWAP_COLS)
+            if a not in df.columns or b not in df.columns:
+                continue
+            clave = (e["snapshot_date"], e["source_file"], frozenset((a, b)))
+            if clave in swaps:
+                continue
+            swaps.add(clave)
+            va, vb = _sin_categoria(df[a]), _sin_categoria(df[b])
+            df[a], df[b] = va.where(~mask, vb), vb.where(~mask, va)
+        elif e["tipo"] == "eliminar":
+            col = e.get("columna")
+            if col:
+                if col not in df.columns:
+                    continue
+                mask &= _texto(df[col]).isin([str(v) for v in e.get("valores", [])]).fillna(False).to_numpy(dtype=bool)
+            df, snap, src = df[~mask], snap[~mask], src[~mask]
+        elif e["tipo"] == "remapear":
+            col = e["columna"]
+            if col not in df.columns:
+                continue
+            nuevos = _texto(df[col]).map(e["mapa"])
+            cambia = mask & nuevos.notna().to_numpy(dtype=bool)
+            df[col] = _sin_categoria(df[col]).where(~cambia, nuevos)
+    return df
+
+
+def aplicar_hojas(hojas: dict, path: Path = JOURNAL_PATH) -> dict:
+    """aplicar() sobre un dict {hoja: DataFrame}."""
+    entradas = cargar(path)
+    return {sh: aplicar(df, sh, entradas) for sh, df in hojas.items()}
+
+
+# =========================
+# CLI
+# =========================
+def main():
+    parser = argparse.ArgumentParser(description="Diario de correcciones del histórico (se aplican al leer, sin reescribirlo).")
+    sub = parser.add_subparsers(dest="accion")
+
+    def alcance(p):
+        p.add_argument("--fecha", required=True, help="snapshot_date (AAAA-MM-DD)")
+        p.add_argument("--archivo", required=True, help="source_file, tal cual aparece en el histórico")
+        p.add_argument("--hojas", nargs="+", default=None, help="Limita la corrección a estas hojas DATA_*.")
+        p.add_argument("--nota", default="", help="Motivo (queda en el diario).")
+
+    p = sub.add_parser("swap", help="Intercambia dos columnas (por defecto entidad ↔ name).")
+    alcance(p)
+    p.add_argument("--columnas", nargs=2, default=SWAP_COLS, metavar=("A", "B"))
+    p = sub.add_parser("eliminar", help="Quita filas del día/archivo (todas, o las de --columna con --valores).")
+    alcance(p)
+    p.add_argument("--columna", default=None)
+    p.add_argument("--valores", nargs="+", default=None)
+    p = sub.add_parser("remapear", help="Reemplaza valores de una columna: --mapa VIEJO=NUEVO ...")
+    alcance(p)
+    p.add_argument("--columna", required=True)
+    p.add_argument("--mapa", nargs="+", required=True, metavar="VIEJO=NUEVO")
+    p = sub.add_parser("anular", help="Desactiva una corrección por id.")
+    p.add_argument("id", type=int)
+    args = parser.parse_args()
+
+    if args.accion is None:
+        entradas = cargar()
+        if not entradas:
+            print(f"[Aviso] Diario vacío o inexistente: {JOURNAL_PATH}")
+            return
+        vigentes = {e["id"] for e in activas(entradas)}
+        for e in entradas:
+            estado = "" if e["id"] in vigentes or e["tipo"] == "anular" else "  (anulada)"
+            detalle = {k: v for k, v in e.items() if k not in ("v", "id", "tipo", "snapshot_date", "source_file", "creado")}
+            print(f"#{e['id']:<4} {e['tipo']:<9} {e.get('snapshot_date', ''):<10}  {e.get('source_file', '')}  "
+                  f"{json.dumps(detalle, ensure_ascii=False) if detalle else ''}{estado}")
+        return
+
+    if args.accion == "anular":
+        params = {"anula": args.id}
+    else:
+        params = {"snapshot_date": args.fecha, "source_file": args.archivo, "nota": args.nota}
+        if args.hojas:
+            params["hojas"] = args.hojas
+        if args.accion == "swap":
+            params["columnas"] = list(args.columnas)
+        elif args.accion == "eliminar" and args.columna:
+            if not args.valores:
+                parser.error("eliminar --columna requiere --valores")
+            params.update(columna=args.columna, valores=args.valores)
+        elif args.accion == "remapear":
+            pares = [m.split("=", 1) for m in args.mapa]
+            if any(len(par) != 2 for par in pares):
+                parser.error("--mapa espera pares VIEJO=NUEVO")
+            params.update(columna=args.columna, mapa=dict(pares))
+    try:
+        id_, nueva = agregar(args.accion, **params)
+    except ValueError as e:
+        print(f"[ERROR] {e}")
+        raise SystemExit(2)
+    if nueva:
+        print(f"✅ Corrección #{id_} registrada en {JOURNAL_PATH.name}")
+    else:
+        print(f"✅ Ya estaba registrada (#{id_}); no se agrega de nuevo.")
+    print("   Si ya fusionaste esos días, corre fusionar_historicos.py completo (sin --incremental).")
+
+
+if __name__ == "__main__":
+    main()
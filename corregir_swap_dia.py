@@ -1,9 +1,18 @@
-import pandas as pd
-from pathlib import Path
-
-# === RUTAS ===
-BASE_DIR = Path(__file__).resolve().parent
-HIST_PATH = BASE_DIR / "output" / "history" / "HISTORICO_UNIQUE.xlsx"
+import argparse
+
+import correcciones
+import instrumentacion
+
+# =========================
+# Corrección de días con entidad/name cruzados
+# =========================
+# Ya no reescribe HISTORICO_UNIQUE.xlsx: registra un 'swap' por objetivo en el
+# diario de correcciones (correcciones.py) y los lectores del histórico lo
+# aplican al cargar. Correrlo varias veces no hace nada después de la primera
+# (antes, la segunda corrida deshacía la corrección).
+#
+# Ojo: si un día ya se corrigió con la versión anterior de este script (que
+# reescribía el libro), ese día ya está bien en el archivo; no lo registres aquí.
 
 # === QUÉ DÍA/ARCHIVO CORREGIR ===
 # Ajusta solo si tu archivo se llama diferente. Usa exactamente lo que ves en la columna 'source_file' de HISTORICO_UNIQUE.
@@ -11,68 +20,35 @@ OBJETIVOS = [
     {"snapshot_date": "2025-11-11", "source_file": "Report_2025-11-11.xlsx"},
 ]
 
-# Hojas esperadas del histórico único
-SHEETS = ["DATA_SI", "DATA_NO", "DATA_INVALIDOS", "DATA_SIN_RESPUESTA"]
-
-def carga_o_vacio(path, sheet):
-    try:
-        return pd.read_excel(path, sheet_name=sheet)
-    except Exception:
-        return pd.DataFrame()
-
-def aplica_swap(df, objetivo):
-    if df.empty:
-        return df, 0
-
-    # Aseguramos columnas mínimas
-    for c in ["snapshot_date", "source_file", "entidad", "name"]:
-        if c not in df.columns:
-            df[c] = pd.NA
-
-    mask = (
-        (df["snapshot_date"].astype(str) == objetivo["snapshot_date"]) &
-        (df["source_file"].astype(str)  == objetivo["source_file"])
-    )
-    idx = df.index[mask]
-    if len(idx) == 0:
-        return df, 0
-
-    # Intercambiar valores entre columnas 'entidad' y 'name' SOLO en esas filas
-    entidad_old = df.loc[idx, "entidad"].copy()
-    name_old    = df.loc[idx, "name"].copy()
-
-    df.loc[idx, "entidad"] = name_old
-    df.loc[idx, "name"]    = entidad_old
-
-    return df, len(idx)
-
-def main():
-    if not HIST_PATH.exists():
-        print(f"[ERROR] No existe {HIST_PATH}")
-        return
-
-    # Cargar todas las hojas en memoria
-    data = {sh: carga_o_vacio(HIST_PATH, sh) for sh in SHEETS}
-
-    # Aplicar correcciones objetivo por objetivo
-    totales_mod = {sh: 0 for sh in SHEETS}
-    for obj in OBJETIVOS:
-        for sh in SHEETS:
-            df = data.get(sh, pd.DataFrame())
-            df_corr, n = aplica_swap(df, obj)
-            data[sh] = df_corr
-            totales_mod[sh] += n
+def registrar(objetivos=OBJETIVOS) -> list:
+    """Registra un swap entidad ↔ name por objetivo; [(objetivo, id, nueva)]."""
+    out = []
+    for obj in objetivos:
+        id_, nueva = correcciones.agregar("swap", obj["snapshot_date"], obj["source_file"],
+                                          columnas=list(correcciones.SWAP_COLS))
+        out.append((obj, id_, nueva))
+    return out
 
-    # Guardar de vuelta (sobrescribe)
-    with pd.ExcelWriter(HIST_PATH, engine="openpyxl") as w:
-        for sh, df in data.items():
-            # Conserva estructura original de columnas
-            df.to_excel(w, sheet_name=sh, index=False)
+def main(corrida=None, objetivos=OBJETIVOS):
+    with instrumentacion.etapa(corrida, "registro") as e:
+        registros = registrar(objetivos)
+        e["filas_out"] = sum(nueva for _, _, nueva in registros)
 
     # Reporte
-    print("✅ Corrección aplicada en HISTORICO_UNIQUE.xlsx")
-    for sh in SHEETS:
-        print(f"   - {sh}: filas modificadas = {totales_mod[sh]}")
+    print(f"✅ Corrección registrada en {correcciones.JOURNAL_PATH.name} (se aplica al leer el histórico)")
+    for obj, id_, nueva in registros:
+        estado = "nueva" if nueva else "ya estaba"
+        print(f"   - #{id_} {obj['snapshot_date']} {obj['source_file']}: swap entidad ↔ name ({estado})")
+    if any(nueva for _, _, nueva in registros):
+        print("   Si ya fusionaste esos días, corre fusionar_historicos.py completo (sin --incremental).")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Registra el swap entidad ↔ name de los días de OBJETIVOS en el diario de correcciones.")
+    parser.add_argument("--fecha", default=None, help="snapshot_date a corregir (en lugar de OBJETIVOS).")
+    parser.add_argument("--archivo", default=None, help="source_file a corregir (con --fecha).")
+    args = parser.parse_args()
+    if bool(args.fecha) != bool(args.archivo):
+        parser.error("--fecha y --archivo van juntos")
+    objetivos = [{"snapshot_date": args.fecha, "source_file": args.archivo}] if args.fecha else OBJETIVOS
+    with instrumentacion.Corrida("corregir_swap_dia") as corrida:
+        main(corrida, objetivos)
@@ -0,0 +1,132 @@
+import argparse
+
+import pandas as pd
+
+import auditar_hist
+import correcciones
+import entidades
+import lector_excel
+
+# =========================
+# Detección de entidad/name cruzados al consolidar
+# =========================
+# Antes de clasificar, el consolidador mira qué fracción de los valores de cada
+# columna son entidades conocidas (búsqueda por hash, una vez por valor distinto,
+# no por fila). Si 'name' parece la columna de entidades (≥ UMBRAL y más que la
+# propia 'entidad'), el reporte viene cruzado y, según --swap-accion:
+#   corregir    las columnas se intercambian (renombrado, sin copiar datos) y el
+#               consolidado del día sale bien. El histórico guarda lo que llegó y
+#               el swap queda en el diario de correcciones (correcciones.py).
+#   cuarentena  el reporte no se procesa; si estaba en inbox/ se mueve a inbox/cuarentena/.
+#   avisar      solo lo informa.
+# Entidades conocidas = entidades.ENTIDADES + los valores de 'entidad' que se
+# repiten al menos MIN_FILAS_ENTIDAD veces en los reportes ya ingeridos (un
+# nombre de cliente casi nunca se repite tanto), en entidades.ENTIDADES_PATH.
+# Solo se aprende de reportes sin ambigüedad: ya orientados, con a lo sumo
+# UMBRAL_APRENDER de 'name' con valores de entidad (uno cruzado que quedó justo
+# bajo UMBRAL no enseña nombres de persona), y nunca con --swap-accion avisar.
+# En modo --streaming la decisión (y lo aprendido) sale del primer bloque.
+# Aquí la comparación es exacta (normalizada): es por reporte y debe ser barata;
+# la auditoría del histórico usa además el índice aproximado de entidades.py.
+UMBRAL = 0.5              # como auditar_hist: ≥50% de 'name' con valor de entidad
+MIN_FILAS_ENTIDAD = 20
+UMBRAL_APRENDER = 0.1     # fracción máxima de 'name' con entidades para aprender del reporte
+ACCIONES = ("corregir", "cuarentena", "avisar", "no")
+COL_ENTIDAD, COL_NAME = correcciones.SWAP_COLS
+
+class ReporteCruzado(Exception):
+    """Reporte con entidad/name cruzados, enviado a cuarentena."""
+
+
+def fraccion_conocidas(s: pd.Series, conocidas: frozenset) -> float:
+    """Fracción de valores no nulos de `s` que son entidades conocidas."""
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        codigos = s.cat.codes.to_numpy()
+        codigos = codigos[codigos >= 0]
+        if not len(codigos):
+            return 0.0
+        hit = entidades.normalizar(pd.Series(s.cat.categories)).isin(conocidas).to_numpy()
+        return float(hit[codigos].mean())
+    conteo = s.value_counts()   # un hash por valor distinto, no por fila
+    if not conteo.sum():
+        return 0.0
+    hit = entidades.normalizar(pd.Series(conteo.index)).isin(conocidas).to_numpy()
+    return float(conteo.to_numpy()[hit].sum() / conteo.sum())
+
+
+def frecuentes(s: pd.Series, min_filas: int = MIN_FILAS_ENTIDAD) -> list:
+    """Valores (normalizados) que se repiten al menos min_filas veces: candidatos a entidad."""
+    conteo = s.value_counts()
+    conteo = conteo.groupby(entidades.normalizar(pd.Series(conteo.index)).to_numpy()).sum()   # normaliza solo los distintos
+    return sorted(conteo.index[conteo >= min_filas])
+
+
+def intercambiar(df: pd.DataFrame) -> pd.DataFrame:
+    """entidad ↔ name por renombrado (sin copiar datos), conservando el orden de columnas."""
+    if COL_ENTIDAD not in df.columns or COL_NAME not in df.columns:
+        return df
+    return df.rename(columns={COL_ENTIDAD: COL_NAME, COL_NAME: COL_ENTIDAD})[list(df.columns)]
+
+
+def detectar(df: pd.DataFrame, conocidas: frozenset = None, umbral: float = UMBRAL) -> dict:
+    """{'pct_entidad', 'pct_name', 'cruzado'} de un reporte (o del primer bloque)."""
+    conocidas = entidades.conocidas() if conocidas is None else conocidas
+    pct_entidad = fraccion_conocidas(df[COL_ENTIDAD], conocidas) if COL_ENTIDAD in df.columns else 0.0
+    pct_name = fraccion_conocidas(df[COL_NAME], conocidas) if COL_NAME in df.columns else 0.0
+    return {"pct_entidad": round(pct_entidad, 4), "pct_name": round(pct_name, 4),
+            "cruzado": pct_name >= umbral and pct_name > pct_entidad}
+
+
+def evaluar(df: pd.DataFrame, snapshot_date: str, source_file: str, accion: str = "corregir",
+            umbral: float = UMBRAL) -> tuple:
+    """Decide qué hacer con un reporte recién leído: (df orientado, info de cruce).
+
+    Si el swap ya está en el diario se corrige igual (sea cual sea la acción):
+    ese reporte ya se sabe cruzado. Lanza ReporteCruzado con accion='cuarentena'.
+    """
+    if accion == "no":
+        return df, None
+    info = detectar(df, umbral=umbral)
+    info["corregido"] = False
+    if info["cruzado"]:
+        registrado = correcciones.tiene_swap(snapshot_date, source_file)
+        if accion == "cuarentena" and not registrado:
+            raise ReporteCruzado(f"entidad/name cruzados ({info['pct_name']:.0%} de 'name' son entidades)")
+        if accion == "corregir" or registrado:
+            df = intercambiar(df)
+            info["corregido"] = True
+    # Fracción de entidades en la columna que queda como 'name' (tras el swap, la 'entidad' original)
+    cruce_name = info["pct_entidad"] if info["corregido"] else info["pct_name"]
+    if accion != "avisar" and (not info["cruzado"] or info["corregido"]) and cruce_name <= UMBRAL_APRENDER:
+        info["entidades"] = frecuentes(df[COL_ENTIDAD]) if COL_ENTIDAD in df.columns else []
+    return df, info
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Entidades conocidas por el detector de entidad/name cruzados.")
+    parser.add_argument("--aprender-historico", action="store_true",
+                        help="Agrega las entidades frecuentes de HISTORICO_UNIQUE.xlsx (con el diario de correcciones aplicado).")
+    args = parser.parse_args()
+
+    if args.aprender_historico:
+        if not auditar_hist.HIST.exists():
+            print(f"[ERROR] No existe {auditar_hist.HIST}")
+            return
+        hojas = lector_excel.leer_hojas(auditar_hist.HIST, auditar_hist.SHEETS, columnas=auditar_hist.AUDIT_COLS)
+        valores = set()
+        for sh, df in correcciones.aplicar_hojas(hojas).items():
+            if df.empty or COL_ENTIDAD not in df.columns:
+                continue
+            # por día/archivo, para no sumar un nombre repetido a lo largo de meses
+            for _, dia in df.groupby(["snapshot_date", "source_file"], dropna=False, observed=True):
+                valores.update(frecuentes(dia[COL_ENTIDAD]))
+        print(f"✅ {entidades.aprender(valores)} entidad(es) nuevas en {entidades.ENTIDADES_PATH.name}")
+
+    conocidas = entidades.conocidas()
+    print(f"Entidades conocidas ({len(conocidas)}):")
+    for e in sorted(conocidas):
+        print(f"  - {e}{'' if e in entidades.ENTIDADES else '  (aprendida)'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+import json
+import os
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# =========================
+# Entidades conocidas e índice para reconocerlas
+# =========================
+# ENTIDADES es la lista base; las aprendidas de los reportes (detector_swap.py)
+# se guardan en ENTIDADES_PATH. IndiceEntidades reconoce también variantes
+# ("BANCOLOMBIA S.A.", "BCO DE BOGOTA", "BANCO DE BOGTA") en dos pasos:
+#   1. forma canónica vectorizada (mayúsculas, sin tildes ni puntuación, sin
+#      sufijos societarios ni conectores, abreviaturas expandidas) y búsqueda
+#      exacta por hash;
+#   2. para lo que no coincide, cada token se acerca al token de entidad más
+#      parecido con un índice de trigramas (similitud de Dice ≥ SIMILITUD); el
+#      valor coincide si todos sus tokens se acercan y juntos forman una entidad.
+# El trabajo es por valor distinto y por token distinto, no por fila.
+BASE_DIR = Path(__file__).resolve().parent
+ENTIDADES_PATH = BASE_DIR / "output" / "history" / "entidades_conocidas.json"
+
+# 🎯 Lista base de entidades (ajústala a tu realidad; agrega más si aplica)
+ENTIDADES = {
+    "BANCO CAJA SOCIAL","BANCO DE BOGOTA","BANCOLOMBIA","DAVIVIENDA","FNG",
+    "COLPATRIA","FALABELLA","BANCO AGRARIO","BBVA","AV VILLAS","ITAU","BANCO POPULAR"
+}
+
+ABREVIATURAS = {"BCO": "BANCO", "BANC": "BANCO"}
+# Sufijos societarios y de país, conectores y letras sueltas ("S.A." → "S A")
+DESCARTAR = r"\b(?:SA|SAS|LTDA|CIA|COLOMBIA|DE|DEL|LA|LAS|LOS|EL|Y|[A-Z0-9])\b"
+SIMILITUD = 0.6   # alcanza "BOGTA" ≈ BOGOTA; el valor completo igual debe formar una entidad
+MIN_LARGO_FUZZY = 4   # tokens más cortos solo por coincidencia exacta (FNG, AV, ...)
+
+_CACHE = {}   # path → (firma del archivo, conjunto)
+
+
+def normalizar(s: pd.Series) -> pd.Series:
+    return s.astype("string").str.strip().str.upper()
+
+
+def canonico(s: pd.Series) -> pd.Series:
+    """Forma canónica para comparar nombres de entidad (vectorizada)."""
+    s = normalizar(s)
+    tildes = s.str.contains(r"[^\x00-\x7f]", regex=True).fillna(False).to_numpy(dtype=bool)
+    if tildes.any():   # NFKD es fila por fila: solo donde hay no-ASCII
+        s = s.copy()
+        s[tildes] = s[tildes].str.normalize("NFKD").str.replace("[\u0300-\u036f]", "", regex=True)
+    s = s.str.replace(r"[^A-Z0-9]+", " ", regex=True)
+    for abrev, completo in ABREVIATURAS.items():
+        s = s.str.replace(rf"\b{abrev}\b", completo, regex=True)
+    s = s.str.replace(DESCARTAR, " ", regex=True)
+    return s.str.replace(r"\s+", " ", regex=True).str.strip()
+
+
+def conocidas(path: Path = ENTIDADES_PATH) -> frozenset:
+    """ENTIDADES + las aprendidas (memoizado por tamaño/fecha del archivo)."""
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return frozenset(ENTIDADES)
+    firma = (st.st_size, st.st_mtime_ns)
+    previo = _CACHE.get(path)
+    if previo and previo[0] == firma:
+        return previo[1]
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            aprendidas = json.load(f).get("entidades", [])
+    except (OSError, ValueError):
+        print(f"[Aviso] No se pudo leer {path}; solo se usan las entidades base.")
+        aprendidas = []
+    conjunto = frozenset(ENTIDADES) | frozenset(aprendidas)
+    _CACHE[path] = (firma, conjunto)
+    return conjunto
+
+
+def aprender(valores, path: Path = ENTIDADES_PATH) -> int:
+    """Agrega entidades nuevas al archivo de conocidas; devuelve cuántas eran nuevas."""
+    actuales = conocidas(path)
+    nuevas = {v for v in valores if v and v not in actuales}
+    if not nuevas:
+        return 0
+    guardadas = sorted((actuales - frozenset(ENTIDADES)) | nuevas)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"entidades": guardadas}, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+    return len(nuevas)
+
+
+def _trigramas(token: str) -> set:
+    t = f"  {token} "
+    return {t[i:i + 3] for i in range(len(t) - 2)}
+
+
+class IndiceEntidades:
+    """Índice de tokens y trigramas de los nombres de entidad, para coincidencias aproximadas."""
+
+    def __init__(self, nombres=None, similitud: float = SIMILITUD):
+        nombres = conocidas() if nombres is None else nombres
+        canon = canonico(pd.Series(sorted(nombres), dtype="string")).dropna()
+        self.canonicos = frozenset(c for c in canon if c)
+        self.tokens = sorted({t for c in self.canonicos for t in c.split()})
+        self.similitud = similitud
+        self._tri = {t: _trigramas(t) for t in self.tokens}
+        self._por_trigrama = defaultdict(list)
+        for t, tris in self._tri.items():
+            for g in tris:
+                self._por_trigrama[g].append(t)
+        self._memo = {}   # token → token de entidad más cercano (o None)
+
+    def token_cercano(self, token: str):
+        """Token de entidad con mayor similitud de Dice por trigramas (≥ similitud), o None."""
+        if token in self._memo:
+            return self._memo[token]
+        if token in self._tri:
+            mejor = token
+        elif len(token) < MIN_LARGO_FUZZY:
+            mejor = None
+        else:
+            tris = _trigramas(token)
+            candidatos = set().union(*(self._por_trigrama.get(g, ()) for g in tris))
+            mejor, puntaje = None, self.similitud
+            for t in candidatos:
+                dice = 2 * len(tris & self._tri[t]) / (len(tris) + len(self._tri[t]))
+                if dice >= puntaje and len(t) >= MIN_LARGO_FUZZY:
+                    mejor, puntaje = t, dice
+        self._memo[token] = mejor
+        return mejor
+
+    def coincide(self, valores: pd.Series, min_largo: int = 0) -> np.ndarray:
+        """bool por valor: ¿es (o se parece a) una entidad? Pensado para valores distintos.
+
+        min_largo: descarta valores más cortos (sin espacios a los lados), como hacía auditar_hist.
+        """
+        valores = valores.reset_index(drop=True)
+        canon = canonico(valores)
+        if min_largo:
+            canon = canon.where(normalizar(valores).str.len() >= min_largo)
+        hit = canon.isin(self.canonicos).fillna(False).to_numpy(dtype=bool, copy=True)
+        resto = canon[~hit & canon.notna().to_numpy() & (canon != "").fillna(False).to_numpy()]
+        if resto.empty:
+            return hit
+
+        # Filtro barato: el primer token tiene que parecerse a algún token de entidad
+        primero = resto.str.replace(r" .*", "", regex=True)
+        cercano = {t: self.token_cercano(t) for t in primero.unique()}
+        resto = resto[primero.map(cercano).notna().to_numpy()]
+        if resto.empty:
+            return hit
+
+        tokens = resto.str.split().explode()
+        cercanos = tokens.map({t: self.token_cercano(t) for t in tokens.dropna().unique()})
+        completos = cercanos.notna().groupby(level=0).all()   # todos los tokens se parecen a alguno
+        candidatos = completos.index[completos.to_numpy()]
+        if len(candidatos):
+            unidos = cercanos.loc[candidatos].groupby(level=0).agg(" ".join)
+            hit[unidos.index[unidos.isin(self.canonicos).to_numpy()]] = True
+        return hit
+
+    def marcar(self, s: pd.Series, min_largo: int = 0) -> np.ndarray:
+        """coincide() por fila, evaluando cada valor distinto una sola vez."""
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            codigos, distintos = s.cat.codes.to_numpy(), pd.Series(s.cat.categories)
+        else:
+            codigos, distintos = pd.factorize(s)
+            distintos = pd.Series(distintos)
+        if not len(distintos):
+            return np.zeros(len(s), dtype=bool)
+        hit = self.coincide(distintos, min_largo)
+        return np.where(codigos >= 0, hit[np.maximum(codigos, 0)], False)
@@ -0,0 +1,162 @@
+import pandas as pd
+import numpy as np
+from pathlib import Path
+
+# =========================
+# Tipos compactos por columna
+# =========================
+# Al cargar, las columnas de pocos valores distintos (entidad, resultado,
+# btn_input, categoria, source, ...) pasan a category y los textos de alta
+# cardinalidad (nombres, teléfonos, emails) a string respaldado por Arrow.
+# Las categorías quedan en orden alfabético y los nulos siguen siendo NaN, así
+# ordenar, deduplicar y filtrar da lo mismo que con object.
+#
+# Los teléfonos se mantienen como texto (Arrow): ya vienen normalizados, pueden
+# llevar "+" o ceros a la izquierda y así se escriben en las salidas.
+CATEGORIA_MAX_RATIO = 0.5   # si hay más valores distintos que esto × filas, no conviene category
+FACTOR_TRABAJO = 3          # copias vivas a la vez en un script (frame + subconjuntos + salida)
+SAMPLE_ROWS = 2_000
+
+# Esquemas: columna → "categoria" | "texto"
+REPORTE = {
+    "entidad": "categoria",
+    "Attempt result": "categoria",
+    "btn_input": "categoria",
+    "name": "texto",
+    "Phone": "texto",
+    "Phone B": "texto",
+}
+
+UNIFICADA = {
+    "snapshot_date": "categoria",
+    "source_file": "categoria",
+    "source": "categoria",
+    "categoria": "categoria",
+    "confirma_identidad": "categoria",
+    "tipo_id": "categoria",
+    "entidad": "categoria",
+    "fecha_llamada": "categoria",
+    "name": "texto",
+    "email": "texto",
+    "telefono": "texto",
+    "telefono1": "texto",
+    "telefono2": "texto",
+    "telefono3": "texto",
+    "telefono_invalido": "texto",
+}
+
+AUDITORIA = {
+    "entidad": "categoria",
+    "snapshot_date": "categoria",
+    "source_file": "categoria",
+    "name": "texto",
+}
+
+# Categorías conocidas de antemano: mismas categorías en todos los frames,
+# así pd.concat las conserva (con categorías distintas caería a object)
+CATEGORIAS_FIJAS = {
+    "source": ["automático", "manual"],
+    "categoria": ["INVALIDO", "NO", "NO RESPONDE", "SI"],
+}
+
+
+def dtype_texto():
+    """String respaldado por Arrow con NaN como nulo (None si esta versión de pandas/pyarrow no lo permite)."""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return None
+    try:
+        return pd.StringDtype("pyarrow", na_value=np.nan)   # pandas >= 2.3 (en 3.x es el str por defecto)
+    except TypeError:
+        try:
+            return pd.StringDtype("pyarrow_numpy")           # pandas 2.1 / 2.2
+        except (TypeError, ValueError):
+            return None
+
+
+def _solo_texto(s: pd.Series) -> bool:
+    return pd.api.types.infer_dtype(s, skipna=True) in ("string", "empty")
+
+
+def compactar(df: pd.DataFrame, esquema: dict) -> pd.DataFrame:
+    """Aplica el esquema a las columnas presentes (in place); las de tipos mezclados se dejan igual."""
+    texto = dtype_texto()
+    for c, tipo in esquema.items():
+        if c not in df.columns:
+            continue
+        s = df[c]
+        if isinstance(s.dtype, pd.CategoricalDtype) or not (s.dtype == object or pd.api.types.is_string_dtype(s)):
+            continue
+        if s.dtype == object and not _solo_texto(s):
+            continue
+        if tipo == "categoria":
+            fijas = CATEGORIAS_FIJAS.get(c)
+            if fijas is not None and s.dropna().isin(fijas).all():
+                df[c] = pd.Categorical(s, categories=fijas)
+            elif s.nunique(dropna=True) <= max(1, len(s) * CATEGORIA_MAX_RATIO):
+                df[c] = pd.Categorical(s)   # categorías ordenadas alfabéticamente
+            continue
+        if texto is not None and s.dtype != texto:
+            df[c] = s.astype(texto)
+    return df
+
+
+# =========================
+# Estimación de memoria (antes de procesar)
+# =========================
+def huella_mb(df: pd.DataFrame) -> float:
+    return float(df.memory_usage(deep=True, index=False).sum()) / 1024 / 1024
+
+
+def muestra_libro(path: Path, hoja=None, n: int = SAMPLE_ROWS, columnas=None):
+    """(primeras n filas, filas totales declaradas) de una hoja, sin cargar el libro entero."""
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb[hoja] if hoja is not None else wb.worksheets[0]
+        total = max(0, (ws.max_row or 1) - 1)
+        rows = ws.iter_rows(values_only=True)
+        header = next(rows, None) or ()
+        header = [("Unnamed: %d" % i) if h is None else str(h).strip() for i, h in enumerate(header)]
+        buf = []
+        for r in rows:
+            if len(buf) >= n:
+                break
+            if r is not None and any(v is not None for v in r):
+                buf.append(r[:len(header)])
+    finally:
+        wb.close()
+    df = pd.DataFrame.from_records(buf, columns=header).fillna(np.nan)
+    if columnas is not None:
+        df = df[[c for c in df.columns if c in set(columnas)]]
+    return df, max(total, len(df))
+
+
+def estimar(muestra: pd.DataFrame, filas: int, esquema: dict = None) -> dict:
+    """Extrapola la memoria de `filas` a partir de la muestra (tal cual y compactada)."""
+    if muestra.empty or not filas:
+        return {"filas": int(filas or 0), "mb_object": 0.0, "mb_compacto": 0.0}
+    crudo = huella_mb(muestra.astype(object)) / len(muestra)
+    compacto = huella_mb(compactar(muestra.copy(), esquema or {})) / len(muestra)
+    return {"filas": int(filas), "mb_object": crudo * filas, "mb_compacto": compacto * filas}
+
+
+def sumar(estimaciones) -> dict:
+    out = {"filas": 0, "mb_object": 0.0, "mb_compacto": 0.0}
+    for e in estimaciones:
+        for k in out:
+            out[k] += e[k]
+    return out
+
+
+def reportar(nombre: str, est: dict, budget_mb: float, factor: float = FACTOR_TRABAJO) -> bool:
+    """Imprime la estimación; True si el pico estimado cabe en el presupuesto."""
+    pico = est["mb_compacto"] * factor
+    print(f"🧮 Memoria estimada {nombre}: {est['filas']} filas · datos {est['mb_compacto']:.1f} MB compactos "
+          f"({est['mb_object']:.1f} MB como object) · pico ≈ {pico:.1f} MB · presupuesto {budget_mb:g} MB")
+    if pico > budget_mb:
+        print(f"[Aviso] El pico estimado ({pico:.1f} MB) supera el presupuesto ({budget_mb:g} MB).")
+        return False
+    return True
@@ -0,0 +1,263 @@
+import argparse
+import datetime
+import sqlite3
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# =========================
+# Estado por número entre días (para REDISCAR)
+# =========================
+# Una fila por Phone B en output/history/estado_numeros.sqlite: intentos
+# acumulados, último resultado y su fecha, último btn marcado y su fecha, y si
+# alguna vez quedó resuelto (btn=1 o btn=2, igual que la exclusión de
+# SIN_RESPUESTA dentro de un reporte).
+#   - Cada reporte deja su resumen por número (resumir); en el paso de fusión en
+#     serie se suma a la tabla con un upsert por clave: O(números del reporte).
+#     Un reporte ya aplicado (tabla reportes) no se vuelve a sumar; al
+#     reprocesarlo, REDISCAR descuenta sus propios intentos.
+#   - REDISCAR se arma uniendo los candidatos del reporte con sus filas de la
+#     tabla (búsqueda por clave primaria, sin recorrer el histórico): se quitan
+#     los resueltos en días anteriores y, con tope (max_intentos > 0), los que
+#     ya lo alcanzaron en días anteriores (los intentos del reporte no cuentan).
+# El consolidador corre en procesos aparte y solo lee la tabla; la escritura es
+# del paso de fusión. En un --batch, los reportes del mismo lote no se ven entre sí.
+BASE_DIR = Path(__file__).resolve().parent
+DB_PATH = BASE_DIR / "output" / "history" / "estado_numeros.sqlite"
+MAX_INTENTOS = 0    # intentos de días anteriores a partir de los cuales un número sale de REDISCAR (0 = sin tope)
+
+# Mismas columnas que voxinplant_consolidador
+COL_FECHA = "Date of call start"
+COL_RESULT = "Attempt result"
+COL_BTN = "btn_input"
+COL_PHONE_DIALED = "Phone B"
+RESUELTO_BTN = ("1", "2")
+
+COLUMNAS = ["telefono", "intentos", "ultimo_resultado", "ultima_fecha", "ultimo_btn", "fecha_btn", "resuelto"]
+TABLA = "numeros"
+TABLA_REPORTES = "reportes"
+
+_UPSERT = f"""
+INSERT INTO {TABLA} ({", ".join(COLUMNAS)}) VALUES ({", ".join("?" for _ in COLUMNAS)})
+ON CONFLICT(telefono) DO UPDATE SET
+    intentos = intentos + excluded.intentos,
+    ultimo_resultado = CASE WHEN COALESCE(excluded.ultima_fecha, '') >= COALESCE(ultima_fecha, '')
+                            THEN excluded.ultimo_resultado ELSE ultimo_resultado END,
+    ultima_fecha = CASE WHEN COALESCE(excluded.ultima_fecha, '') >= COALESCE(ultima_fecha, '')
+                        THEN excluded.ultima_fecha ELSE ultima_fecha END,
+    ultimo_btn = CASE WHEN excluded.ultimo_btn IS NOT NULL
+                       AND COALESCE(excluded.fecha_btn, '') >= COALESCE(fecha_btn, '')
+                      THEN excluded.ultimo_btn ELSE ultimo_btn END,
+    fecha_btn = CASE WHEN excluded.ultimo_btn IS NOT NULL
+                      AND COALESCE(excluded.fecha_btn, '') >= COALESCE(fecha_btn, '')
+                     THEN excluded.fecha_btn ELSE fecha_btn END,
+    resuelto = MAX(resuelto, excluded.resuelto)
+"""
+
+
+def conectar(db_path: Path = DB_PATH) -> sqlite3.Connection:
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    con = sqlite3.connect(db_path)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA synchronous=NORMAL")
+    con.execute(f"CREATE TABLE IF NOT EXISTS {TABLA} (telefono TEXT PRIMARY KEY, intentos INTEGER NOT NULL, "
+                f"ultimo_resultado TEXT, ultima_fecha TEXT, ultimo_btn TEXT, fecha_btn TEXT, "
+                f"resuelto INTEGER NOT NULL DEFAULT 0)")
+    con.execute(f"CREATE TABLE IF NOT EXISTS {TABLA_REPORTES} (snapshot_date TEXT, source_file TEXT, "
+                f"numeros INTEGER, aplicado TEXT, PRIMARY KEY (snapshot_date, source_file))")
+    return con
+
+
+def _texto_fecha(s: pd.Series) -> pd.Series:
+    return s.dt.strftime("%Y-%m-%d %H:%M:%S").astype("string")
+
+
+def _vacio() -> pd.DataFrame:
+    return pd.DataFrame(columns=COLUMNAS[1:], index=pd.Index([], name="telefono", dtype="string"))
+
+
+# =========================
+# Resumen por número de un reporte
+# =========================
+def resumir(df: pd.DataFrame) -> pd.DataFrame:
+    """Por Phone B (índice 'telefono'): intentos, último resultado/btn y sus fechas, resuelto.
+
+    df: reporte (o bloque) ya normalizado por el consolidador.
+    """
+    d = pd.DataFrame({
+        "telefono": df[COL_PHONE_DIALED].astype("string"),
+        "fecha": df[COL_FECHA],
+        "resultado": df[COL_RESULT].astype("string"),
+        "btn": df[COL_BTN].astype("string"),
+    })
+    d = d[(d["telefono"].notna() & (d["telefono"] != "")).to_numpy(dtype=bool)]
+    if d.empty:
+        return _vacio()
+    d = d.sort_values("fecha", kind="stable", na_position="first")   # el último por número queda al final
+
+    ult = d.drop_duplicates("telefono", keep="last").set_index("telefono")
+    out = pd.DataFrame({
+        "intentos": d.groupby("telefono", sort=False).size(),
+        "ultimo_resultado": ult["resultado"],
+        "ultima_fecha": _texto_fecha(ult["fecha"]),
+    })
+    marcados = d[d["btn"].notna().to_numpy(dtype=bool)]
+    btn = marcados.drop_duplicates("telefono", keep="last").set_index("telefono")
+    out["ultimo_btn"] = btn["btn"].reindex(out.index)
+    out["fecha_btn"] = _texto_fecha(btn["fecha"]).reindex(out.index)
+    out["resuelto"] = marcados["btn"].isin(RESUELTO_BTN).groupby(marcados["telefono"]).any() \
+        .reindex(out.index, fill_value=False).astype("int64")
+    out.index.name = "telefono"
+    return out
+
+
+def combinar(previo: pd.DataFrame, nuevo: pd.DataFrame) -> pd.DataFrame:
+    """Suma dos resúmenes (p. ej. bloques de un reporte en streaming), con la misma regla que el upsert."""
+    if previo is None or previo.empty:
+        return nuevo
+    if nuevo.empty:
+        return previo
+    t = pd.concat([previo, nuevo])
+    grupo = t.groupby(level=0, sort=False)
+    out = pd.DataFrame({"intentos": grupo["intentos"].sum()})
+
+    # A igual fecha gana el más nuevo (concat deja 'nuevo' después); sin fecha pierde
+    t = t.assign(_orden=range(len(t)))
+    ult = t.sort_values(["ultima_fecha", "_orden"], na_position="first")
+    ult = ult[~ult.index.duplicated(keep="last")]
+    out["ultimo_resultado"] = ult["ultimo_resultado"]
+    out["ultima_fecha"] = ult["ultima_fecha"]
+    btn = t[t["ultimo_btn"].notna().to_numpy(dtype=bool)].sort_values(["fecha_btn", "_orden"], na_position="first")
+    btn = btn[~btn.index.duplicated(keep="last")]
+    out["ultimo_btn"] = btn["ultimo_btn"].reindex(out.index)
+    out["fecha_btn"] = btn["fecha_btn"].reindex(out.index)
+    out["resuelto"] = grupo["resuelto"].max()
+    out.index.name = "telefono"
+    return out
+
+
+# =========================
+# Tabla persistente
+# =========================
+def registrar(lotes: list, db_path: Path = DB_PATH) -> int:
+    """Suma el resumen por número de cada reporte (en orden); devuelve cuántos reportes se aplicaron."""
+    lotes = [res for res in lotes if res.get("numeros") is not None]
+    if not lotes:
+        return 0
+    aplicados = 0
+    con = conectar(db_path)
+    try:
+        with con:   # una transacción para todo el lote
+            for res in lotes:
+                clave = (str(res["snapshot_date"]), str(res["source_file"]))
+                if con.execute(f"SELECT 1 FROM {TABLA_REPORTES} WHERE snapshot_date = ? AND source_file = ?",
+                               clave).fetchone():
+                    print(f"[Aviso] {clave[1]} ya estaba en {db_path.name}: sus intentos no se vuelven a sumar.")
+                    continue
+                n = res["numeros"].reset_index()[COLUMNAS]
+                filas = n.astype(object).where(n.notna(), None)
+                con.executemany(_UPSERT, filas.itertuples(index=False, name=None))
+                con.execute(f"INSERT INTO {TABLA_REPORTES} VALUES (?, ?, ?, ?)",
+                            (*clave, len(n), datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+                aplicados += 1
+    finally:
+        con.close()
+    return aplicados
+
+
+def previos(telefonos, db_path: Path = DB_PATH) -> pd.DataFrame:
+    """Filas de la tabla para esos números (índice 'telefono'); los que no están no vienen."""
+    claves = pd.Series(telefonos, dtype="string").dropna().unique()
+    if not db_path.exists() or not len(claves):
+        return _vacio()
+    con = sqlite3.connect(db_path)
+    try:
+        if not con.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (TABLA,)).fetchone():
+            return _vacio()
+        con.execute("CREATE TEMP TABLE _buscar (telefono TEXT PRIMARY KEY)")
+        con.executemany("INSERT OR IGNORE INTO _buscar VALUES (?)", ((str(t),) for t in claves))
+        df = pd.read_sql_query(f"SELECT n.* FROM {TABLA} AS n JOIN _buscar AS b ON b.telefono = n.telefono", con)
+    finally:
+        con.close()
+    return df.set_index("telefono")
+
+
+def aplicado(snapshot_date, source_file, db_path: Path = DB_PATH) -> bool:
+    """¿El reporte ya está sumado en la tabla? (p. ej. al reprocesarlo con --force)."""
+    if not db_path.exists():
+        return False
+    con = sqlite3.connect(db_path)
+    try:
+        if not con.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (TABLA_REPORTES,)).fetchone():
+            return False
+        return con.execute(f"SELECT 1 FROM {TABLA_REPORTES} WHERE snapshot_date = ? AND source_file = ?",
+                           (str(snapshot_date), str(source_file))).fetchone() is not None
+    finally:
+        con.close()
+
+
+# =========================
+# REDISCAR
+# =========================
+def rediscar(u_sin_df: pd.DataFrame, intentos_num: pd.Series, previo: pd.DataFrame,
+             max_intentos: int = MAX_INTENTOS, ya_aplicado: bool = False) -> tuple:
+    """(REDISCAR, info): candidatos del reporte sin los resueltos antes ni los que ya llegaron al tope.
+
+    El tope se compara con los intentos de días anteriores: sin historia, nadie
+    sale por tope aunque se haya marcado muchas veces en este reporte. Agrega 'Intentos acumulados' (días anteriores + este reporte, por Phone B) y
+    'Último intento previo'. info: {'rediscar', 'rediscar_resueltos', 'rediscar_tope'}.
+    ya_aplicado: el estado ya incluye este reporte (reproceso); se descuentan sus
+    intentos y el último intento previo solo se muestra si es anterior a los de hoy.
+    """
+    tel = u_sin_df[COL_PHONE_DIALED].astype("string")
+    previo = _vacio() if previo is None else previo
+    prev = previo.reindex(tel.to_numpy())
+    hoy = tel.map(intentos_num).astype("Int64").array   # sin Phone B: NA (no se acumula ni topa)
+    antes = prev["intentos"].fillna(0).astype("Int64").array
+    ultimo_previo = prev["ultima_fecha"]
+    if ya_aplicado:
+        antes = (antes - hoy).fillna(0)
+        anterior = pd.array(ultimo_previo, dtype="string") < _texto_fecha(u_sin_df[COL_FECHA]).array
+        ultimo_previo = ultimo_previo.where(anterior.fillna(False).to_numpy(dtype=bool))
+    acumulados = antes + hoy
+    resueltos = prev["resuelto"].fillna(0).astype(bool).to_numpy()
+    tope = ((antes >= max_intentos).fillna(False).to_numpy(dtype=bool) & ~resueltos if max_intentos
+            else np.zeros(len(tel), dtype=bool))
+    out = u_sin_df.assign(**{
+        "Intentos acumulados": acumulados,
+        "Último intento previo": ultimo_previo.to_numpy(),
+    })[~(resueltos | tope)]
+    info = {"rediscar": len(out), "rediscar_resueltos": int(resueltos.sum()), "rediscar_tope": int(tope.sum())}
+    return out, info
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Estado por número (intentos acumulados, último resultado) usado por REDISCAR.")
+    parser.add_argument("telefonos", nargs="*", help="Phone B a consultar (sin argumentos: resumen de la tabla).")
+    parser.add_argument("--max-intentos", type=int, default=MAX_INTENTOS,
+                        help="Tope a usar en el resumen: cuenta los números con al menos esos intentos (0 = no se muestra).")
+    args = parser.parse_args()
+    if not DB_PATH.exists():
+        print(f"[ERROR] No existe {DB_PATH}; se crea al consolidar el primer reporte.")
+        return
+    if args.telefonos:
+        df = previos(args.telefonos)
+        print(df.to_string() if len(df) else "Sin registros para esos números.")
+        return
+    con = sqlite3.connect(DB_PATH)
+    try:
+        total, resueltos, tope = con.execute(
+            f"SELECT COUNT(*), COALESCE(SUM(resuelto), 0), COALESCE(SUM(intentos >= ? AND resuelto = 0), 0) FROM {TABLA}",
+            (args.max_intentos,)).fetchone()
+        reportes = con.execute(f"SELECT COUNT(*), MIN(snapshot_date), MAX(snapshot_date) FROM {TABLA_REPORTES}").fetchone()
+    finally:
+        con.close()
+    print(f"📇 {total} números en {DB_PATH.name} ({reportes[0]} reportes, {reportes[1]} → {reportes[2]})")
+    print(f"   Resueltos (btn=1/2):           {resueltos}")
+    if args.max_intentos:
+        print(f"   En el tope ({args.max_intentos} intentos):      {tope}")
+
+
+if __name__ == "__main__":
+    main()
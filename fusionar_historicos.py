@@ -1,9 +1,22 @@
 import pandas as pd
+import numpy as np
 from pathlib import Path
-from pandas import ExcelFile
-import re
+import argparse
+import json
+import os
+import sys
 from datetime import datetime
 
+import cache_reportes
+import correcciones
+import esquema
+import historico_sqlite
+import historico_store
+import instrumentacion
+import lector_excel
+import manifiesto
+import telefonos
+
 # =========================
 # Rutas base / archivos
 # =========================
@@ -17,8 +30,14 @@ MANUAL_PATH = OUT_DIR / "MANUAL_SNAPSHOT.xlsx"
 # Control de uso de manual
 USE_MANUAL = True
 
+# Teléfonos colombianos como +57XXXXXXXXXX en la base unificada (cambiarlo exige una fusión completa)
+PHONE_E164 = False
+
 # 2) Histórico automático que genera el consolidador
 AUTO_PATH = OUT_DIR / "HISTORICO_UNIQUE.xlsx"
+#    (si existe el almacén Parquet de historico_store, o la base de historico_sqlite, se lee de ahí)
+STORE_DIR = OUT_DIR / "store"
+SQLITE_PATH = OUT_DIR / historico_sqlite.DB_PATH.name
 
 # 3) Salidas unificadas (para BI y para tu “conteo por hojas”)
 OUT_XLSX = OUT_DIR / "BASE_HISTORICA_UNIFICADA.xlsx"
@@ -37,20 +56,25 @@ def norm_name(s: pd.Series) -> pd.Series:
     return s.astype(str).str.strip().str.lower()
 
 def norm_phone(s: pd.Series) -> pd.Series:
-    # quita .0 y espacios; conserva + y dígitos
-    s = s.astype(str).str.replace(r"\.0$", "", regex=True).str.strip()
-    s = s.str.replace(r"[^\d+]", "", regex=True)
-    return s
+    # quita .0 y espacios; conserva + y dígitos (por valor distinto, con memo entre corridas)
+    return telefonos.normalizar(s, "fusion", e164=PHONE_E164)
 
 def to_date_only(s: pd.Series) -> pd.Series:
     d = pd.to_datetime(s, errors="coerce")
     return d.dt.date.astype("string")
 
-def take_first_nonnull(row, cols):
+def first_nonblank(df: pd.DataFrame, cols) -> pd.Series:
+    """Por fila, el primer valor de `cols` no nulo ni en blanco (pd.NA si ninguno); por columnas."""
+    out = pd.Series(pd.NA, index=df.index, dtype=object)
+    pendiente = pd.Series(True, index=df.index)
     for c in cols:
-        if c in row and pd.notna(row[c]) and str(row[c]).strip() != "":
-            return row[c]
-    return pd.NA
+        if c not in df.columns:
+            continue
+        v = df[c]
+        ok = pendiente & v.notna() & v.astype(str).str.strip().ne("")
+        out = out.where(~ok, v)
+        pendiente &= ~ok
+    return out
 
 def safe_fillna_str(df: pd.DataFrame) -> pd.DataFrame:
     """Evita FutureWarning al llenar NaN con '', convirtiendo a object primero."""
@@ -66,84 +90,88 @@ def safe_fillna_str(df: pd.DataFrame) -> pd.DataFrame:
 # =========================
 # Carga Manual
 # =========================
+MANUAL_COLS = [
+    "Tipo Identificación", "Nº Identificación", "Nombre", "Email",
+    "Telefono1", "Telefono2", "Telefono3", "Fecha", "Confirma Identidad", "TELEFONO1 INVALIDO",
+]
+
+MANUAL_SHEETS = {
+    "Localizados": "SI",
+    "RespondenNO": "NO",
+    "TelefonosInvalidos": "INVALIDO",
+    "Contesta_NoResponde": "NO RESPONDE",
+}
+
+def normalize_manual_sheet(df: pd.DataFrame, cat: str, source_file: str) -> pd.DataFrame:
+    # Normaliza encabezados por espacios extra
+    df = df.rename(columns={c: c.strip() for c in df.columns})
+
+    # Campos esperados (si falta alguno, se crea vacío)
+    tipo_id = df.get("Tipo Identificación", pd.NA)
+    num_id  = df.get("Nº Identificación", pd.NA)
+    nombre  = df.get("Nombre", pd.NA)
+    email   = df.get("Email", pd.NA)
+    tel1    = df.get("Telefono1", pd.NA)
+    tel2    = df.get("Telefono2", pd.NA)
+    tel3    = df.get("Telefono3", pd.NA)
+    fecha   = df.get("Fecha", pd.NA)
+    conf    = df.get("Confirma Identidad", pd.NA)
+    tel_inv = df.get("TELEFONO1 INVALIDO", pd.NA)
+
+    out = pd.DataFrame({
+        "tipo_id": tipo_id,
+        "num_id": num_id,
+        "name": nombre,
+        "email": email,
+        "telefono1": tel1,
+        "telefono2": tel2,
+        "telefono3": tel3,
+        "telefono_invalido": tel_inv,
+        "confirma_identidad": conf,
+        "fecha_llamada": fecha,
+    })
+
+    # Derivados
+    out["source"] = "manual"
+    out["categoria"] = cat
+
+    # Teléfono principal (en inválidos, el marcado como inválido)
+    if cat == "INVALIDO":
+        out["telefono"] = out["telefono_invalido"]
+    else:
+        out["telefono"] = first_nonblank(out, ["telefono1"])
+
+    # Normalizaciones
+    for col in ["name", "email"]:
+        if col in out.columns:
+            out[col] = norm_name(out[col])
+    for col in ["telefono", "telefono1", "telefono2", "telefono3", "telefono_invalido"]:
+        if col in out.columns:
+            out[col] = norm_phone(out[col])
+    out["fecha_llamada"] = to_date_only(out["fecha_llamada"])
+    out["snapshot_date"] = out["fecha_llamada"]  # en manual, usamos la misma
+    out["source_file"] = source_file
+    out["entidad"] = pd.NA  # manual no trae entidad
+
+    # En inválidos, si no viene “confirma”, marcamos como INVALIDO
+    if cat == "INVALIDO":
+        out["confirma_identidad"] = out["confirma_identidad"].fillna("INVALIDO")
+    return out
+
 def load_manual(path: Path) -> pd.DataFrame:
     if not path.exists():
         print(f"[ERROR] No se encuentra el manual: {path}")
         return pd.DataFrame()
 
-    mapping = {
-        "Localizados": "SI",
-        "RespondenNO": "NO",
-        "TelefonosInvalidos": "INVALIDO",
-        "Contesta_NoResponde": "NO RESPONDE",
-    }
-
     frames = []
-    with ExcelFile(path) as xf:
-        sheet_names = xf.sheet_names
+    # Un solo abrir del libro; solo las columnas que se usan
+    hojas = lector_excel.leer_hojas(path, list(MANUAL_SHEETS), columnas=MANUAL_COLS)
 
-    for sh, cat in mapping.items():
-        if sh not in sheet_names:
+    for sh, cat in MANUAL_SHEETS.items():
+        if sh not in hojas:
             print(f"[Aviso] Hoja manual no encontrada: {sh}")
             continue
-
-        df = pd.read_excel(path, sheet_name=sh)
-
-        # Normaliza encabezados por espacios extra
-        df = df.rename(columns={c: c.strip() for c in df.columns})
-
-        # Campos esperados (si falta alguno, se crea vacío)
-        tipo_id = df.get("Tipo Identificación", pd.NA)
-        num_id  = df.get("Nº Identificación", pd.NA)
-        nombre  = df.get("Nombre", pd.NA)
-        email   = df.get("Email", pd.NA)
-        tel1    = df.get("Telefono1", pd.NA)
-        tel2    = df.get("Telefono2", pd.NA)
-        tel3    = df.get("Telefono3", pd.NA)
-        fecha   = df.get("Fecha", pd.NA)
-        conf    = df.get("Confirma Identidad", pd.NA)
-        tel_inv = df.get("TELEFONO1 INVALIDO", pd.NA)
-
-        out = pd.DataFrame({
-            "tipo_id": tipo_id,
-            "num_id": num_id,
-            "name": nombre,
-            "email": email,
-            "telefono1": tel1,
-            "telefono2": tel2,
-            "telefono3": tel3,
-            "telefono_invalido": tel_inv,
-            "confirma_identidad": conf,
-            "fecha_llamada": fecha,
-        })
-
-        # Derivados
-        out["source"] = "manual"
-        out["categoria"] = cat
-
-        # Teléfono principal
-        out["telefono"] = out.apply(
-            lambda r: r["telefono_invalido"] if cat == "INVALIDO" else take_first_nonnull(r, ["telefono1"]),
-            axis=1
-        )
-
-        # Normalizaciones
-        for col in ["name", "email"]:
-            if col in out.columns:
-                out[col] = norm_name(out[col])
-        for col in ["telefono", "telefono1", "telefono2", "telefono3", "telefono_invalido"]:
-            if col in out.columns:
-                out[col] = norm_phone(out[col])
-        out["fecha_llamada"] = to_date_only(out["fecha_llamada"])
-        out["snapshot_date"] = out["fecha_llamada"]  # en manual, usamos la misma
-        out["source_file"] = path.name
-        out["entidad"] = pd.NA  # manual no trae entidad
-
-        # En inválidos, si no viene “confirma”, marcamos como INVALIDO
-        if cat == "INVALIDO":
-            out["confirma_identidad"] = out["confirma_identidad"].fillna("INVALIDO")
-
-        frames.append(out)
+        frames.append(normalize_manual_sheet(hojas[sh], cat, path.name))
 
     if not frames:
         return pd.DataFrame()
@@ -151,170 +179,299 @@ def load_manual(path: Path) -> pd.DataFrame:
     manual = pd.concat(frames, ignore_index=True)
     manual = manual.dropna(subset=["name", "telefono"], how="any")
 
-    manual = manual[[
-        "snapshot_date", "source_file", "source", "categoria", "confirma_identidad",
-        "tipo_id", "num_id", "name", "email",
-        "telefono", "telefono1", "telefono2", "telefono3", "telefono_invalido",
-        "entidad", "fecha_llamada"
-    ]]
+    manual = manual[DATA_COLS]
 
-    return manual
+    # Tipos compactos (category / texto Arrow) desde la carga
+    return esquema.compactar(manual, esquema.UNIFICADA)
+
+
+# =========================
+# Caché del manual normalizado
+# =========================
+# MANUAL_SNAPSHOT es una base congelada: la salida de load_manual se guarda en
+# Parquet (cache/manual, vía cache_reportes) con clave hash SHA-256 del archivo +
+# versión del código de normalización. firmas.json recuerda mtime/tamaño → hash,
+# así mientras el archivo no se toque ni siquiera se vuelve a leer para hashearlo.
+MANUAL_CACHE_DIR = BASE_DIR / "cache" / "manual"
+MANUAL_CACHE_INDEX = MANUAL_CACHE_DIR / "firmas.json"
+MANUAL_CACHE_MB = 512
+
+def manual_cache_version() -> str:
+    return cache_reportes.firma_codigo(MANUAL_COLS, MANUAL_SHEETS, load_manual, normalize_manual_sheet,
+                                       first_nonblank, norm_name, norm_phone,
+                                       to_date_only, telefonos.limpiar_fusion, telefonos.e164_co,
+                                       telefonos.normalizar, f"e164={PHONE_E164}",
+                                       esquema.UNIFICADA, esquema.CATEGORIAS_FIJAS, esquema.compactar,
+                                       lector_excel.motor(lector_excel.DEFAULT_ENGINE), pd.__version__)
+
+def manual_hash(path: Path) -> str:
+    """Hash del contenido; se reutiliza el guardado si mtime y tamaño no cambiaron."""
+    try:
+        with open(MANUAL_CACHE_INDEX, "r", encoding="utf-8") as f:
+            firmas = json.load(f)
+    except (OSError, ValueError):
+        firmas = {}
+    key = str(path.resolve())
+    sig = file_signature(path)
+    prev = firmas.get(key)
+    if prev and prev.get("mtime") == sig["mtime"] and prev.get("size") == sig["size"]:
+        return prev["hash"]
+
+    file_hash = cache_reportes.hash_archivo(path)
+    firmas[key] = {**sig, "hash": file_hash}
+    MANUAL_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = MANUAL_CACHE_INDEX.with_name(f".{MANUAL_CACHE_INDEX.name}.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(firmas, f, indent=1)
+    os.replace(tmp, MANUAL_CACHE_INDEX)
+    return file_hash
+
+def load_manual_cached(path: Path, usar_cache: bool = True) -> pd.DataFrame:
+    """load_manual con caché: solo se relee el Excel si el archivo (o el código) cambió."""
+    if not (usar_cache and path.exists() and cache_reportes.disponible()):
+        return load_manual(path)
+    file_hash = manual_hash(path)
+    version = manual_cache_version()
+    df = cache_reportes.cargar(file_hash, version, MANUAL_CACHE_DIR)
+    if df is not None:
+        print("  → (desde caché)")
+        return df
+    df = load_manual(path)
+    if len(df):
+        cache_reportes.guardar(file_hash, version, df, MANUAL_CACHE_DIR, MANUAL_CACHE_MB)
+    return df
 
 
 # =========================
 # Carga Automática (HISTORICO_UNIQUE.xlsx)
 # =========================
-def load_auto(path: Path) -> pd.DataFrame:
+AUTO_SHEETS = {
+    "DATA_SI": "SI",
+    "DATA_NO": "NO",
+    "DATA_INVALIDOS": "INVALIDO",
+    "DATA_SIN_RESPUESTA": "NO RESPONDE",
+}
+
+# Columnas de HISTORICO_UNIQUE que usa normalize_auto_sheet
+AUTO_READ_COLS = ["snapshot_date", "source_file", "btn_input", "name", "Phone", "entidad", "Date of call start"]
+
+DATA_COLS = [
+    "snapshot_date", "source_file", "source", "categoria", "confirma_identidad",
+    "tipo_id", "num_id", "name", "email",
+    "telefono", "telefono1", "telefono2", "telefono3", "telefono_invalido",
+    "entidad", "fecha_llamada"
+]
+
+def normalize_auto_sheet(df: pd.DataFrame, cat: str) -> pd.DataFrame:
+    # === Bloque actualizado ===
+    out = pd.DataFrame({
+        "snapshot_date": df.get("snapshot_date", pd.NA),
+        "source_file": df.get("source_file", pd.NA),
+        "source": "automático",
+        "categoria": cat,
+        "confirma_identidad": df.get("btn_input", pd.NA).astype("string"),
+        "tipo_id": pd.NA,
+        "num_id": pd.NA,
+        "name": df.get("name", pd.NA),
+        "email": pd.NA,
+        # Teléfono principal
+        "telefono": df.get("Phone", pd.NA),
+        # 👉 Campos nuevos para mantener coherencia con el manual
+        "telefono1": df.get("Phone", pd.NA) if cat in ("SI", "NO", "NO RESPONDE") else pd.NA,
+        "telefono2": pd.NA,
+        "telefono3": pd.NA,
+        "telefono_invalido": df.get("Phone", pd.NA) if cat == "INVALIDO" else pd.NA,
+        "entidad": df.get("entidad", pd.NA),
+        "fecha_llamada": df.get("Date of call start", pd.NA),
+    })
+    # ===========================
+
+    # Normalizaciones
+    out["name"] = norm_name(out["name"].fillna(""))
+    out["telefono"] = norm_phone(out["telefono"])
+    out["fecha_llamada"] = to_date_only(out["fecha_llamada"])
+
+    # Mapear btn_input {1 -> SI, 2 -> NO}
+    ci = out["confirma_identidad"].str.strip()
+    out.loc[ci == "1", "confirma_identidad"] = "SI"
+    out.loc[ci == "2", "confirma_identidad"] = "NO"
+    out.loc[out["categoria"] == "NO RESPONDE", "confirma_identidad"] = "NO RESPONDE"
+    out.loc[out["categoria"] == "INVALIDO", "confirma_identidad"] = "INVALIDO"
+    return out
+
+def drop_processed(df: pd.DataFrame, omitir: set) -> pd.DataFrame:
+    """Quita filas cuyo par (snapshot_date, source_file) ya fue fusionado."""
+    if not omitir or df.empty:
+        return df
+    pares = pd.MultiIndex.from_arrays([
+        df.get("snapshot_date", pd.Series(pd.NA, index=df.index)).astype(str),
+        df.get("source_file", pd.Series(pd.NA, index=df.index)).astype(str),
+    ])
+    return df[~pares.isin(list(omitir))]
+
+def finish_auto(frames: list) -> pd.DataFrame:
+    if not frames:
+        return pd.DataFrame()
+
+    auto = pd.concat(frames, ignore_index=True)
+    auto = auto.dropna(subset=["name", "telefono"], how="any")
+
+    auto = auto[DATA_COLS]
+
+    return esquema.compactar(auto, esquema.UNIFICADA)
+
+def load_auto(path: Path, omitir: set = None) -> pd.DataFrame:
     if not path.exists():
         print(f"[Aviso] No existe {path}. Solo se fusionará manual.")
         return pd.DataFrame()
 
-    sheets = {
-        "DATA_SI": "SI",
-        "DATA_NO": "NO",
-        "DATA_INVALIDOS": "INVALIDO",
-        "DATA_SIN_RESPUESTA": "NO RESPONDE",
-    }
+    hojas = lector_excel.leer_hojas(path, list(AUTO_SHEETS), columnas=AUTO_READ_COLS)
+    return load_auto_frames(hojas, omitir)
 
+def load_auto_frames(hojas: dict, omitir: set = None) -> pd.DataFrame:
+    """Igual que load_auto, pero desde hojas DATA_* ya en memoria (pipeline_diario)."""
     frames = []
-    with ExcelFile(path) as xf:
-        shs = xf.sheet_names
-
-    for sh, cat in sheets.items():
-        if sh not in shs:
+    for sh, cat in AUTO_SHEETS.items():
+        if sh not in hojas:
             print(f"[Aviso] Hoja automática no encontrada: {sh}")
             continue
 
-        df = pd.read_excel(path, sheet_name=sh)
-
-        # === Bloque actualizado ===
-        out = pd.DataFrame({
-            "snapshot_date": df.get("snapshot_date", pd.NA),
-            "source_file": df.get("source_file", pd.NA),
-            "source": "automático",
-            "categoria": cat,
-            "confirma_identidad": df.get("btn_input", pd.NA).astype("string"),
-            "tipo_id": pd.NA,
-            "num_id": pd.NA,
-            "name": df.get("name", pd.NA),
-            "email": pd.NA,
-            # Teléfono principal
-            "telefono": df.get("Phone", pd.NA),
-            # 👉 Campos nuevos para mantener coherencia con el manual
-            "telefono1": df.get("Phone", pd.NA) if cat in ("SI", "NO", "NO RESPONDE") else pd.NA,
-            "telefono2": pd.NA,
-            "telefono3": pd.NA,
-            "telefono_invalido": df.get("Phone", pd.NA) if cat == "INVALIDO" else pd.NA,
-            "entidad": df.get("entidad", pd.NA),
-            "fecha_llamada": df.get("Date of call start", pd.NA),
-        })
-        # ===========================
-
-        # Normalizaciones
-        out["name"] = norm_name(out["name"].fillna(""))
-        out["telefono"] = norm_phone(out["telefono"])
-        out["fecha_llamada"] = to_date_only(out["fecha_llamada"])
-
-        # Mapear btn_input {1 -> SI, 2 -> NO}
-        ci = out["confirma_identidad"].str.strip()
-        out.loc[ci == "1", "confirma_identidad"] = "SI"
-        out.loc[ci == "2", "confirma_identidad"] = "NO"
-        out.loc[out["categoria"] == "NO RESPONDE", "confirma_identidad"] = "NO RESPONDE"
-        out.loc[out["categoria"] == "INVALIDO", "confirma_identidad"] = "INVALIDO"
+        df = hojas[sh]
+        df = correcciones.aplicar(drop_processed(df, omitir), sh)
+        frames.append(normalize_auto_sheet(df, cat))
 
-        frames.append(out)
+    return finish_auto(frames)
 
-    if not frames:
-        return pd.DataFrame()
+def load_auto_store(store_dir: Path, omitir: set = None) -> pd.DataFrame:
+    """Igual que load_auto, pero desde el almacén Parquet: solo abre las particiones nuevas."""
+    omitir = omitir or set()
+    saltar = {historico_store.partition_path(sh, snap, src, store_dir)
+              for sh in AUTO_SHEETS for snap, src in omitir}
+    frames = []
+    for sh, cat in AUTO_SHEETS.items():
+        parts = [p for p in historico_store.list_partitions(sh, store_dir) if p not in saltar]
+        if not parts:
+            continue
+        df = pd.concat([pd.read_parquet(p) for p in parts], ignore_index=True)
+        df = correcciones.aplicar(drop_processed(df, omitir), sh)
+        frames.append(normalize_auto_sheet(df, cat))
+    return finish_auto(frames)
 
-    auto = pd.concat(frames, ignore_index=True)
-    auto = auto.dropna(subset=["name", "telefono"], how="any")
+def load_auto_sqlite(db_path: Path, omitir: set = None) -> pd.DataFrame:
+    """Igual que load_auto, pero desde historico.sqlite: los pares ya fusionados se filtran en SQLite."""
+    frames = []
+    con = historico_sqlite.conectar(db_path)
+    try:
+        for sh, cat in AUTO_SHEETS.items():
+            df = historico_sqlite.read_table(sh, columns=AUTO_READ_COLS, excluir=omitir, con=con)
+            df = correcciones.aplicar(df, sh)
+            frames.append(normalize_auto_sheet(df, cat))
+    finally:
+        con.close()
+    return finish_auto(frames)
 
-    auto = auto[[
-        "snapshot_date", "source_file", "source", "categoria", "confirma_identidad",
-        "tipo_id", "num_id", "name", "email",
-        "telefono", "telefono1", "telefono2", "telefono3", "telefono_invalido",
-        "entidad", "fecha_llamada"
-    ]]
 
-    return auto
+# =========================
+# Estimación de memoria (--memory-budget-mb)
+# =========================
+def _muestra_auto(sh: str) -> tuple:
+    """(muestra cruda, filas totales) de una hoja automática, desde la fuente que usaría load_sources."""
+    n = esquema.SAMPLE_ROWS
+    if historico_store.store_exists(STORE_DIR):
+        import pyarrow.parquet as pq
+        parts = historico_store.list_partitions(sh, STORE_DIR)
+        if not parts:
+            return pd.DataFrame(), 0
+        filas = sum(pq.ParquetFile(p).metadata.num_rows for p in parts)
+        muestra = pd.read_parquet(parts[-1]).head(n)   # la partición más reciente
+        return muestra[[c for c in AUTO_READ_COLS if c in muestra.columns]], filas
+    if historico_sqlite.db_exists(SQLITE_PATH):
+        return historico_sqlite.muestra_tabla(sh, n, AUTO_READ_COLS, SQLITE_PATH)
+    if AUTO_PATH.exists():
+        return esquema.muestra_libro(AUTO_PATH, sh, n, AUTO_READ_COLS)
+    return pd.DataFrame(), 0
+
+def estimar_fuentes() -> dict:
+    """Memoria de manual + automático ya normalizados, extrapolada desde una muestra de cada hoja."""
+    ests = []
+    if USE_MANUAL and MANUAL_PATH.exists():
+        for sh, cat in MANUAL_SHEETS.items():
+            try:
+                muestra, filas = esquema.muestra_libro(MANUAL_PATH, sh, columnas=MANUAL_COLS)
+            except KeyError:
+                continue
+            norm = normalize_manual_sheet(muestra, cat, MANUAL_PATH.name)[DATA_COLS]
+            ests.append(esquema.estimar(norm, filas, esquema.UNIFICADA))
+    for sh, cat in AUTO_SHEETS.items():
+        try:
+            muestra, filas = _muestra_auto(sh)
+        except KeyError:
+            continue
+        if muestra.empty:
+            continue
+        norm = normalize_auto_sheet(muestra, cat)[DATA_COLS]
+        ests.append(esquema.estimar(norm, filas, esquema.UNIFICADA))
+    return esquema.sumar(ests)
 
 
 # =========================
-# Main
+# Unión + vistas
 # =========================
-def main():
-    print("Cargando manual ...")
-    if USE_MANUAL:
-        dfm = load_manual(MANUAL_PATH)
-        print(f"  → {len(dfm)} filas manuales")
-    else:
-        dfm = pd.DataFrame()
-        print("  → (Omitido: lectura de manual desactivada)")
-
-    print("Cargando automático ...")
-    dfa = load_auto(AUTO_PATH)
-    print(f"  → {len(dfa)} filas automáticas")
+KEY_COLS = ["snapshot_date", "source", "categoria", "name", "telefono"]
 
+def unificar(dfm: pd.DataFrame, dfa: pd.DataFrame) -> pd.DataFrame:
     # Unión + limpieza básica
     df = pd.concat([dfm, dfa], ignore_index=True)
+    esquema.compactar(df, esquema.UNIFICADA)  # categorías distintas entre manual y automático → object
     df = df[df["telefono"].notna() & (df["telefono"].astype(str).str.len() > 0)]
 
     # Dedupe por día + fuente + categoría + name + telefono
-    df.drop_duplicates(
-        subset=["snapshot_date", "source", "categoria", "name", "telefono"],
-        keep="last",
-        inplace=True
-    )
+    df = df.drop_duplicates(subset=KEY_COLS, keep="last")
 
     # Orden agradable
-    df.sort_values(by=["snapshot_date", "categoria", "entidad", "name"], inplace=True, na_position="last")
+    df = df.sort_values(by=["snapshot_date", "categoria", "entidad", "name"], na_position="last")
+
+    # Normalizar confirmación en mayúsculas
+    df["confirma_identidad"] = df["confirma_identidad"].astype("string").str.upper()
+    return df
 
+def build_resumen(df: pd.DataFrame) -> pd.DataFrame:
     # RESUMEN (conteos por día/categoría)
-    resumen = (
-        df.groupby(["snapshot_date", "categoria"], dropna=False)
+    return (
+        df.groupby(["snapshot_date", "categoria"], dropna=False, observed=True)
           .size()
           .reset_index(name="conteo")
           .sort_values(["snapshot_date", "categoria"])
     )
 
-    # Normalizar confirmación en mayúsculas
-    df["confirma_identidad"] = df["confirma_identidad"].astype("string").str.upper()
-
-    # === VISTAS estilo manual (históricas) ===
-    si_view = (
-        df[df["categoria"] == "SI"]
-        .loc[:, ["tipo_id","num_id","name","email","telefono1","telefono2","telefono3","confirma_identidad","fecha_llamada","snapshot_date","source"]]
-        .rename(columns={
-            "tipo_id": "Tipo Identificación",
-            "num_id": "Nº Identificación",
-            "name": "Nombre",
-            "email": "Email",
-            "telefono1": "Telefono1",
-            "telefono2": "Telefono2",
-            "telefono3": "Telefono3",
-            "confirma_identidad": "Confirma Identidad",
-            "fecha_llamada": "Fecha"
-        })
+MANUAL_STYLE_RENAME = {
+    "tipo_id": "Tipo Identificación",
+    "num_id": "Nº Identificación",
+    "name": "Nombre",
+    "email": "Email",
+    "telefono1": "Telefono1",
+    "telefono2": "Telefono2",
+    "telefono3": "Telefono3",
+    "confirma_identidad": "Confirma Identidad",
+    "fecha_llamada": "Fecha"
+}
+MANUAL_STYLE_COLS = ["tipo_id","num_id","name","email","telefono1","telefono2","telefono3","confirma_identidad","fecha_llamada","snapshot_date","source"]
+
+def manual_style_view(df: pd.DataFrame, categoria: str) -> pd.DataFrame:
+    return (
+        df[df["categoria"] == categoria]
+        .loc[:, MANUAL_STYLE_COLS]
+        .rename(columns=MANUAL_STYLE_RENAME)
         .sort_values(by=["snapshot_date","Nombre"], na_position="last")
     )
 
-    no_view = (
-        df[df["categoria"] == "NO"]
-        .loc[:, ["tipo_id","num_id","name","email","telefono1","telefono2","telefono3","confirma_identidad","fecha_llamada","snapshot_date","source"]]
-        .rename(columns={
-            "tipo_id": "Tipo Identificación",
-            "num_id": "Nº Identificación",
-            "name": "Nombre",
-            "email": "Email",
-            "telefono1": "Telefono1",
-            "telefono2": "Telefono2",
-            "telefono3": "Telefono3",
-            "confirma_identidad": "Confirma Identidad",
-            "fecha_llamada": "Fecha"
-        })
-        .sort_values(by=["snapshot_date","Nombre"], na_position="last")
-    )
+def build_views(df: pd.DataFrame) -> dict:
+    """Hojas del Excel unificado (en orden), listas para escribir."""
+    resumen = build_resumen(df)
+
+    # === VISTAS estilo manual (históricas) ===
+    si_view = manual_style_view(df, "SI")
+    no_view = manual_style_view(df, "NO")
 
     invalidos_view = (
         df[df["categoria"] == "INVALIDO"]
@@ -327,36 +484,223 @@ def main():
         .sort_values(by=["Nombre"], na_position="last")
     )
 
-    noresp_view = (
-        df[df["categoria"] == "NO RESPONDE"]
-        .loc[:, ["tipo_id","num_id","name","email","telefono1","telefono2","telefono3","confirma_identidad","fecha_llamada","snapshot_date","source"]]
-        .rename(columns={
-            "tipo_id": "Tipo Identificación",
-            "num_id": "Nº Identificación",
-            "name": "Nombre",
-            "email": "Email",
-            "telefono1": "Telefono1",
-            "telefono2": "Telefono2",
-            "telefono3": "Telefono3",
-            "confirma_identidad": "Confirma Identidad",
-            "fecha_llamada": "Fecha"
-        })
-        .sort_values(by=["snapshot_date","Nombre"], na_position="last")
-    )
+    noresp_view = manual_style_view(df, "NO RESPONDE")
 
     # Evitar NaN visibles en Excel (sin FutureWarnings)
-    si_view       = safe_fillna_str(si_view)
-    no_view       = safe_fillna_str(no_view)
-    invalidos_view= safe_fillna_str(invalidos_view)
-    noresp_view   = safe_fillna_str(noresp_view)
-    resumen       = safe_fillna_str(resumen)
+    return {
+        "RESUMEN": safe_fillna_str(resumen),
+        "Localizados": safe_fillna_str(si_view),
+        "RespondenNO": safe_fillna_str(no_view),
+        "TelefonosInvalidos": safe_fillna_str(invalidos_view),
+        "Contesta_NoResponde": safe_fillna_str(noresp_view),
+        "DATA": df,
+    }
+
+def write_unified_xlsx(df: pd.DataFrame, path: Path = OUT_XLSX):
+    # Escribe Excel (hojas en orden)
+    with pd.ExcelWriter(path, engine="openpyxl") as w:
+        for sh, view in build_views(df).items():
+            view.to_excel(w, sheet_name=sh, index=False)
+
+
+# =========================
+# Estado incremental (marca de agua de snapshots fusionados)
+# =========================
+# procesados.json → pares (snapshot_date, source_file) ya fusionados, versión de cada
+#                   reporte en el manifiesto de ingesta y firma del manual (archivo y por fecha)
+# claves.parquet  → hash 64-bit de (snapshot_date, source, categoria, name, telefono) ya presentes
+#                   y el número de la parte que tiene cada fila
+# unificada/      → partes Parquet de la base unificada (una por corrida)
+STATE_DIR = OUT_DIR / "fusion_state"
+STATE_FILE = STATE_DIR / "procesados.json"
+KEYS_FILE = STATE_DIR / "claves.parquet"
+PARTS_DIR = OUT_DIR / "unificada"
+
+def row_keys_cols(df: pd.DataFrame, cols: list) -> np.ndarray:
+    k = df[cols].astype("string").fillna("").astype(object)
+    return pd.util.hash_pandas_object(k, index=False).to_numpy(dtype="uint64")
+
+def row_keys(df: pd.DataFrame) -> np.ndarray:
+    return row_keys_cols(df, KEY_COLS)
+
+def frame_pairs(df: pd.DataFrame) -> set:
+    if df.empty:
+        return set()
+    p = df[["snapshot_date", "source_file"]].astype(str).drop_duplicates()
+    return set(p.itertuples(index=False, name=None))
+
+def file_signature(path: Path) -> dict:
+    st = path.stat()
+    return {"mtime": st.st_mtime, "size": st.st_size}
+
+def manual_dates(dfm: pd.DataFrame) -> dict:
+    """snapshot_date → firma de sus filas del manual (no depende del orden de las filas)."""
+    if dfm.empty:
+        return {}
+    h = pd.Series(row_keys_cols(dfm, DATA_COLS), index=dfm.index)
+    suma = h.groupby(dfm["snapshot_date"].astype(str).to_numpy()).sum()
+    return {f: f"{int(v):016x}" for f, v in suma.items()}
+
+def report_versions() -> dict:
+    """'snapshot_date|source_file' → ingestas del reporte en el manifiesto (hash@procesado).
+
+    Un --force del consolidador (o el mismo nombre con otro contenido) cambia la versión.
+    """
+    out = {}
+    for h, r in manifiesto.cargar().items():
+        par = f"{r.get('snapshot_date', '')}|{r.get('source_file', '')}"
+        out.setdefault(par, []).append(f"{h[:16]}@{r.get('procesado', '')}")
+    return {par: ",".join(sorted(v)) for par, v in out.items()}
+
+def changed_reports(st: dict) -> set:
+    """Pares ya fusionados cuyo reporte se volvió a ingerir después de la fusión."""
+    previas = st.get("versiones")
+    if previas is None:   # estado de antes de guardar versiones: se toma la actual como base
+        return set()
+    actuales = report_versions()
+    return {p for p in st["pares"]
+            if f"{p[0]}|{p[1]}" in actuales and actuales[f"{p[0]}|{p[1]}"] != previas.get(f"{p[0]}|{p[1]}")}
+
+def load_state() -> dict:
+    if STATE_FILE.exists():
+        try:
+            with open(STATE_FILE, "r", encoding="utf-8") as f:
+                st = json.load(f)
+            st["pares"] = {tuple(p) for p in st.get("pares", [])}
+            return st
+        except Exception:
+            print(f"[Aviso] No se pudo leer {STATE_FILE}; se parte de cero.")
+    return {"pares": set(), "manual": None, "total": 0}
+
+def save_state(st: dict):
+    STATE_DIR.mkdir(parents=True, exist_ok=True)
+    data = dict(st)
+    data["pares"] = sorted(list(p) for p in st["pares"])
+    tmp = STATE_FILE.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, STATE_FILE)
+
+def load_keys() -> tuple:
+    """(claves, parte de cada clave); parte -1 si el índice es de antes de guardarla."""
+    if KEYS_FILE.exists():
+        k = pd.read_parquet(KEYS_FILE)
+        partes = k["parte"].to_numpy(dtype="int32") if "parte" in k.columns else np.full(len(k), -1, dtype="int32")
+        return k["clave"].to_numpy(dtype="uint64"), partes
+    return np.array([], dtype="uint64"), np.array([], dtype="int32")
+
+def save_keys(keys: np.ndarray, partes: np.ndarray):
+    STATE_DIR.mkdir(parents=True, exist_ok=True)
+    pd.DataFrame({"clave": keys, "parte": partes.astype("int32")}).to_parquet(KEYS_FILE, index=False)
+
+def part_path(n: int) -> Path:
+    return PARTS_DIR / f"part-{n:05d}.parquet"
+
+def write_part(df: pd.DataFrame, reset: bool = False) -> int:
+    """Escribe df como la parte siguiente y devuelve su número."""
+    PARTS_DIR.mkdir(parents=True, exist_ok=True)
+    if reset:
+        for p in PARTS_DIR.glob("part-*.parquet"):
+            p.unlink()
+    n = len(list(PARTS_DIR.glob("part-*.parquet")))
+    historico_store._write_atomic(df, part_path(n))
+    return n
+
+def read_parts() -> pd.DataFrame:
+    parts = sorted(PARTS_DIR.glob("part-*.parquet"))
+    if not parts:
+        return pd.DataFrame(columns=DATA_COLS)
+    return pd.concat([pd.read_parquet(p) for p in parts], ignore_index=True)
+
+def replace_rows(keys: np.ndarray, partes: np.ndarray) -> int:
+    """Quita de las partes las filas con esas claves; devuelve cuántas quitó.
+
+    Solo se abren las partes que el índice de claves asocia a ellas (todas si
+    el índice no guarda la parte).
+    """
+    nums = set(partes.tolist())
+    paths = sorted(PARTS_DIR.glob("part-*.parquet")) if -1 in nums else [part_path(n) for n in sorted(nums)]
+    quitadas = 0
+    for p in paths:
+        part = pd.read_parquet(p)
+        m = np.isin(row_keys(part), keys)
+        if m.any():
+            historico_store._write_atomic(part[~m], p)
+            quitadas += int(m.sum())
+    return quitadas
+
+def record_state(st: dict, dfm: pd.DataFrame, dfa: pd.DataFrame, total: int):
+    st["pares"] |= frame_pairs(dfm) | frame_pairs(dfa)
+    if USE_MANUAL and MANUAL_PATH.exists():
+        st["manual"] = file_signature(MANUAL_PATH)
+        # Las fechas ya fusionadas no cambian (si cambian, la incremental se niega): basta agregar las nuevas
+        st["manual_fechas"] = {**st.get("manual_fechas", {}), **manual_dates(dfm)}
+    st["versiones"] = report_versions()
+    st["total"] = int(total)
+    st["e164"] = PHONE_E164
+    st["correcciones"] = correcciones.version()
+    st["actualizado"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    save_state(st)
+
+
+# =========================
+# Main
+# =========================
+def load_sources(st: dict = None, usar_cache: bool = True, hojas_auto: dict = None):
+    """Carga manual + automático. Con st (estado incremental) solo lo que no se ha fusionado.
+
+    hojas_auto: hojas DATA_* ya en memoria; si se dan, no se lee el histórico automático.
+    """
+    omitir = st["pares"] if st else None
+    print("Cargando manual ...")
+    if not USE_MANUAL:
+        dfm = pd.DataFrame()
+        print("  → (Omitido: lectura de manual desactivada)")
+    elif st and st.get("manual") is not None and MANUAL_PATH.exists() and file_signature(MANUAL_PATH) == st["manual"]:
+        dfm = pd.DataFrame()
+        print("  → (Sin cambios desde la última fusión)")
+    else:
+        dfm = load_manual_cached(MANUAL_PATH, usar_cache)
+        if st and st["pares"]:
+            # Si el manual cambió en días ya fusionados, la incremental no puede reemplazarlos
+            previas = st.get("manual_fechas")
+            fechas = manual_dates(dfm)
+            ya = {f for f, src in st["pares"] if src == MANUAL_PATH.name}
+            cambiadas = ya if previas is None else {f for f in ya if fechas.get(f) != previas.get(f)}
+            if cambiadas:
+                print(f"[ERROR] {MANUAL_PATH.name} cambió en {len(cambiadas)} día(s) ya fusionados "
+                      f"(p. ej. {min(cambiadas)}): corre la fusión completa (sin --incremental).")
+                sys.exit(1)
+        dfm = drop_processed(dfm, omitir)
+        print(f"  → {len(dfm)} filas manuales")
+
+    print("Cargando automático ...")
+    if hojas_auto is not None:
+        dfa = load_auto_frames(hojas_auto, omitir)
+    elif historico_store.store_exists(STORE_DIR):
+        dfa = load_auto_store(STORE_DIR, omitir)
+    elif historico_sqlite.db_exists(SQLITE_PATH):
+        dfa = load_auto_sqlite(SQLITE_PATH, omitir)
+    else:
+        dfa = load_auto(AUTO_PATH, omitir)
+    print(f"  → {len(dfa)} filas automáticas")
+    return dfm, dfa
+
+def run_full(etapas=None, usar_cache: bool = True, hojas_auto: dict = None):
+    st = load_state()
+    with instrumentacion.etapa(etapas, "carga") as e:
+        dfm, dfa = load_sources(usar_cache=usar_cache, hojas_auto=hojas_auto)
+        e["filas_out"] = len(dfm) + len(dfa)
+    with instrumentacion.etapa(etapas, "unificacion", len(dfm) + len(dfa)) as e:
+        df = unificar(dfm, dfa)
+        e["filas_out"] = len(df)
 
     # ================
     # Confirmación final
     # ================
-    # 1) Lee el conteo anterior ANTES de escribir (si existe)
-    prev_count = 0
-    if OUT_XLSX.exists():
+    # 1) Conteo anterior: del estado si existe; si no, del Excel previo
+    prev_count = st.get("total", 0)
+    if not prev_count and OUT_XLSX.exists():
         try:
             prev_data = pd.read_excel(OUT_XLSX, sheet_name="DATA", usecols=["snapshot_date"])
             prev_count = len(prev_data)
@@ -364,38 +708,143 @@ def main():
             prev_count = 0
 
     # 2) Escribe Excel (hojas en orden) + CSV plano BI
-    with pd.ExcelWriter(OUT_XLSX, engine="openpyxl") as w:
-        resumen.to_excel(w, sheet_name="RESUMEN", index=False)
-        si_view.to_excel(w, sheet_name="Localizados", index=False)
-        no_view.to_excel(w, sheet_name="RespondenNO", index=False)
-        invalidos_view.to_excel(w, sheet_name="TelefonosInvalidos", index=False)
-        noresp_view.to_excel(w, sheet_name="Contesta_NoResponde", index=False)
-        df.to_excel(w, sheet_name="DATA", index=False)
+    with instrumentacion.etapa(etapas, "escritura", len(df)):
+        write_unified_xlsx(df, OUT_XLSX)
+        df.to_csv(OUT_CSV, index=False, encoding="utf-8-sig")
 
-    df.to_csv(OUT_CSV, index=False, encoding="utf-8-sig")
+    # Deja listo el estado para corridas --incremental
+    with instrumentacion.etapa(etapas, "estado_incremental", len(df)):
+        try:
+            write_part(df, reset=True)
+            save_keys(row_keys(df), np.zeros(len(df), dtype="int32"))
+            record_state({"pares": set()}, dfm, dfa, len(df))
+        except ImportError:
+            pass
 
     # 3) Cálculo de nuevos
     new_count = len(df)
     added_rows = new_count - prev_count if prev_count > 0 else new_count
+    return df, added_rows, new_count
+
+def run_incremental(export_xlsx: bool = False, etapas=None, usar_cache: bool = True, hojas_auto: dict = None):
+    st = load_state()
+    if st["pares"] and st.get("e164", False) != PHONE_E164:
+        print("[ERROR] PHONE_E164 cambió desde la última fusión: corre la fusión completa (sin --incremental).")
+        sys.exit(1)
+    corregidos = correcciones.afectados(st.get("correcciones", 0)) & st["pares"]
+    if corregidos:
+        print(f"[ERROR] Hay correcciones nuevas sobre {len(corregidos)} día(s) ya fusionados "
+              f"(p. ej. {min(corregidos)}): corre la fusión completa (sin --incremental).")
+        sys.exit(1)
+    reingeridos = changed_reports(st)
+    if reingeridos:
+        print(f"[ERROR] {len(reingeridos)} reporte(s) ya fusionados se volvieron a ingerir "
+              f"(p. ej. {min(reingeridos)}): corre la fusión completa (sin --incremental).")
+        sys.exit(1)
+    with instrumentacion.etapa(etapas, "carga") as e:
+        dfm, dfa = load_sources(st, usar_cache, hojas_auto)
+        e["filas_out"] = len(dfm) + len(dfa)
+    with instrumentacion.etapa(etapas, "unificacion", len(dfm) + len(dfa)) as e:
+        nuevos = unificar(dfm, dfa)
+        e["filas_out"] = len(nuevos)
+
+    # Dedupe solo contra el índice de claves existentes. Como en la fusión completa
+    # (keep="last"), si una clave ya estaba gana la fila nueva: la anterior se quita
+    # de las partes que la tienen (el índice guarda la parte de cada clave). El CSV
+    # no se reescribe: queda desactualizado hasta el próximo --export-xlsx.
+    with instrumentacion.etapa(etapas, "dedupe", len(nuevos)) as e:
+        keys_prev, partes_prev = load_keys()
+        keys_new = row_keys(nuevos)
+        choque = np.isin(keys_new, keys_prev)
+        reemplazadas = 0
+        if choque.any():
+            viejas = np.isin(keys_prev, keys_new[choque])
+            reemplazadas = replace_rows(keys_new[choque], partes_prev[viejas])
+            keys_prev, partes_prev = keys_prev[~viejas], partes_prev[~viejas]
+            st["csv_al_dia"] = False
+            print(f"  → {reemplazadas} filas ya fusionadas reemplazadas por su versión nueva")
+        e["filas_out"] = len(nuevos)
+
+    with instrumentacion.etapa(etapas, "escritura", len(nuevos)):
+        if len(nuevos):
+            parte = write_part(nuevos)
+            if not st.get("csv_al_dia", True):
+                pass  # se regenera desde las partes con --export-xlsx
+            elif OUT_CSV.exists():
+                nuevos.to_csv(OUT_CSV, mode="a", header=False, index=False, encoding="utf-8")
+            else:
+                nuevos.to_csv(OUT_CSV, index=False, encoding="utf-8-sig")
+            save_keys(np.concatenate([keys_prev, keys_new]),
+                      np.concatenate([partes_prev, np.full(len(keys_new), parte, dtype="int32")]))
+        total = st.get("total", 0) + len(nuevos) - reemplazadas
+
+    df = nuevos
+    if export_xlsx:
+        with instrumentacion.etapa(etapas, "export_xlsx") as e:
+            df = read_parts()
+            df = df.sort_values(by=["snapshot_date", "categoria", "entidad", "name"], na_position="last")
+            write_unified_xlsx(df, OUT_XLSX)
+            if not st.get("csv_al_dia", True):
+                df.to_csv(OUT_CSV, index=False, encoding="utf-8-sig")
+                st["csv_al_dia"] = True
+            e["filas_out"] = len(df)
+    if not st.get("csv_al_dia", True):
+        print(f"[Aviso] {OUT_CSV.name} quedó desactualizado (filas reemplazadas): se regenera con --export-xlsx.")
+    record_state(st, dfm, dfa, total)
+    return df, len(nuevos) - reemplazadas, total
+
+def main():
+    parser = argparse.ArgumentParser(description="Fusiona el histórico manual y el automático en BASE_HISTORICA_UNIFICADA.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Solo carga y fusiona los snapshots (snapshot_date, source_file) que aún no se han fusionado; "
+                             "agrega al CSV y a output/history/unificada sin releer todo el histórico.")
+    parser.add_argument("--export-xlsx", action="store_true",
+                        help=f"Con --incremental, regenera también {OUT_XLSX.name} desde las partes acumuladas "
+                             f"(y {OUT_CSV.name}, si quedó desactualizado por filas reemplazadas).")
+    parser.add_argument("--no-cache", action="store_true",
+                        help=f"No usa la caché del manual normalizado ({MANUAL_CACHE_DIR}); relee {MANUAL_PATH.name}.")
+    parser.add_argument("--memory-budget-mb", "--memory-budget", type=float, default=None,
+                        help="Antes de fusionar, estima la memoria de las fuentes (desde una muestra de cada hoja) "
+                             "y avisa si el pico estimado supera este presupuesto en MB.")
+    parser.add_argument("--prometheus-dir", type=Path, default=None,
+                        help=f"Carpeta del textfile collector de node-exporter para dejar las métricas de la corrida "
+                             f"(por defecto: variable {instrumentacion.PROM_ENV}, si existe).")
+    args = parser.parse_args()
+
+    if args.memory_budget_mb:
+        nota = " (cota superior: --incremental solo carga lo nuevo)" if args.incremental else ""
+        esquema.reportar("de la fusión" + nota, estimar_fuentes(), args.memory_budget_mb)
+
+    with instrumentacion.Corrida("fusionar_historicos", args.prometheus_dir) as corrida:
+        corrida.extra["modo"] = "incremental" if args.incremental else "full"
+        if args.incremental:
+            df, added_rows, new_count = run_incremental(args.export_xlsx, corrida, not args.no_cache)
+        else:
+            df, added_rows, new_count = run_full(corrida, not args.no_cache)
+        corrida.extra.update(added=int(added_rows), total=int(new_count))
+        telefonos.guardar_memo()
 
     # 4) Última fecha robusta
-    last_date = pd.to_datetime(df["snapshot_date"], errors="coerce").max()
+    last_date = pd.to_datetime(df["snapshot_date"].astype("string"), errors="coerce").max() if len(df) else pd.NaT
     last_date_str = "" if pd.isna(last_date) else str(last_date.date())
 
     # 5) Mensaje final
     print("\n✅ Histórico unificado generado:")
-    print(f"  - {OUT_XLSX}")
+    if not args.incremental or args.export_xlsx:
+        print(f"  - {OUT_XLSX}")
     print(f"  - {OUT_CSV}")
     print(f"📈 Registros nuevos añadidos: {added_rows}")
     print(f"📊 Total acumulado en histórico: {new_count} filas")
-    print("📘 Hojas: RESUMEN, Localizados, RespondenNO, TelefonosInvalidos, Contesta_NoResponde, DATA")
+    if not args.incremental or args.export_xlsx:
+        print("📘 Hojas: RESUMEN, Localizados, RespondenNO, TelefonosInvalidos, Contesta_NoResponde, DATA")
     print(f"🕒 Última fecha detectada en snapshot_date: {last_date_str}")
 
     # 6) Log (opcional, pero recomendado)
     try:
         with open(LOG_FILE, "a", encoding="utf-8") as f:
             now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            f.write(f"{now} | added={added_rows} | total={new_count} | last_date={last_date_str}\n")
+            modo = "incremental" if args.incremental else "full"
+            f.write(f"{now} | added={added_rows} | total={new_count} | last_date={last_date_str} | mode={modo}\n")
     except Exception:
         pass
 
@@ -0,0 +1,259 @@
+import pandas as pd
+from pathlib import Path
+import argparse
+import sqlite3
+
+import lector_excel
+
+# =========================
+# Histórico en SQLite (upserts con índice único)
+# =========================
+# Un solo archivo output/history/historico.sqlite con una tabla por hoja
+# (DATA_SI / DATA_NO / DATA_INVALIDOS / DATA_SIN_RESPUESTA) y otra para
+# HIST_RESUMEN_DIARIO. Cada tabla tiene un índice único sobre su clave, así la
+# carga diaria es un INSERT OR REPLACE masivo en una sola transacción: el costo
+# depende de las filas nuevas, no del tamaño del histórico.
+#
+# Misma regla que append + drop_duplicates(keep="last"): a igual clave gana la
+# fila nueva y queda al final (REPLACE borra la vieja e inserta con rowid nuevo).
+# Los nulos de la clave cuentan como iguales entre sí (IFNULL en el índice).
+# HISTORICO_UNIQUE.xlsx / HIST_RESUMEN_DIARIO.xlsx/.csv pasan a ser vistas exportadas.
+BASE_DIR = Path(__file__).resolve().parent
+HISTORY_DIR = BASE_DIR / "output" / "history"
+DB_PATH = HISTORY_DIR / "historico.sqlite"
+HISTORY_XLSX = HISTORY_DIR / "HISTORICO_UNIQUE.xlsx"
+RESUMEN_XLSX = HISTORY_DIR / "HIST_RESUMEN_DIARIO.xlsx"
+RESUMEN_CSV = HISTORY_DIR / "HIST_RESUMEN_DIARIO.csv"
+
+SHEETS = ["DATA_SI", "DATA_NO", "DATA_INVALIDOS", "DATA_SIN_RESPUESTA"]
+RESUMEN_TABLE = "HIST_RESUMEN_DIARIO"
+META_COLS = ["snapshot_date", "source_file"]
+KEY_DATA = ["entidad", "name", "Phone"] + META_COLS
+KEY_RESUMEN = META_COLS
+TYPES_TABLE = "_columnas"  # columnas de fecha/hora (se guardan como texto ISO)
+
+
+def _q(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def conectar(db_path: Path = DB_PATH) -> sqlite3.Connection:
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    con = sqlite3.connect(db_path)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA synchronous=NORMAL")
+    con.execute(f"CREATE TABLE IF NOT EXISTS {TYPES_TABLE} (tabla TEXT, columna TEXT, tipo TEXT, "
+                f"PRIMARY KEY (tabla, columna))")
+    return con
+
+
+def db_exists(db_path: Path = DB_PATH) -> bool:
+    if not db_path.exists():
+        return False
+    con = sqlite3.connect(db_path)
+    try:
+        return any(_columnas(con, t) for t in SHEETS)
+    finally:
+        con.close()
+
+
+def _columnas(con: sqlite3.Connection, tabla: str) -> list:
+    return [r[1] for r in con.execute(f"PRAGMA table_info({_q(tabla)})")]
+
+
+def _asegurar_tabla(con: sqlite3.Connection, tabla: str, columnas: list, key_cols: list):
+    """Crea la tabla (columnas sin tipo: SQLite guarda cada valor con el suyo) o agrega las nuevas."""
+    existentes = _columnas(con, tabla)
+    if not existentes:
+        cols = list(dict.fromkeys(list(columnas) + list(key_cols)))
+        con.execute(f"CREATE TABLE {_q(tabla)} ({', '.join(_q(c) for c in cols)})")
+        # X'00' (blob) no choca con '' ni con ningún texto: nulo solo es igual a nulo
+        expr = ", ".join(f"IFNULL({_q(c)}, X'00')" for c in key_cols)
+        con.execute(f"CREATE UNIQUE INDEX {_q('ux_' + tabla)} ON {_q(tabla)} ({expr})")
+        con.execute(f"CREATE INDEX {_q('ix_' + tabla + '_snapshot')} ON {_q(tabla)} "
+                    f"({', '.join(_q(c) for c in META_COLS if c in cols)})")
+        return
+    for c in columnas:
+        if c not in existentes:
+            con.execute(f"ALTER TABLE {_q(tabla)} ADD COLUMN {_q(c)}")
+
+
+def _valores(df: pd.DataFrame) -> tuple:
+    """Filas como tuplas de tipos nativos de Python; fechas como texto ISO (y cuáles eran)."""
+    fechas = []
+    cols = {}
+    for c in df.columns:
+        s = df[c]
+        if pd.api.types.is_datetime64_any_dtype(s):
+            fechas.append(c)
+            s = s.astype("string")
+        s = s.astype(object).where(s.notna(), None)
+        # Lo que sqlite3 no sabe guardar (Timestamp suelto, Decimal, ...) va como texto
+        cols[c] = [v if v is None or isinstance(v, (int, float, str, bytes)) else str(v) for v in s]
+    return list(zip(*cols.values())) if cols else [], fechas
+
+
+def upsert(con: sqlite3.Connection, tabla: str, df: pd.DataFrame, key_cols: list) -> int:
+    """INSERT OR REPLACE de df en tabla (la transacción la maneja quien llama)."""
+    if df.empty:
+        return 0
+    _asegurar_tabla(con, tabla, list(df.columns), key_cols)
+    filas, fechas = _valores(df)
+    con.executemany(f"INSERT OR IGNORE INTO {TYPES_TABLE} VALUES (?, ?, 'datetime')",
+                    [(tabla, c) for c in fechas])
+    cols = ", ".join(_q(c) for c in df.columns)
+    marcas = ", ".join("?" for _ in df.columns)
+    con.executemany(f"INSERT OR REPLACE INTO {_q(tabla)} ({cols}) VALUES ({marcas})", filas)
+    return len(filas)
+
+
+def upsert_historico(lotes: list, key_cols: list, db_path: Path = DB_PATH) -> dict:
+    """Únicos de uno o varios reportes (res["historico"]) en una sola transacción.
+
+    key_cols: clave de dedupe sin snapshot_date/source_file (se agregan siempre).
+    """
+    con = conectar(db_path)
+    try:
+        counts = {}
+        with con:
+            for res in lotes:
+                for sh, df_new in res["historico"].items():
+                    counts[sh] = counts.get(sh, 0) + upsert(con, sh, df_new, list(key_cols) + META_COLS)
+        return counts
+    finally:
+        con.close()
+
+
+def upsert_resumen(rows: pd.DataFrame, db_path: Path = DB_PATH) -> int:
+    con = conectar(db_path)
+    try:
+        with con:
+            return upsert(con, RESUMEN_TABLE, rows, KEY_RESUMEN)
+    finally:
+        con.close()
+
+
+def read_table(tabla: str, db_path: Path = DB_PATH, columns=None, excluir: set = None,
+               con: sqlite3.Connection = None) -> pd.DataFrame:
+    """Tabla en orden de inserción; opcionalmente solo ciertas columnas y sin los pares
+    (snapshot_date, source_file) de `excluir` (el filtro se hace en SQLite)."""
+    propia = con is None
+    con = con or conectar(db_path)
+    try:
+        existentes = _columnas(con, tabla)
+        if not existentes:
+            return pd.DataFrame(columns=columns or [])
+        cols = existentes if columns is None else [c for c in columns if c in existentes]
+        sql = f"SELECT {', '.join(_q(c) for c in cols)} FROM {_q(tabla)} AS t"
+        if excluir:
+            con.execute("CREATE TEMP TABLE IF NOT EXISTS _excluir (snapshot_date, source_file)")
+            con.execute("DELETE FROM _excluir")
+            con.executemany("INSERT INTO _excluir VALUES (?, ?)", [tuple(map(str, p)) for p in excluir])
+            sql += (" WHERE NOT EXISTS (SELECT 1 FROM _excluir AS e WHERE "
+                    "e.snapshot_date = CAST(t.snapshot_date AS TEXT) AND e.source_file = CAST(t.source_file AS TEXT))")
+        df = pd.read_sql_query(sql + " ORDER BY t.rowid", con)
+        fechas = {r[0] for r in con.execute(f"SELECT columna FROM {TYPES_TABLE} WHERE tabla = ?", (tabla,))}
+        for c in df.columns:
+            if c in fechas:
+                df[c] = pd.to_datetime(df[c], errors="coerce")
+        return df
+    finally:
+        if propia:
+            con.close()
+
+
+def muestra_tabla(tabla: str, n: int, columns=None, db_path: Path = DB_PATH) -> tuple:
+    """(primeras n filas, filas totales) de una tabla, para estimar memoria sin leerla entera."""
+    con = conectar(db_path)
+    try:
+        existentes = _columnas(con, tabla)
+        if not existentes:
+            return pd.DataFrame(columns=columns or []), 0
+        cols = existentes if columns is None else [c for c in columns if c in existentes]
+        total = con.execute(f"SELECT COUNT(*) FROM {_q(tabla)}").fetchone()[0]
+        df = pd.read_sql_query(f"SELECT {', '.join(_q(c) for c in cols)} FROM {_q(tabla)} "
+                               f"ORDER BY rowid LIMIT ?", con, params=(int(n),))
+        return df, total
+    finally:
+        con.close()
+
+
+def read_all(db_path: Path = DB_PATH) -> dict:
+    con = conectar(db_path)
+    try:
+        return {sh: read_table(sh, con=con) for sh in SHEETS}
+    finally:
+        con.close()
+
+
+def export_excel(path: Path = HISTORY_XLSX, db_path: Path = DB_PATH) -> Path:
+    """Construye HISTORICO_UNIQUE.xlsx (mismas hojas DATA_*) a partir de la base (crudo, sin el diario de correcciones)."""
+    sheets = read_all(db_path)
+    with pd.ExcelWriter(path, engine="openpyxl") as w:
+        for sh, df_sh in sheets.items():
+            df_sh.to_excel(w, sheet_name=sh, index=False)
+    return path
+
+
+def export_resumen(path_xlsx: Path = RESUMEN_XLSX, path_csv: Path = RESUMEN_CSV, db_path: Path = DB_PATH):
+    """HIST_RESUMEN_DIARIO.xlsx (hoja DATA) + .csv desde la base (tabla chica: una fila por reporte)."""
+    df = read_table(RESUMEN_TABLE, db_path)
+    with pd.ExcelWriter(path_xlsx, engine="openpyxl") as w:
+        df.to_excel(w, sheet_name="DATA", index=False)
+    df.to_csv(path_csv, index=False, encoding="utf-8-sig")
+
+
+def import_excel(path: Path = HISTORY_XLSX, resumen_path: Path = RESUMEN_XLSX, db_path: Path = DB_PATH) -> dict:
+    """Migra HISTORICO_UNIQUE.xlsx (y HIST_RESUMEN_DIARIO.xlsx si existe) a la base."""
+    counts = {}
+    con = conectar(db_path)
+    try:
+        with con:
+            if path.exists():
+                for sh, df in lector_excel.leer_hojas(path, SHEETS).items():
+                    counts[sh] = upsert(con, sh, df, KEY_DATA)
+            if resumen_path.exists():
+                for _, df in lector_excel.leer_hojas(resumen_path, ["DATA"]).items():
+                    counts[RESUMEN_TABLE] = upsert(con, RESUMEN_TABLE, df, KEY_RESUMEN)
+    finally:
+        con.close()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Histórico único y resumen diario en SQLite (upserts por clave).")
+    parser.add_argument("--export-xlsx", action="store_true",
+                        help=f"Genera {HISTORY_XLSX.name}, {RESUMEN_XLSX.name} y {RESUMEN_CSV.name} desde la base "
+                             f"({HISTORY_XLSX.name} crudo: sin el diario de correcciones, que se aplica al leerlo).")
+    parser.add_argument("--import-xlsx", action="store_true",
+                        help=f"Migra {HISTORY_XLSX.name} y {RESUMEN_XLSX.name} existentes a {DB_PATH.name}.")
+    args = parser.parse_args()
+
+    if args.import_xlsx:
+        if not HISTORY_XLSX.exists():
+            print(f"[ERROR] No existe {HISTORY_XLSX}")
+            return
+        counts = import_excel()
+        print(f"✅ Histórico migrado a {DB_PATH.name}:")
+        for t, n in counts.items():
+            print(f"   - {t}: {n} filas")
+    if args.export_xlsx:
+        out = export_excel()
+        export_resumen()
+        print(f"✅ Exportado: {out} (crudo, sin el diario de correcciones)")
+        print(f"✅ Exportado: {RESUMEN_XLSX}")
+    if not (args.import_xlsx or args.export_xlsx):
+        if not DB_PATH.exists():
+            print(f"[Aviso] No existe {DB_PATH}")
+            return
+        con = conectar()
+        try:
+            for t in SHEETS + [RESUMEN_TABLE]:
+                n = con.execute(f"SELECT COUNT(*) FROM {_q(t)}").fetchone()[0] if _columnas(con, t) else 0
+                print(f"{t}: {n} filas")
+        finally:
+            con.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+import pandas as pd
+from pathlib import Path
+import argparse
+import os
+import re
+
+import lector_excel
+
+# =========================
+# Almacén columnar del histórico (Parquet particionado por snapshot_date)
+# =========================
+# Estructura en disco:
+#   output/history/store/<HOJA>/<snapshot_date>/<source_file>.parquet
+# Cada corrida diaria solo escribe su propia partición, así el costo no crece
+# con el tamaño del histórico. HISTORICO_UNIQUE.xlsx pasa a ser una exportación.
+BASE_DIR = Path(__file__).resolve().parent
+HISTORY_DIR = BASE_DIR / "output" / "history"
+STORE_DIR = HISTORY_DIR / "store"
+HISTORY_XLSX = HISTORY_DIR / "HISTORICO_UNIQUE.xlsx"
+
+SHEETS = ["DATA_SI", "DATA_NO", "DATA_INVALIDOS", "DATA_SIN_RESPUESTA"]
+META_COLS = ["snapshot_date", "source_file"]
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        print("[ERROR] El backend 'parquet' requiere pyarrow: pip install pyarrow")
+        raise
+
+
+def _safe_name(s: str) -> str:
+    # Nombre de archivo seguro a partir de source_file (sin extensión)
+    return re.sub(r"[^\w.\-]+", "_", Path(str(s)).stem) or "sin_nombre"
+
+
+def partition_path(sheet: str, snapshot_date: str, source_file: str, store_dir: Path = STORE_DIR) -> Path:
+    return store_dir / sheet / str(snapshot_date) / f"{_safe_name(source_file)}.parquet"
+
+
+def _to_parquet_safe(df: pd.DataFrame) -> pd.DataFrame:
+    """Columnas object con tipos mezclados (Excel) se guardan como string."""
+    df = df.copy()
+    for c in df.columns:
+        if df[c].dtype == object:
+            df[c] = df[c].astype("string")
+    return df
+
+
+def _write_atomic(df: pd.DataFrame, path: Path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".parquet.tmp")
+    _to_parquet_safe(df).to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def append_and_dedupe(df_old: pd.DataFrame, df_new: pd.DataFrame, key_cols: list) -> pd.DataFrame:
+    # Alinear columnas entre viejo y nuevo
+    for c in df_new.columns:
+        if c not in df_old.columns:
+            df_old[c] = pd.NA
+    for c in df_old.columns:
+        if c not in df_new.columns:
+            df_new[c] = pd.NA
+    combined = pd.concat([df_old, df_new], ignore_index=True)
+    combined.drop_duplicates(subset=key_cols + META_COLS, keep="last", inplace=True)
+    return combined
+
+
+def write_partition(sheet: str, df_new: pd.DataFrame, snapshot_date: str, source_file: str,
+                    key_cols: list, store_dir: Path = STORE_DIR) -> Path:
+    """Escribe (o actualiza) solo la partición (snapshot_date, source_file) de una hoja.
+
+    Si el mismo reporte se reprocesa, se fusiona contra su propia partición con
+    la misma regla de append + dedupe del histórico en Excel.
+    """
+    _require_pyarrow()
+    path = partition_path(sheet, snapshot_date, source_file, store_dir)
+    df_new = df_new.copy()
+    df_new["snapshot_date"] = snapshot_date
+    df_new["source_file"] = source_file
+    if path.exists():
+        df_old = pd.read_parquet(path)
+        df_new = append_and_dedupe(df_old, df_new, key_cols)
+    else:
+        df_new = df_new.drop_duplicates(subset=key_cols + META_COLS, keep="last")
+    _write_atomic(df_new, path)
+    return path
+
+
+def list_partitions(sheet: str, store_dir: Path = STORE_DIR) -> list:
+    """Lista de archivos de la hoja, en orden determinista (snapshot_date, archivo)."""
+    base = store_dir / sheet
+    if not base.exists():
+        return []
+    return sorted(base.glob("*/*.parquet"), key=lambda p: (p.parent.name, p.name))
+
+
+def read_partition(path: Path, columns=None) -> pd.DataFrame:
+    """Lee una partición; con columns solo decodifica esas (las que no existan no vienen)."""
+    if columns is not None:
+        import pyarrow.parquet as pq
+        existentes = set(pq.read_schema(path).names)
+        columns = [c for c in columns if c in existentes]
+    return pd.read_parquet(path, columns=columns)
+
+
+def read_sheet(sheet: str, store_dir: Path = STORE_DIR, snapshot_dates=None, columns=None) -> pd.DataFrame:
+    """Lee una hoja del almacén; opcionalmente solo ciertas fechas y columnas."""
+    _require_pyarrow()
+    parts = list_partitions(sheet, store_dir)
+    if snapshot_dates is not None:
+        wanted = {str(d) for d in snapshot_dates}
+        parts = [p for p in parts if p.parent.name in wanted]
+    frames = [read_partition(p, columns) for p in parts]
+    if not frames:
+        return pd.DataFrame(columns=columns or [])
+    return pd.concat(frames, ignore_index=True)
+
+
+def read_all(store_dir: Path = STORE_DIR) -> dict:
+    return {sh: read_sheet(sh, store_dir) for sh in SHEETS}
+
+
+def store_exists(store_dir: Path = STORE_DIR) -> bool:
+    return any(list_partitions(sh, store_dir) for sh in SHEETS)
+
+
+def export_excel(path: Path = HISTORY_XLSX, store_dir: Path = STORE_DIR) -> Path:
+    """Construye HISTORICO_UNIQUE.xlsx (mismas hojas DATA_*) a partir del almacén.
+
+    Es crudo, como el almacén: no aplica el diario de correcciones (lo aplica quien
+    lee el histórico; aplicarlo aquí lo duplicaría al volver a leer o importar el libro).
+    """
+    sheets = read_all(store_dir)
+    with pd.ExcelWriter(path, engine="openpyxl") as w:
+        for sh, df_sh in sheets.items():
+            df_sh.to_excel(w, sheet_name=sh, index=False)
+    return path
+
+
+def import_excel(path: Path = HISTORY_XLSX, store_dir: Path = STORE_DIR) -> dict:
+    """Migra un HISTORICO_UNIQUE.xlsx existente al almacén (una partición por día/archivo)."""
+    _require_pyarrow()
+    counts = {}
+    for sh, df in lector_excel.leer_hojas(path, SHEETS).items():
+        for c in META_COLS:
+            if c not in df.columns:
+                df[c] = pd.NA
+        df["snapshot_date"] = df["snapshot_date"].astype(str)
+        df["source_file"] = df["source_file"].astype(str)
+        n = 0
+        for (snap, src), part in df.groupby(META_COLS, sort=True):
+            _write_atomic(part, partition_path(sh, snap, src, store_dir))
+            n += len(part)
+        counts[sh] = n
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Almacén Parquet del histórico único (DATA_SI/NO/INVALIDOS/SIN_RESPUESTA).")
+    parser.add_argument("--export-xlsx", action="store_true",
+                        help=f"Genera {HISTORY_XLSX.name} a partir del almacén (crudo: sin el diario de correcciones, "
+                             f"que se aplica al leerlo).")
+    parser.add_argument("--import-xlsx", action="store_true",
+                        help=f"Migra {HISTORY_XLSX.name} existente al almacén Parquet.")
+    args = parser.parse_args()
+
+    if args.import_xlsx:
+        if not HISTORY_XLSX.exists():
+            print(f"[ERROR] No existe {HISTORY_XLSX}")
+            return
+        counts = import_excel()
+        print("✅ Histórico migrado a Parquet:")
+        for sh, n in counts.items():
+            print(f"   - {sh}: {n} filas")
+    if args.export_xlsx:
+        out = export_excel()
+        print(f"✅ Exportado: {out} (crudo, sin el diario de correcciones)")
+    if not (args.import_xlsx or args.export_xlsx):
+        for sh in SHEETS:
+            parts = list_partitions(sh)
+            print(f"{sh}: {len(parts)} particiones")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import heapq
+import tempfile
+
+# =========================
+# Ingesta por bloques (memoria acotada)
+# =========================
+# Lee el reporte con el iterador read-only de openpyxl en bloques de filas.
+# Las filas de cada categoría se vuelcan a disco (Parquet, ordenadas por bloque)
+# y al final se mezclan en orden (k-way merge) hacia la capa de salida, así
+# en memoria solo quedan los únicos por clave, los contadores y un bloque.
+
+DEFAULT_MEMORY_BUDGET_MB = 512
+MIN_CHUNK_ROWS = 1_000
+SAMPLE_ROWS = 2_000
+# Cuántas veces el tamaño de un bloque se tiene vivo a la vez (bloque + subconjuntos + estado)
+WORKING_SET_FACTOR = 6
+
+
+def _clean_records(header, rows) -> pd.DataFrame:
+    df = pd.DataFrame.from_records(rows, columns=header)
+    # Celdas vacías como NaN (igual que pd.read_excel), no como None
+    return df.fillna(np.nan)
+
+
+def _read_header(ws_rows):
+    header = next(ws_rows, None)
+    if header is None:
+        return []
+    return [("Unnamed: %d" % i) if h is None else str(h) for i, h in enumerate(header)]
+
+
+def iter_chunks(path: Path, chunk_rows: int):
+    """Genera DataFrames de a `chunk_rows` filas de la primera hoja del libro."""
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[0]
+        rows = ws.iter_rows(values_only=True)
+        header = _read_header(rows)
+        buf = []
+        for r in rows:
+            if r is None or all(v is None for v in r):
+                continue
+            buf.append(r[:len(header)])
+            if len(buf) >= chunk_rows:
+                yield _clean_records(header, buf)
+                buf = []
+        if buf or not header:
+            yield _clean_records(header, buf)
+    finally:
+        wb.close()
+
+
+def chunk_rows_for_budget(path: Path, memory_budget_mb: float) -> int:
+    """Estima cuántas filas caben por bloque según el presupuesto de memoria."""
+    sample = next(iter_chunks(path, SAMPLE_ROWS), pd.DataFrame())
+    if sample.empty:
+        return MIN_CHUNK_ROWS
+    bytes_per_row = sample.memory_usage(deep=True, index=False).sum() / len(sample)
+    rows = int(memory_budget_mb * 1024 * 1024 / (bytes_per_row * WORKING_SET_FACTOR))
+    return max(MIN_CHUNK_ROWS, rows)
+
+
+# =========================
+# Volcado ordenado a disco + mezcla
+# =========================
+def _to_arrow_safe(df: pd.DataFrame) -> pd.DataFrame:
+    """Columnas object con tipos mezclados se pasan a texto para poder ir a Parquet."""
+    import pyarrow as pa
+
+    df = df.copy()
+    for c in df.columns:
+        if df[c].dtype == object:
+            try:
+                pa.array(df[c], from_pandas=True)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                df[c] = df[c].astype("string")
+    return df
+
+
+def sort_key(fecha, phone):
+    # Mismo orden que sort_values([fecha, phone], na_position="last")
+    f = (1, pd.Timestamp.min) if fecha is None or pd.isna(fecha) else (0, pd.Timestamp(fecha))
+    p = (1, "") if phone is None or pd.isna(phone) else (0, str(phone))
+    return f + p
+
+
+class SortedSpool:
+    """Partes Parquet de una categoría, cada una ordenada por (fecha, teléfono)."""
+
+    def __init__(self, tmp_dir: Path, name: str, fecha_col: str, phone_col: str):
+        self.dir = Path(tmp_dir) / name
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.fecha_col = fecha_col
+        self.phone_col = phone_col
+        self.parts = []
+        self.rows = 0
+
+    def add(self, df: pd.DataFrame):
+        if df.empty:
+            return
+        df = df.sort_values(by=[self.fecha_col, self.phone_col])
+        p = self.dir / f"part-{len(self.parts):05d}.parquet"
+        _to_arrow_safe(df).to_parquet(p, index=False)
+        self.parts.append(p)
+        self.rows += len(df)
+
+    def iter_frames(self, batch_rows: int = 50_000):
+        """Recorre las partes en orden de llegada (útil para reducir únicos)."""
+        import pyarrow.parquet as pq
+
+        for p in self.parts:
+            for batch in pq.ParquetFile(p).iter_batches(batch_size=batch_rows):
+                yield batch.to_pandas()
+
+    def iter_sorted(self, columns: list, batch_rows: int = 2_000):
+        """Filas (tuplas de `columns`) en orden global por (fecha, teléfono), estable."""
+        import pyarrow.parquet as pq
+
+        def part_rows(p):
+            for batch in pq.ParquetFile(p).iter_batches(batch_size=batch_rows):
+                df = batch.to_pandas()
+                for c in columns:
+                    if c not in df.columns:
+                        df[c] = pd.NA
+                fi = columns.index(self.fecha_col)
+                pi = columns.index(self.phone_col)
+                for row in df[columns].itertuples(index=False, name=None):
+                    yield sort_key(row[fi], row[pi]), row
+
+        # heapq.merge es estable entre iterables: a igual clave gana la parte más antigua
+        for _, row in heapq.merge(*(part_rows(p) for p in self.parts), key=lambda kr: kr[0]):
+            yield row
+
+
+def new_tmp_dir(base: Path = None) -> tempfile.TemporaryDirectory:
+    return tempfile.TemporaryDirectory(prefix="vox_stream_", dir=base)
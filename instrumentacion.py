@@ -0,0 +1,190 @@
+from pathlib import Path
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+import json
+import os
+import sys
+import time
+
+# =========================
+# Instrumentación por etapa
+# =========================
+# Cada script mide sus etapas (lectura, clasificación, únicos, histórico,
+# escritura, ...) con tiempo real, CPU, pico de memoria (RSS) y filas de
+# entrada/salida. Al terminar se agrega una línea JSON por ejecución a
+# logs/ejecuciones.jsonl y, si se pide, se deja un archivo .prom para el
+# textfile collector de node-exporter (uno por script, se sobrescribe).
+BASE_DIR = Path(__file__).resolve().parent
+LOGS_DIR = BASE_DIR / "logs"
+RUNS_FILE = LOGS_DIR / "ejecuciones.jsonl"
+PROM_ENV = "VOX_PROM_TEXTFILE_DIR"  # carpeta del textfile collector (opcional)
+
+
+def rss_pico_mb() -> float:
+    """Pico de memoria residente del proceso (y sus hijos ya terminados), en MB."""
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+            info = psutil.Process().memory_info()
+            return getattr(info, "peak_wset", info.rss) / 1024 / 1024
+        except ImportError:
+            return float("nan")
+    propio = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    hijos = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    # Linux reporta KB; macOS reporta bytes
+    div = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return max(propio, hijos) / div
+
+
+def cpu_s() -> float:
+    # Incluye procesos hijos ya terminados (p. ej. el pool de --batch)
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+class Etapas:
+    """Lista de etapas medidas. Se puede llenar en un worker y devolver en el resultado."""
+
+    def __init__(self):
+        self.etapas = []
+
+    @contextmanager
+    def etapa(self, nombre: str, filas_in: int = None):
+        """Mide el bloque; dentro se puede asignar e["filas_in"] / e["filas_out"]."""
+        e = {"etapa": nombre, "filas_in": filas_in, "filas_out": None}
+        t0, c0 = time.perf_counter(), cpu_s()
+        try:
+            yield e
+        finally:
+            e["wall_s"] = round(time.perf_counter() - t0, 4)
+            e["cpu_s"] = round(cpu_s() - c0, 4)
+            e["rss_pico_mb"] = round(rss_pico_mb(), 1)
+            self.etapas.append(e)
+
+    def agregar(self, etapas: list, prefijo: str = ""):
+        for e in etapas or []:
+            self.etapas.append({**e, "etapa": prefijo + e["etapa"]})
+
+
+def etapa(etapas: Etapas, nombre: str, filas_in: int = None):
+    """Etapa de `etapas`, o un contexto vacío si no se está midiendo."""
+    if etapas is None:
+        return nullcontext({})
+    return etapas.etapa(nombre, filas_in)
+
+
+class Corrida(Etapas):
+    """Una ejecución de un script. Como context manager registra al salir (también si falla)."""
+
+    def __init__(self, script: str, prom_dir: Path = None, log_path: Path = None):
+        super().__init__()
+        self.script = script
+        self.prom_dir = prom_dir or os.environ.get(PROM_ENV) or None
+        self.log_path = log_path or RUNS_FILE
+        self.extra = {}
+        self.inicio = datetime.now()
+        self._t0, self._c0 = time.perf_counter(), cpu_s()
+
+    def registro(self, ok: bool = True, error: str = None) -> dict:
+        rec = {
+            "script": self.script,
+            "inicio": self.inicio.strftime("%Y-%m-%d %H:%M:%S"),
+            "fin": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "ok": ok,
+            "wall_s": round(time.perf_counter() - self._t0, 4),
+            "cpu_s": round(cpu_s() - self._c0, 4),
+            "rss_pico_mb": round(rss_pico_mb(), 1),
+            "pid": os.getpid(),
+            **self.extra,
+            "etapas": self.etapas,
+        }
+        if error:
+            rec["error"] = error
+        return rec
+
+    def cerrar(self, ok: bool = True, error: str = None) -> dict:
+        rec = self.registro(ok, error)
+        try:
+            Path(self.log_path).parent.mkdir(parents=True, exist_ok=True)
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(rec, ensure_ascii=False, default=str) + "\n")
+        except OSError as e:
+            print(f"[Aviso] No se pudo escribir el registro de ejecución: {e}")
+        if self.prom_dir:
+            try:
+                escribir_prometheus(rec, Path(self.prom_dir))
+            except OSError as e:
+                print(f"[Aviso] No se pudo escribir el archivo Prometheus: {e}")
+        return rec
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.cerrar()
+        elif exc_type is SystemExit and exc.code in (None, 0):
+            self.cerrar()
+        else:
+            error = f"exit {exc.code}" if exc_type is SystemExit else f"{exc_type.__name__}: {exc}"
+            self.cerrar(ok=False, error=error)
+        return False
+
+
+# =========================
+# Prometheus (textfile collector)
+# =========================
+def _label(v) -> str:
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _metric(lines: list, name: str, help_: str, samples: list):
+    lines.append(f"# HELP {name} {help_}")
+    lines.append(f"# TYPE {name} gauge")
+    for labels, value in samples:
+        lab = ",".join(f'{k}="{_label(v)}"' for k, v in labels.items())
+        lines.append(f"{name}{{{lab}}} {value}")
+
+
+def escribir_prometheus(rec: dict, prom_dir: Path) -> Path:
+    """Escribe <prom_dir>/voxinplant_<script>.prom con la última ejecución (reemplazo atómico)."""
+    prom_dir.mkdir(parents=True, exist_ok=True)
+    s = {"script": rec["script"]}
+
+    # Etapas repetidas (p. ej. "<archivo>/lectura" en --batch) se suman bajo un solo nombre
+    por_etapa = {}
+    for e in rec["etapas"]:
+        nombre = e["etapa"].rsplit("/", 1)[-1]
+        acc = por_etapa.setdefault(nombre, {"wall_s": 0.0, "cpu_s": 0.0, "filas_in": None, "filas_out": None})
+        acc["wall_s"] += e["wall_s"]
+        acc["cpu_s"] += e["cpu_s"]
+        for k in ("filas_in", "filas_out"):
+            if e.get(k) is not None:
+                acc[k] = (acc[k] or 0) + e[k]
+
+    lines = []
+    _metric(lines, "voxinplant_run_duration_seconds", "Duración total de la última ejecución.",
+            [(s, rec["wall_s"])])
+    _metric(lines, "voxinplant_run_cpu_seconds", "CPU total de la última ejecución.", [(s, rec["cpu_s"])])
+    _metric(lines, "voxinplant_run_peak_rss_bytes", "Pico de memoria residente de la última ejecución.",
+            [(s, int(rec["rss_pico_mb"] * 1024 * 1024))])
+    _metric(lines, "voxinplant_run_success", "1 si la última ejecución terminó bien.", [(s, int(rec["ok"]))])
+    _metric(lines, "voxinplant_run_timestamp_seconds", "Fin de la última ejecución (epoch).",
+            [(s, int(time.time()))])
+    _metric(lines, "voxinplant_stage_duration_seconds", "Duración por etapa.",
+            [({**s, "stage": k}, round(v["wall_s"], 4)) for k, v in por_etapa.items()])
+    _metric(lines, "voxinplant_stage_cpu_seconds", "CPU por etapa.",
+            [({**s, "stage": k}, round(v["cpu_s"], 4)) for k, v in por_etapa.items()])
+    _metric(lines, "voxinplant_stage_rows_in", "Filas de entrada por etapa.",
+            [({**s, "stage": k}, v["filas_in"]) for k, v in por_etapa.items() if v["filas_in"] is not None])
+    _metric(lines, "voxinplant_stage_rows_out", "Filas de salida por etapa.",
+            [({**s, "stage": k}, v["filas_out"]) for k, v in por_etapa.items() if v["filas_out"] is not None])
+
+    path = prom_dir / f"voxinplant_{rec['script']}.prom"
+    # El collector solo lee *.prom: el temporal no se ve a medio escribir
+    tmp = prom_dir / f".{path.name}.{os.getpid()}.tmp"
+    tmp.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    os.replace(tmp, path)
+    return path
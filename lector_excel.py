@@ -0,0 +1,78 @@
+import pandas as pd
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+# =========================
+# Lectura de libros con varias hojas
+# =========================
+# Abre cada libro una sola vez y parsea las hojas pedidas; si el libro es grande
+# y hay más de un núcleo, cada hoja va a un proceso (que reabre el archivo por
+# su ruta: no se copia el libro a cada proceso).
+# columnas: solo esas columnas (por nombre, sin importar espacios extra en el
+# encabezado); las que no existan simplemente no vienen, igual que df.get().
+# Motor: openpyxl por defecto. calamine (python-calamine, parser en Rust, varias
+# veces más rápido) es opcional: puede devolver otros tipos (fechas, enteros
+# como float), así que solo se usa si se pide con engine='calamine' o 'auto'
+# (calamine si está instalado), o con la variable de entorno VOX_EXCEL_ENGINE.
+PARALLEL_MIN_BYTES = 2 * 1024 * 1024  # por debajo, el arranque de procesos no compensa
+ENGINE_ENV = "VOX_EXCEL_ENGINE"
+DEFAULT_ENGINE = os.environ.get(ENGINE_ENV) or "openpyxl"
+
+
+class _Columnas:
+    """usecols como función (tolera columnas ausentes); picklable para los workers."""
+
+    def __init__(self, columnas):
+        self.columnas = {str(c).strip() for c in columnas}
+
+    def __call__(self, c) -> bool:
+        return str(c).strip() in self.columnas
+
+
+def _usecols(columnas, hoja: str):
+    if columnas is None:
+        return None
+    if isinstance(columnas, dict):
+        cols = columnas.get(hoja)
+        return None if cols is None else _Columnas(cols)
+    return _Columnas(columnas)
+
+
+def motor(engine: str = "auto") -> str:
+    if engine != "auto":
+        return engine
+    try:
+        import python_calamine  # noqa: F401
+        return "calamine"
+    except ImportError:
+        return "openpyxl"
+
+
+def _parse(path: Path, hoja: str, usecols, engine: str, kwargs: dict) -> pd.DataFrame:
+    return pd.read_excel(path, sheet_name=hoja, usecols=usecols, engine=engine, **kwargs)
+
+
+def leer_hojas(path: Path, hojas=None, columnas=None, workers: int = None,
+               engine: str = DEFAULT_ENGINE, **kwargs) -> dict:
+    """{hoja: DataFrame} de las hojas pedidas que existan (todas si hojas=None), en ese orden.
+
+    columnas: lista de nombres para todas las hojas, o {hoja: lista} (None = todas).
+    workers:  procesos para parsear (por defecto: núcleos disponibles).
+    engine:   'openpyxl' (por defecto), 'calamine' o 'auto' (calamine si está instalado).
+    kwargs:   se pasan a pd.read_excel (dtype, nrows, ...).
+    """
+    path = Path(path)
+    engine = motor(engine)
+    with pd.ExcelFile(path, engine=engine) as xf:
+        disponibles = xf.sheet_names
+        pedidas = disponibles if hojas is None else [h for h in hojas if h in disponibles]
+
+        workers = min(workers or os.cpu_count() or 1, len(pedidas))
+        if workers <= 1 or path.stat().st_size < PARALLEL_MIN_BYTES:
+            # Un solo proceso: el libro ya abierto se reutiliza para todas las hojas
+            return {h: xf.parse(h, usecols=_usecols(columnas, h), **kwargs) for h in pedidas}
+
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        futuros = {h: ex.submit(_parse, path, h, _usecols(columnas, h), engine, kwargs) for h in pedidas}
+        return {h: futuros[h].result() for h in pedidas}
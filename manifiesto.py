@@ -0,0 +1,119 @@
+import argparse
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+import cache_reportes
+
+# =========================
+# Manifiesto de reportes ingeridos
+# =========================
+# output/history/manifiesto_ingesta.json: un registro por reporte ya agregado
+# al histórico, con clave hash SHA-256 del contenido (el mismo archivo con otro
+# nombre también cuenta como repetido). Guarda archivo, snapshot_date, conteos
+# y dónde quedaron el consolidado y el original archivado.
+# El consolidador consulta el manifiesto antes de parsear nada: un reporte
+# repetido se archiva y se salta (--force para reprocesarlo). Solo se registra
+# después de actualizar el histórico, así un fallo a mitad de camino no deja
+# reportes marcados como procesados sin estarlo.
+BASE_DIR = Path(__file__).resolve().parent
+MANIFEST_PATH = BASE_DIR / "output" / "history" / "manifiesto_ingesta.json"
+
+CONTEOS = [
+    "total", "contestaron", "confirmados", "no_confirmados", "invalidos", "sin_respuesta",
+    "u_confirmados", "u_no_confirmados", "u_invalidos", "u_sin_respuesta",
+]
+
+
+def cargar(path: Path = MANIFEST_PATH) -> dict:
+    """{hash: registro}; vacío si no existe o no se puede leer."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError):
+        print(f"[Aviso] No se pudo leer {path}; se asume manifiesto vacío.")
+        return {}
+
+
+def guardar(registros: dict, path: Path = MANIFEST_PATH):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(registros, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+
+def planificar(paths: list, path: Path = MANIFEST_PATH, force: bool = False) -> tuple:
+    """Separa los reportes pendientes de los ya ingeridos (solo hashea, no parsea).
+
+    Devuelve (pendientes [(path, hash)], repetidos [(path, registro)]). Dos archivos
+    iguales en la misma lista: se procesa el primero y el otro queda como repetido.
+    """
+    registros = {} if force else cargar(path)
+    pendientes, repetidos, vistos = [], [], {}
+    for p in paths:
+        h = cache_reportes.hash_archivo(p)
+        if h in registros:
+            repetidos.append((p, registros[h]))
+        elif h in vistos:
+            repetidos.append((p, {"source_file": vistos[h].name, "procesado": "en esta misma corrida"}))
+        else:
+            vistos[h] = p
+            pendientes.append((p, h))
+    return pendientes, repetidos
+
+
+def registro(res: dict, **extra) -> dict:
+    """Registro del manifiesto a partir del resultado de procesar_reporte (con res['hash'])."""
+    reg = {
+        "source_file": res["source_file"],
+        "snapshot_date": res["snapshot_date"],
+        "unique_scope": res["unique_scope"],
+        **{c: int(res[c]) for c in CONTEOS if c in res},
+        "consolidado": str(res["output_path"]),
+        "archivo": str(res.get("archivo") or ""),
+        "procesado": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    reg.update(extra)
+    return reg
+
+
+def registrar(lotes: list, path: Path = MANIFEST_PATH, **extra) -> int:
+    """Agrega (o reemplaza, con --force) los reportes de `lotes` que traen hash."""
+    nuevos = {res["hash"]: registro(res, **extra) for res in lotes if res.get("hash")}
+    if not nuevos:
+        return 0
+    registros = cargar(path)
+    registros.update(nuevos)
+    guardar(registros, path)
+    return len(nuevos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lista los reportes ya ingeridos (manifiesto por hash de contenido).")
+    parser.add_argument("--olvidar", nargs="+", metavar="ARCHIVO", default=None,
+                        help="Quita del manifiesto los registros de esos archivos (por nombre), para volver a ingerirlos.")
+    args = parser.parse_args()
+
+    registros = cargar()
+    if args.olvidar:
+        nombres = set(args.olvidar)
+        quitar = [h for h, r in registros.items() if r.get("source_file") in nombres]
+        for h in quitar:
+            del registros[h]
+        guardar(registros)
+        print(f"✅ {len(quitar)} registro(s) quitados de {MANIFEST_PATH.name}")
+        return
+    if not registros:
+        print(f"[Aviso] Manifiesto vacío o inexistente: {MANIFEST_PATH}")
+        return
+    for h, r in sorted(registros.items(), key=lambda kv: (kv[1].get("snapshot_date", ""), kv[1].get("source_file", ""))):
+        print(f"{r.get('snapshot_date', '')}  {r.get('source_file', '')}  {r.get('total', '')} filas  "
+              f"{h[:12]}  {r.get('procesado', '')}")
+
+
+if __name__ == "__main__":
+    main()
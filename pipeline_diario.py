@@ -0,0 +1,212 @@
+import pandas as pd
+from pathlib import Path
+import argparse
+import os
+import sys
+
+import auditar_hist
+import correcciones
+import corregir_swap_dia
+import detector_swap
+import esquema
+import estado_numeros
+import fusionar_historicos
+import instrumentacion
+import manifiesto
+import salidas
+import telefonos
+import voxinplant_consolidador as vc
+
+# =========================
+# Pipeline diario en un solo proceso
+# =========================
+# consolidar → (corrección de swap) → auditoría → fusión, pasando los DataFrames
+# en memoria de una etapa a la siguiente. Antes cada script volvía a leer
+# HISTORICO_UNIQUE.xlsx (y corregir_swap_dia además lo reescribía); aquí solo se
+# escriben los artefactos finales: consolidado del día, histórico (según backend),
+# resumen diario y base unificada.
+#
+# Las correcciones (diario de correcciones.py) no tocan el histórico: con
+# --corregir-swap solo se registran los swaps de corregir_swap_dia.OBJETIVOS, y
+# la auditoría y la fusión las aplican a las hojas en memoria.
+HISTORY_PATH = vc.OUTPUT_DIR / "history" / "HISTORICO_UNIQUE.xlsx"
+
+
+def consolidar(paths: list, hashes: dict, args, formatos: list, corrida) -> list:
+    """Consolidado de cada reporte (se escribe) + únicos del día en memoria."""
+    workers = max(1, min(args.workers, len(paths)))
+    with corrida.etapa("consolidacion") as e:
+        resultados = vc.procesar_lote(paths, args.unique_scope, workers, formatos=formatos,
+                                      usar_cache=not args.no_cache, swap_accion=args.swap_accion,
+                                      swap_umbral=args.swap_umbral, max_intentos=args.max_intentos)
+        e["filas_in"] = sum(r["total"] for r in resultados)
+        e["filas_out"] = sum(len(df) for r in resultados for df in r["historico"].values())
+    for res in resultados:
+        corrida.agregar(res.pop("etapas", []), prefijo=f"{res['source_file']}/")
+        res["hash"] = hashes.get(str(res["input_path"]))
+    return resultados
+
+
+def corregir(corrida) -> int:
+    with corrida.etapa("correccion") as e:
+        nuevas = sum(nueva for _, _, nueva in corregir_swap_dia.registrar())
+        e["filas_out"] = nuevas
+    print(f"🔁 Corrección de swap: {nuevas} entrada(s) nuevas en {correcciones.JOURNAL_PATH.name}")
+    return nuevas
+
+
+def actualizar_historico(lotes: list, args, corrida) -> dict:
+    """Agrega los únicos al histórico (según backend) y devuelve las hojas DATA_* completas."""
+    with corrida.etapa("archivo"):
+        for res in lotes:
+            res["archivo"] = vc.archivar_original(res["input_path"])
+
+    vc.registrar_cruces(lotes)
+    with corrida.etapa("estado_numeros", len(lotes)):
+        estado_numeros.registrar(lotes)
+    HISTORY_PATH.parent.mkdir(parents=True, exist_ok=True)
+    filas_nuevas = sum(len(df) for res in lotes for df in res["historico"].values())
+    with corrida.etapa("historico", filas_nuevas) as e:
+        if args.history_backend == "excel":
+            # Una lectura y una escritura del libro; las hojas unidas siguen en memoria
+            sheets = vc.unir_historico(vc.cargar_historico(lotes, "excel", HISTORY_PATH), lotes)
+            vc.escribir_historico_xlsx(sheets, HISTORY_PATH)
+        else:
+            vc.actualizar_historico(lotes, args.history_backend, HISTORY_PATH,
+                                    export_xlsx=args.export_history_xlsx)
+            sheets = vc.cargar_historico(lotes, args.history_backend, HISTORY_PATH)
+        e["filas_out"] = sum(len(df) for df in sheets.values())
+
+    with corrida.etapa("resumen_diario", len(lotes)):
+        vc.actualizar_resumen_diario(lotes, args.history_backend)
+    manifiesto.registrar(lotes, history_backend=args.history_backend)
+    return sheets
+
+
+def auditar(sheets: dict, corrida) -> pd.DataFrame:
+    hojas = {}
+    for sh, df in sheets.items():
+        cols = [c for c in auditar_hist.AUDIT_COLS if c in df.columns]
+        hojas[sh] = esquema.compactar(correcciones.aplicar(df[cols].copy(), sh), esquema.AUDITORIA)
+    etapas = instrumentacion.Etapas()
+    dia = auditar_hist.auditar_hojas(hojas, etapas)
+    corrida.agregar(etapas.etapas, prefijo="auditoria/")
+    return dia
+
+
+def fusionar(sheets: dict, args, corrida):
+    hojas = {sh: df[[c for c in fusionar_historicos.AUTO_READ_COLS if c in df.columns]]
+             for sh, df in sheets.items()}
+    etapas = instrumentacion.Etapas()
+    if args.fusion_incremental:
+        res = fusionar_historicos.run_incremental(args.export_xlsx, etapas, not args.no_cache, hojas)
+    else:
+        res = fusionar_historicos.run_full(etapas, not args.no_cache, hojas)
+    corrida.agregar(etapas.etapas, prefijo="fusion/")
+    return res
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipeline diario en un solo proceso: consolidar → corregir swap → "
+                                                 "auditar → fusionar, sin releer HISTORICO_UNIQUE.xlsx entre pasos.")
+    parser.add_argument("input", nargs="?", default=None,
+                        help="Reporte a procesar. Si se omite, se toma el más reciente de inbox/.")
+    parser.add_argument("--batch", action="store_true",
+                        help="Procesa todos los reportes candidatos de inbox/ (en paralelo).")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Procesos en paralelo para --batch (por defecto: núcleos disponibles).")
+    parser.add_argument("--unique-scope", choices=["template", "dialed"], default="template",
+                        help="Alcance de deduplicación de las hojas UNIQUE_* (ver voxinplant_consolidador.py).")
+    parser.add_argument("--history-backend", choices=["excel", "parquet", "sqlite"], default="excel",
+                        help="Dónde guardar el histórico único (ver voxinplant_consolidador.py).")
+    parser.add_argument("--export-history-xlsx", action="store_true",
+                        help="Con --history-backend parquet o sqlite, regenera también HISTORICO_UNIQUE.xlsx "
+                             "(crudo: sin el diario de correcciones).")
+    parser.add_argument("--corregir-swap", action="store_true",
+                        help="Registra en el diario de correcciones el swap entidad/name de "
+                             "corregir_swap_dia.OBJETIVOS (la auditoría y la fusión lo aplican).")
+    parser.add_argument("--swap-accion", choices=detector_swap.ACCIONES, default="corregir",
+                        help="entidad/name cruzados en un reporte: corregir, cuarentena, avisar o no (ver voxinplant_consolidador.py).")
+    parser.add_argument("--swap-umbral", type=float, default=detector_swap.UMBRAL,
+                        help="Fracción de 'name' con valores de entidad a partir de la cual el reporte se considera cruzado.")
+    parser.add_argument("--max-intentos", type=int, default=estado_numeros.MAX_INTENTOS,
+                        help="Intentos en días anteriores a partir de los cuales un número sale de REDISCAR "
+                             "(por defecto 0 = sin tope; los intentos del reporte no cuentan).")
+    parser.add_argument("--sin-auditoria", action="store_true", help="Omite la auditoría.")
+    parser.add_argument("--sin-fusion", action="store_true", help="Omite la fusión con el histórico manual.")
+    parser.add_argument("--fusion-incremental", action="store_true",
+                        help="Fusión incremental (solo los snapshots aún no fusionados; ver fusionar_historicos.py).")
+    parser.add_argument("--export-xlsx", action="store_true",
+                        help="Con --fusion-incremental, regenera también BASE_HISTORICA_UNIFICADA.xlsx.")
+    parser.add_argument("--output-formats", default="xlsx",
+                        help="Formatos del consolidado separados por coma: xlsx, parquet, csv.")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="No usa las cachés de reportes parseados ni del manual normalizado.")
+    parser.add_argument("--force", action="store_true",
+                        help="Reprocesa aunque el reporte ya figure en el manifiesto de ingesta.")
+    parser.add_argument("--prometheus-dir", type=Path, default=None,
+                        help=f"Carpeta del textfile collector de node-exporter para dejar las métricas de la corrida "
+                             f"(por defecto: variable {instrumentacion.PROM_ENV}, si existe).")
+    args = parser.parse_args()
+    formatos = [f.strip().lower() for f in args.output_formats.split(",") if f.strip()]
+    invalidos = [f for f in formatos if f not in salidas.FORMATOS]
+    if invalidos or not formatos:
+        parser.error(f"--output-formats inválido: {args.output_formats} (opciones: {', '.join(salidas.FORMATOS)})")
+
+    with instrumentacion.Corrida("pipeline_diario", args.prometheus_dir) as corrida:
+        if args.batch:
+            paths = vc.list_inbox_candidates()
+        else:
+            p = Path(args.input).expanduser().resolve() if args.input else vc.find_latest_inbox_file()
+            paths = [p] if p else []
+            if p and not p.exists():
+                print(f"[ERROR] El archivo no existe: {p}")
+                sys.exit(2)
+        if not paths:
+            vc.print_no_files_message()
+            print(f"[ERROR] No se encontraron archivos .xlsx en {vc.INBOX_DIR}")
+            sys.exit(1)
+        paths, hashes = vc.omitir_repetidos(paths, args.force)
+        if not paths:
+            print("✅ Nada que procesar: los reportes ya estaban en el manifiesto de ingesta.")
+            return
+        corrida.extra.update(archivos=[p.name for p in paths], unique_scope=args.unique_scope,
+                             history_backend=args.history_backend, corregir_swap=args.corregir_swap)
+
+        print(f"1) Consolidando {len(paths)} reporte(s) (unique-scope={args.unique_scope}) ...")
+        lotes = consolidar(paths, hashes, args, formatos, corrida)
+        if not lotes:
+            sys.exit(3)
+
+        if args.corregir_swap:
+            print("2) Corrigiendo swap ...")
+            corregir(corrida)
+
+        print(f"3) Actualizando histórico ({args.history_backend}) ...")
+        sheets = actualizar_historico(lotes, args, corrida)
+
+        if not args.sin_auditoria:
+            print("4) Auditando histórico ...")
+            auditar(sheets, corrida)
+
+        if not args.sin_fusion:
+            print("5) Fusionando con el histórico manual ...")
+            df, added_rows, new_count = fusionar(sheets, args, corrida)
+            corrida.extra.update(fusion_added=int(added_rows), fusion_total=int(new_count))
+        telefonos.guardar_memo()
+
+        for res in lotes:
+            vc.imprimir_resumen(res)
+
+    print("\n✅ Pipeline diario terminado:")
+    for res in lotes:
+        print(f"  - {res['output_path']}")
+    if args.history_backend == "excel" or args.export_history_xlsx:
+        print(f"  - {HISTORY_PATH}")
+    if not args.sin_fusion:
+        print(f"  - {fusionar_historicos.OUT_CSV}")
+        print(f"📈 Registros nuevos en la base unificada: {added_rows} (total {new_count})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import csv
+import math
+import os
+
+# =========================
+# Capa de salida del consolidado
+# =========================
+# Un escritor por formato, todos con la misma interfaz por hoja:
+#   - xlsx:    libro en modo streaming (memoria constante). Usa xlsxwriter con
+#              constant_memory si está instalado; si no, openpyxl write-only.
+#   - parquet: un archivo por hoja (sidecar para BI).
+#   - csv:     un archivo por hoja (sidecar para BI).
+# EscritorConsolidado reparte cada hoja a los formatos pedidos recorriendo las
+# filas una sola vez, así también sirve para iteradores (modo --streaming).
+
+FORMATOS = ("xlsx", "parquet", "csv")
+DATETIME_FORMAT = "yyyy-mm-dd hh:mm:ss"
+PARQUET_BATCH_ROWS = 50_000
+
+
+def cell(v):
+    """Valor de celda sin tipos de numpy/pandas; nulos como None (celda vacía)."""
+    if v is None:
+        return None
+    if isinstance(v, float) and math.isnan(v):
+        return None
+    if v is pd.NaT or v is pd.NA:
+        return None
+    if isinstance(v, pd.Timestamp):
+        return v.to_pydatetime()
+    if isinstance(v, np.generic):
+        v = v.item()
+        if isinstance(v, float) and math.isnan(v):
+            return None
+    return v
+
+
+def _tmp_path(path: Path) -> Path:
+    return path.with_name(f".{path.name}.tmp")
+
+
+# =========================
+# Escritores por formato
+# =========================
+class _XlsxOpenpyxl:
+    def __init__(self, path: Path):
+        from openpyxl import Workbook
+
+        self.path = path
+        self.wb = Workbook(write_only=True)
+        self.ws = None
+
+    def open_sheet(self, name: str, columns: list):
+        self.ws = self.wb.create_sheet(title=name)
+        self.ws.append(list(columns))
+
+    def append(self, row: list):
+        self.ws.append(row)
+
+    def close_sheet(self):
+        self.ws = None
+
+    def close(self):
+        tmp = _tmp_path(self.path)
+        self.wb.save(tmp)
+        os.replace(tmp, self.path)
+        return [self.path]
+
+
+class _XlsxWriterEngine:
+    def __init__(self, path: Path):
+        import xlsxwriter
+
+        self.path = path
+        self.tmp = _tmp_path(path)
+        self.wb = xlsxwriter.Workbook(str(self.tmp), {
+            "constant_memory": True,
+            "default_date_format": DATETIME_FORMAT,
+            "strings_to_numbers": False,
+            "strings_to_formulas": False,
+            "strings_to_urls": False,
+        })
+        self.ws = None
+        self.row = 0
+
+    def open_sheet(self, name: str, columns: list):
+        self.ws = self.wb.add_worksheet(name)
+        self.ws.write_row(0, 0, [str(c) for c in columns])
+        self.row = 1
+
+    def append(self, row: list):
+        self.ws.write_row(self.row, 0, row)
+        self.row += 1
+
+    def close_sheet(self):
+        self.ws = None
+
+    def close(self):
+        self.wb.close()
+        os.replace(self.tmp, self.path)
+        return [self.path]
+
+
+def xlsx_engine(path: Path, engine: str = "auto"):
+    if engine in ("auto", "xlsxwriter"):
+        try:
+            return _XlsxWriterEngine(path)
+        except ImportError:
+            if engine == "xlsxwriter":
+                raise
+    return _XlsxOpenpyxl(path)
+
+
+class _CsvDir:
+    def __init__(self, out_dir: Path):
+        self.dir = out_dir
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.paths = []
+        self.f = None
+
+    def open_sheet(self, name: str, columns: list):
+        path = self.dir / f"{name}.csv"
+        self.paths.append(path)
+        self.f = open(path, "w", newline="", encoding="utf-8-sig")
+        self.w = csv.writer(self.f)
+        self.w.writerow(columns)
+
+    def append(self, row: list):
+        self.w.writerow(["" if v is None else v for v in row])
+
+    def close_sheet(self):
+        self.f.close()
+        self.f = None
+
+    def close(self):
+        return self.paths
+
+
+class _ParquetDir:
+    def __init__(self, out_dir: Path):
+        self.dir = out_dir
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.paths = []
+        self.writer = None
+
+    def open_sheet(self, name: str, columns: list):
+        self.path = self.dir / f"{name}.parquet"
+        self.paths.append(self.path)
+        self.columns = [str(c) for c in columns]
+        self.buf = []
+        self.writer = None
+        self.schema = None
+
+    def _flush(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        df = pd.DataFrame.from_records(self.buf, columns=self.columns)
+        self.buf = []
+        if self.schema is None:
+            table = pa.Table.from_pandas(_arrow_safe(df), preserve_index=False)
+            # Columnas sin ningún valor en el primer lote: se fijan como texto
+            fields = [pa.field(f.name, pa.string()) if pa.types.is_null(f.type) else f for f in table.schema]
+            self.schema = pa.schema(fields)
+            self.writer = pq.ParquetWriter(self.path, self.schema)
+        for f in self.schema:
+            if pa.types.is_string(f.type) or pa.types.is_large_string(f.type):
+                df[f.name] = df[f.name].astype("string")
+        table = pa.Table.from_pandas(df, schema=self.schema, preserve_index=False, safe=False)
+        self.writer.write_table(table)
+
+    def append(self, row: list):
+        self.buf.append(row)
+        if len(self.buf) >= PARQUET_BATCH_ROWS:
+            self._flush()
+
+    def close_sheet(self):
+        if self.buf or self.writer is None:
+            self._flush()
+        self.writer.close()
+        self.writer = None
+
+    def close(self):
+        return self.paths
+
+
+def _arrow_safe(df: pd.DataFrame) -> pd.DataFrame:
+    """Columnas object con tipos mezclados se pasan a texto para poder ir a Parquet."""
+    import pyarrow as pa
+
+    df = df.copy()
+    for c in df.columns:
+        if df[c].dtype == object:
+            try:
+                pa.array(df[c], from_pandas=True)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                df[c] = df[c].astype("string")
+    return df
+
+
+# =========================
+# Escritor combinado
+# =========================
+class EscritorConsolidado:
+    """Escribe las hojas del consolidado en uno o varios formatos a la vez.
+
+    xlsx_path: ruta final del libro (se escribe directo ahí, sin copias).
+    Los sidecars van en <carpeta del libro>/<nombre sin extensión>/<HOJA>.<fmt>.
+    """
+
+    def __init__(self, xlsx_path: Path, formatos=("xlsx",), xlsx_engine_name: str = "auto"):
+        formatos = [f for f in FORMATOS if f in set(formatos)]
+        if not formatos:
+            raise ValueError("Se requiere al menos un formato de salida")
+        self.xlsx_path = Path(xlsx_path)
+        self.sidecar_dir = self.xlsx_path.with_suffix("")
+        self.xlsx_path.parent.mkdir(parents=True, exist_ok=True)
+        self.writers = []
+        if "xlsx" in formatos:
+            self.writers.append(xlsx_engine(self.xlsx_path, xlsx_engine_name))
+        if "parquet" in formatos:
+            self.writers.append(_ParquetDir(self.sidecar_dir))
+        if "csv" in formatos:
+            self.writers.append(_CsvDir(self.sidecar_dir))
+        self.formatos = formatos
+
+    @property
+    def principal(self) -> Path:
+        return self.xlsx_path if "xlsx" in self.formatos else self.sidecar_dir
+
+    def write_rows(self, name: str, columns: list, rows):
+        for w in self.writers:
+            w.open_sheet(name, columns)
+        for r in rows:
+            vals = [cell(v) for v in r]
+            for w in self.writers:
+                w.append(vals)
+        for w in self.writers:
+            w.close_sheet()
+
+    def write_frame(self, name: str, df: pd.DataFrame):
+        self.write_rows(name, list(df.columns), df.itertuples(index=False, name=None))
+
+    def close(self) -> list:
+        paths = []
+        for w in self.writers:
+            paths += w.close()
+        return paths
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        return False
+
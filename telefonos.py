@@ -0,0 +1,169 @@
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import os
+import re
+
+# =========================
+# Normalización de teléfonos (compartida)
+# =========================
+# Los mismos números se repiten en muchos intentos y días: se factoriza la
+# columna, se normaliza solo cada valor distinto y se expande de vuelta.
+# Un memo persistente (Parquet en cache/telefonos) guarda texto crudo →
+# normalizado entre corridas, así un número ya visto no se vuelve a procesar.
+#
+# Modos (cada uno conserva la semántica que tenía su script):
+#   "reporte": quita ".0" final y espacios (voxinplant_consolidador).
+#   "fusion":  además deja solo dígitos y "+" (fusionar_historicos.norm_phone).
+# e164=True: números colombianos válidos (móvil 3XX o fijo 60X, 10 dígitos,
+# con o sin 57/0057 delante) quedan como +57XXXXXXXXXX; el resto no cambia.
+BASE_DIR = Path(__file__).resolve().parent
+MEMO_DIR = BASE_DIR / "cache" / "telefonos"
+MAX_MEMO_ROWS = 2_000_000
+MODOS = ("reporte", "fusion")
+CO_INDICATIVO = "57"
+
+
+def limpiar_reporte(s: pd.Series) -> pd.Series:
+    return s.astype(str).str.replace(r"\.0$", "", regex=True).str.strip()
+
+
+def limpiar_fusion(s: pd.Series) -> pd.Series:
+    return limpiar_reporte(s).str.replace(r"[^\d+]", "", regex=True)
+
+
+def e164_co(s: pd.Series) -> pd.Series:
+    """+57XXXXXXXXXX para los números colombianos reconocibles; los demás igual."""
+    d = s.str.replace(r"\D", "", regex=True)
+    d = d.where(~(d.str.len().eq(14) & d.str.startswith("00" + CO_INDICATIVO)), d.str[4:])
+    d = d.where(~(d.str.len().eq(12) & d.str.startswith(CO_INDICATIVO)), d.str[2:])
+    valido = d.str.len().eq(10) & (d.str.startswith("3") | d.str.startswith("60"))
+    return s.where(~valido.fillna(False), "+" + CO_INDICATIVO + d)
+
+
+def _funcion(modo: str, e164: bool):
+    if modo not in MODOS:
+        raise ValueError(f"Modo de teléfono no válido: {modo} (opciones: {', '.join(MODOS)})")
+    base = limpiar_reporte if modo == "reporte" else limpiar_fusion
+    if not e164:
+        return base
+    return lambda s: e164_co(base(s))
+
+
+# =========================
+# Memo persistente
+# =========================
+_MEMOS = {}  # nombre → {"serie": lo leído de disco, "nuevos": {crudo: normalizado}, "path": ...}
+
+
+def _memo_path(nombre: str, memo_dir: Path = None) -> Path:
+    return (memo_dir or MEMO_DIR) / f"memo_{nombre}.parquet"
+
+
+def _memo_disponible() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _leer_memo(path: Path) -> pd.Series:
+    try:
+        df = pd.read_parquet(path).drop_duplicates(subset="crudo")
+        return pd.Series(df["normalizado"].to_numpy(dtype=object), index=pd.Index(df["crudo"]))
+    except Exception:
+        return pd.Series(dtype=object)
+
+
+def cargar_memo(nombre: str, memo_dir: Path = None) -> dict:
+    if nombre not in _MEMOS:
+        path = _memo_path(nombre, memo_dir)
+        serie = _leer_memo(path) if path.exists() else pd.Series(dtype=object)
+        _MEMOS[nombre] = {"serie": serie, "nuevos": {}, "path": path}
+    return _MEMOS[nombre]
+
+
+def guardar_memo(memo_dir: Path = None):
+    """Persiste las entradas nuevas (mezcla con lo que haya en disco; reemplazo atómico)."""
+    if not _memo_disponible():
+        return
+    for nombre, m in _MEMOS.items():
+        if not m["nuevos"]:
+            continue
+        path = _memo_path(nombre, memo_dir) if memo_dir else m["path"]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Otro proceso pudo haber escrito mientras tanto: se conserva lo suyo
+        previo = _leer_memo(path) if path.exists() else pd.Series(dtype=object)
+        todo = pd.concat([previo, pd.Series(m["nuevos"], dtype=object)])
+        todo = todo[~todo.index.duplicated(keep="first")].iloc[-MAX_MEMO_ROWS:]
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        pd.DataFrame({"crudo": todo.index.astype(str), "normalizado": todo.to_numpy()}) \
+          .to_parquet(tmp, index=False)
+        os.replace(tmp, path)
+        m["serie"] = todo
+        m["nuevos"] = {}
+
+
+# =========================
+# Normalización por valores únicos
+# =========================
+def normalizar(s: pd.Series, modo: str = "fusion", e164: bool = False, memo: bool = True) -> pd.Series:
+    """Misma salida que aplicar el modo fila por fila, calculando cada valor distinto una vez."""
+    fn = _funcion(modo, e164)
+    na = s.isna().to_numpy()
+    codes, uniques = pd.factorize(s[~na] if na.any() else s)
+
+    # El resultado solo depende del texto del valor → clave del memo = str(valor)
+    claves = pd.Series(uniques, dtype=object).astype(str).to_numpy(dtype=object)
+    vals = np.empty(len(uniques), dtype=object)
+    faltan = np.ones(len(uniques), dtype=bool)
+    m = cargar_memo(f"{modo}_e164" if e164 else modo) if memo and _memo_disponible() else None
+    if m is not None and len(uniques):
+        if len(m["serie"]):
+            pos = m["serie"].index.get_indexer(claves)
+            faltan = pos < 0
+            vals[~faltan] = m["serie"].to_numpy()[pos[~faltan]]
+        if m["nuevos"] and faltan.any():
+            # Lo calculado antes en esta misma corrida (aún sin guardar)
+            idx = np.flatnonzero(faltan)
+            previos = [m["nuevos"].get(k) for k in claves[idx]]
+            hit = np.array([v is not None for v in previos], dtype=bool)
+            vals[idx[hit]] = np.array(previos, dtype=object)[hit]
+            faltan[idx[hit]] = False
+    if faltan.any():
+        calc = fn(pd.Series(uniques[faltan], dtype=object)).to_numpy(dtype=object)
+        vals[faltan] = calc
+        if m is not None:
+            m["nuevos"].update(zip(claves[faltan], calc))
+
+    out = np.empty(len(s), dtype=object)
+    out[~na] = vals[codes]
+    # Fila por fila (sin factorizar): los nulos, que cada versión de pandas convierte
+    # distinto, y los valores que factorize iguala entre sí aunque su texto difiera
+    # (0 / -0.0 / False, 1 / True)
+    directo = na.copy()
+    ambiguos = pd.Series(uniques, dtype=object).isin([0, 1]).to_numpy()
+    if ambiguos.any():
+        directo[np.flatnonzero(~na)[ambiguos[codes]]] = True
+    if directo.any():
+        out[directo] = fn(s[directo]).to_numpy(dtype=object)
+    return pd.Series(out, index=s.index, name=s.name).astype(str)
+
+
+def normalizar_valor(x, modo: str = "fusion", e164: bool = False) -> str:
+    """normalizar() para un solo valor, sin pandas (consultas puntuales, p. ej. consulta_telefonos)."""
+    if modo not in MODOS:
+        raise ValueError(f"Modo de teléfono no válido: {modo} (opciones: {', '.join(MODOS)})")
+    s = re.sub(r"\.0$", "", str(x)).strip()
+    if modo == "fusion":
+        s = re.sub(r"[^\d+]", "", s)
+    if e164:
+        d = re.sub(r"\D", "", s)
+        if len(d) == 14 and d.startswith("00" + CO_INDICATIVO):
+            d = d[4:]
+        if len(d) == 12 and d.startswith(CO_INDICATIVO):
+            d = d[2:]
+        if len(d) == 10 and (d.startswith("3") or d.startswith("60")):
+            return "+" + CO_INDICATIVO + d
+    return s
@@ -0,0 +1,66 @@
+import os
+import time
+from pathlib import Path
+
+# =========================
+# Vigilancia de inbox/ (modo --watch del consolidador)
+# =========================
+# Sondeo barato con os.scandir (nombre + stat, sin abrir los archivos). Un
+# reporte queda "listo" cuando su tamaño y fecha de modificación no cambian
+# durante STABLE_SECONDS (la descarga o copia terminó), no tiene al lado el
+# archivo de bloqueo de Excel (~$nombre.xlsx) y pasa el filtro del consolidador
+# (is_candidate: tamaño mínimo, no *_consolidado, se puede abrir).
+# Cada versión de un archivo se entrega una sola vez; si se reemplaza por otro
+# contenido (cambia tamaño o fecha) vuelve a contar como nuevo.
+POLL_SECONDS = 2.0
+STABLE_SECONDS = 5.0
+LOCK_PREFIX = "~$"
+
+
+class Vigia:
+    """Detecta reportes estables en una carpeta, uno por versión de archivo."""
+
+    def __init__(self, carpeta: Path, es_candidato, estable_s: float = STABLE_SECONDS):
+        self.carpeta = Path(carpeta)
+        self.es_candidato = es_candidato
+        self.estable_s = estable_s
+        self._vistos = {}       # path → (tamaño, mtime_ns, desde cuándo no cambia)
+        self._entregados = {}   # path → (tamaño, mtime_ns) ya entregado
+
+    def listos(self, ahora: float = None) -> list:
+        """Reportes que terminaron de llegar desde el último llamado (más antiguos primero)."""
+        ahora = time.monotonic() if ahora is None else ahora
+        try:
+            entradas = [e for e in os.scandir(self.carpeta) if e.is_file()]
+        except FileNotFoundError:
+            return []
+        nombres = {e.name for e in entradas}
+        presentes, listos = set(), []
+        for e in entradas:
+            if not e.name.lower().endswith(".xlsx") or e.name.startswith(LOCK_PREFIX):
+                continue
+            p = Path(e.path)
+            presentes.add(p)
+            try:
+                st = e.stat()
+            except OSError:
+                continue
+            firma = (st.st_size, st.st_mtime_ns)
+            previo = self._vistos.get(p)
+            if previo is None or previo[:2] != firma:
+                self._vistos[p] = (*firma, ahora)   # nuevo o todavía cambiando
+                continue
+            if self._entregados.get(p) == firma or ahora - previo[2] < self.estable_s:
+                continue
+            if LOCK_PREFIX + e.name in nombres:      # abierto en Excel
+                continue
+            if not self.es_candidato(p):
+                continue
+            self._entregados[p] = firma
+            listos.append((st.st_mtime_ns, p))
+
+        # Olvida los que ya no están (archivados o borrados)
+        for p in [p for p in self._vistos if p not in presentes]:
+            del self._vistos[p]
+            self._entregados.pop(p, None)
+        return [p for _, p in sorted(listos)]
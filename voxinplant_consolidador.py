@@ -1,8 +1,35 @@
 
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from collections import deque
 import pandas as pd
+import numpy as np
 import sys
 import argparse
+import datetime
+import os
+import re
+import shutil
+import signal
+import time
+
+import cache_reportes
+import correcciones
+import corregir_swap_dia
+import detector_swap
+import entidades
+import esquema
+import estado_numeros
+import historico_sqlite
+import historico_store
+import ingesta_streaming
+import instrumentacion
+import lector_excel
+import manifiesto
+import salidas
+import telefonos
+import vigia_inbox
+from salidas import EscritorConsolidado
 
 # === CONFIGURACIÓN GENERAL ===
 INVALID_U_THRESHOLD = 5.0  # % Umbral del semáforo de calidad
@@ -12,6 +39,8 @@ SHOW_NO_FILES_MESSAGE = True  # Mostrar mensaje si no hay archivos nuevos
 BASE_DIR = Path(__file__).resolve().parent
 INBOX_DIR = BASE_DIR / "inbox"
 OUTPUT_DIR = BASE_DIR / "output"
+ARCHIVE_DIR = BASE_DIR / "archive_raw"
+QUARANTINE_DIR = INBOX_DIR / "cuarentena"
 
 COL_FECHA = "Date of call start"
 COL_RESULT = "Attempt result"
@@ -91,33 +120,40 @@ def build_resumen_unicos(scope_label, u_si, u_no, u_inv, u_sin) -> pd.DataFrame:
         ],
     })
 
-def find_latest_inbox_file():
-    INBOX_DIR.mkdir(parents=True, exist_ok=True)
-
-    def is_candidate(p: Path) -> bool:
-        name = p.name
-        if not name.lower().endswith(".xlsx"):
-            return False
-        if name.startswith("~$"):  # Archivos temporales de Excel
-            return False
-        if "_consolidado" in p.stem.lower():
-            return False
-        try:
-            if p.stat().st_size < MIN_FILE_SIZE_BYTES:
-                return False
-            with open(p, "rb"):
-                pass
-            return True
-        except Exception:
+def is_candidate(p: Path) -> bool:
+    name = p.name
+    if not name.lower().endswith(".xlsx"):
+        return False
+    if name.startswith("~$"):  # Archivos temporales de Excel
+        return False
+    if "_consolidado" in p.stem.lower():
+        return False
+    try:
+        if p.stat().st_size < MIN_FILE_SIZE_BYTES:
             return False
+        with open(p, "rb"):
+            pass
+        return True
+    except Exception:
+        return False
 
+def list_inbox_candidates() -> list:
+    """Reportes candidatos en inbox/, del más reciente al más antiguo."""
+    INBOX_DIR.mkdir(parents=True, exist_ok=True)
     candidates = [p for p in INBOX_DIR.glob("*.xlsx") if is_candidate(p)]
     candidates.sort(key=lambda p: p.stat().st_mtime, reverse=True)
+    return candidates
 
-    if not candidates and SHOW_NO_FILES_MESSAGE:
+def print_no_files_message():
+    if SHOW_NO_FILES_MESSAGE:
         print("\n⚠️  No hay archivos nuevos en la carpeta 'inbox'.")
         print("   - Coloca aquí el reporte descargado desde Voximplant.")
         print("   - Luego ejecuta nuevamente el script.\n")
+
+def find_latest_inbox_file():
+    candidates = list_inbox_candidates()
+    if not candidates:
+        print_no_files_message()
     return candidates[0] if candidates else None
 
 def unique_keys(scope: str):
@@ -125,128 +161,347 @@ def unique_keys(scope: str):
         return [COL_ENTIDAD, COL_PHONE_DIALED]
     return [COL_ENTIDAD, COL_NAME, COL_PHONE_TEMPLATE]
 
+def codigos_orden(s: pd.Series) -> np.ndarray:
+    """Código por valor que respeta el orden de sort_values (nulos al final, iguales entre sí)."""
+    codes, uniques = pd.factorize(s, sort=True)
+    return np.where(codes < 0, len(uniques), codes).astype(np.int64)
+
+def clave_grupo(codigos: list) -> np.ndarray:
+    """Una clave int64 por combinación de códigos, comprimiendo columna a columna
+    (como drop_duplicates en pandas): sin colisiones y sin desbordar 64 bits."""
+    key = np.zeros(len(codigos[0]), dtype=np.int64)
+    for codes in codigos:
+        key, _ = pd.factorize(key * (int(codes.max()) + 1) + codes)
+    return key
+
 def make_unique_by_category(df_cat: pd.DataFrame, scope: str) -> pd.DataFrame:
+    """Último intento por clave, ordenado por fecha + clave.
+
+    Equivale a ordenar por [fecha] + claves (NaT al final) y drop_duplicates(keep="last"),
+    sin ordenar todo el frame: cada columna clave se factoriza una vez (tabla hash sobre
+    sus valores distintos), se toma el máximo de fecha por clave (NaT cuenta como la más
+    reciente; a igual fecha gana la última fila) y solo se ordenan los únicos que quedan.
+    """
     keys = unique_keys(scope)
-    if COL_FECHA in df_cat.columns:
+    if COL_FECHA not in df_cat.columns:
+        return df_cat.drop_duplicates(subset=keys, keep="last")
+    if df_cat.empty or not pd.api.types.is_datetime64_dtype(df_cat[COL_FECHA]):
         df_cat = df_cat.sort_values(by=[COL_FECHA] + keys, ascending=True, na_position="last")
-    return df_cat.drop_duplicates(subset=keys, keep="last")
+        return df_cat.drop_duplicates(subset=keys, keep="last")
 
-def main():
-    parser = argparse.ArgumentParser(description="Consolida reportes Voximplant con hojas SI/NO/INVALIDOS/SIN_RESPUESTA + ÚNICOS por alcance.")
-    parser.add_argument("--unique-scope", choices=["template", "dialed"], default="template",
-                        help="Alcance de deduplicación para hojas UNIQUE_*: 'template' = (entidad,name,Phone) [como lo haces manualmente], 'dialed' = (entidad,Phone B).")
-    args = parser.parse_args()
+    codigos = [codigos_orden(df_cat[c]) for c in keys]
+    key = clave_grupo(codigos)
+    fecha = df_cat[COL_FECHA]
+    t = np.where(fecha.isna().to_numpy(), np.iinfo(np.int64).max, fecha.to_numpy().view("i8"))
+    t_max = pd.Series(t).groupby(key).transform("max").to_numpy()
+    cand = np.flatnonzero(t == t_max)
+    pos = cand[~pd.Series(key[cand]).duplicated(keep="last").to_numpy()]
+    # Orden final (fecha, claves...): rango combinado de las claves y dos argsort estables
+    rango = np.zeros(len(pos), dtype=np.int64)
+    for codes in codigos:
+        c = codes[pos]
+        m = int(c.max()) + 1
+        if int(rango.max()) > (2**62) // m:
+            rango = np.unique(rango, return_inverse=True)[1].astype(np.int64)
+        rango = rango * m + c
+    orden = np.argsort(rango, kind="stable")
+    orden = orden[np.argsort(t[pos][orden], kind="stable")]
+    return df_cat.iloc[pos[orden]]
 
-    if len(sys.argv) >= 2 and sys.argv[1] and not sys.argv[1].startswith("--"):
-        input_path = Path(sys.argv[1]).expanduser().resolve()
-    else:
-        input_path = find_latest_inbox_file()
-        if not input_path:
-            print(f"[ERROR] No se encontraron archivos .xlsx en {INBOX_DIR}")
-            sys.exit(1)
-    if not input_path.exists():
-        print(f"[ERROR] El archivo no existe: {input_path}")
-        sys.exit(2)
+# Clave de dedupe del histórico (alcance template: entidad+name+Phone + snapshot/source)
+KEY_TEMPLATE = [COL_ENTIDAD, COL_NAME, COL_PHONE_TEMPLATE]
+
+BASE_COLS = [
+    COL_FECHA, COL_ENTIDAD, COL_NAME,
+    COL_PHONE_TEMPLATE, COL_PHONE_DIALED,
+    COL_RESULT, COL_BTN, COL_ATTEMPT_NUM, COL_DURATION,
+]
 
-    print(f"Procesando archivo: {input_path.name} (unique-scope={args.unique_scope})")
+HISTORY_SHEETS = ["DATA_SI", "DATA_NO", "DATA_INVALIDOS", "DATA_SIN_RESPUESTA"]
 
-    df = pd.read_excel(input_path)
+def snapshot_date_from_name(fname: str) -> str:
+    # Fecha del snapshot a partir del nombre de archivo, si no, hoy
+    m = re.search(r"(\d{4}-\d{2}-\d{2})", fname)
+    return m.group(1) if m else datetime.date.today().isoformat()
+
+def scope_label(scope: str) -> str:
+    return "entidad+name+Phone" if scope == "template" else "entidad+Phone B"
+
+def invalid_semaforo(u_inv: int, u_total: int):
+    invalid_rate = round((u_inv / u_total * 100), 2) if u_total else 0.0
+    semaforo = (
+        "🔴 ALTO" if invalid_rate > INVALID_U_THRESHOLD
+        else ("🟡 MEDIO" if invalid_rate > (INVALID_U_THRESHOLD * 0.6) else "🟢 OK")
+    )
+    return invalid_rate, semaforo
+
+def normalizar_reporte(df: pd.DataFrame) -> pd.DataFrame:
     df = ensure_columns(df)
     df[COL_BTN] = normalize_btn_series(df[COL_BTN])
     df[COL_FECHA] = pd.to_datetime(df[COL_FECHA], errors="coerce")
     for col in [COL_PHONE_TEMPLATE, COL_PHONE_DIALED]:
-        df[col] = df[col].astype(str).str.replace(r"\.0$", "", regex=True).str.strip()
+        df[col] = telefonos.normalizar(df[col], "reporte")
+    return df
+
+def cargar_reporte(input_path: Path) -> pd.DataFrame:
+    """Excel → normalizado → tipos compactos (category / string Arrow, ver esquema.py)."""
+    return esquema.compactar(normalizar_reporte(pd.read_excel(input_path)), esquema.REPORTE)
+
+def version_normalizacion() -> str:
+    # Cambia sola si cambia el código de normalización → invalida la caché de reportes
+    return cache_reportes.firma_codigo(REQUIRED_COLUMNS, ensure_columns, normalize_btn_series,
+                                       normalizar_reporte, telefonos.limpiar_reporte, telefonos.normalizar,
+                                       esquema.REPORTE, esquema.compactar, str(esquema.dtype_texto()),
+                                       pd.__version__)
+
+def leer_reporte(input_path: Path, usar_cache: bool = True) -> pd.DataFrame:
+    """Reporte leído y normalizado; usa la caché por hash de contenido si está disponible."""
+    if not (usar_cache and cache_reportes.disponible()):
+        return cargar_reporte(input_path)
+    file_hash = cache_reportes.hash_archivo(input_path)
+    version = version_normalizacion()
+    df = cache_reportes.cargar(file_hash, version)
+    if df is not None:
+        return df
+    df = cargar_reporte(input_path)
+    cache_reportes.guardar(file_hash, version, df)
+    return df
+
+def estimar_reporte(input_path: Path) -> dict:
+    """Memoria estimada del reporte ya normalizado, a partir de una muestra de filas."""
+    muestra, filas = esquema.muestra_libro(input_path)
+    return esquema.estimar(normalizar_reporte(muestra), filas, esquema.REPORTE)
+
+def reportar_memoria(paths: list, budget_mb: float, streaming: bool):
+    for p in paths:
+        try:
+            est = estimar_reporte(p)
+        except Exception as e:
+            print(f"[Aviso] No se pudo estimar la memoria de {p.name}: {e}")
+            continue
+        if streaming:
+            # En streaming el pico lo acota el tamaño de bloque, no el reporte completo
+            print(f"🧮 Memoria estimada {p.name}: {est['filas']} filas · datos {est['mb_compacto']:.1f} MB compactos "
+                  f"({est['mb_object']:.1f} MB como object) · --streaming: por bloques dentro de {budget_mb:g} MB")
+        elif not esquema.reportar(p.name, est, budget_mb):
+            print("         Sugerencia: usa --streaming para procesarlo por bloques dentro del presupuesto.")
+
+# =========================
+# Clasificación en una sola pasada
+# =========================
+# Código de categoría por fila, como bits: una fila puede ser a la vez
+# SI/NO (btn_input) e INVALIDOS (Attempt result), igual que con máscaras separadas.
+CAT_SI, CAT_NO, CAT_INVALIDOS, CAT_SIN_RESPUESTA = 1, 2, 4, 8
+CATEGORIAS = {"SI": CAT_SI, "NO": CAT_NO, "INVALIDOS": CAT_INVALIDOS, "SIN_RESPUESTA": CAT_SIN_RESPUESTA}
+
+def clasificar(df: pd.DataFrame, excluir_marcados: bool = True):
+    """Devuelve (códigos de categoría por fila, máscara 'Call answered').
+
+    SIN_RESPUESTA = contestó sin btn, excluyendo los Phone B que tuvieron btn=1/2
+    en el mismo reporte (con excluir_marcados=False quedan todos los candidatos).
+    """
+    btn = df[COL_BTN]
+    answered = (df[COL_RESULT] == "Call answered").to_numpy(dtype=bool)
+    si = (btn == "1").to_numpy(dtype=bool)
+    no = (btn == "2").to_numpy(dtype=bool)
+    inv = (df[COL_RESULT] == "Invalid number").to_numpy(dtype=bool)
+    sin = answered & btn.isna().to_numpy(dtype=bool)
+
+    if excluir_marcados:
+        # Exclusión por teléfono marcado vía factorize (sin set de Python);
+        # los teléfonos nulos (código -1) caen en la última casilla, que nunca se marca
+        codes, uniques = pd.factorize(df[COL_PHONE_DIALED])
+        marcado = np.zeros(len(uniques) + 1, dtype=bool)
+        c = codes[(si | no) & (codes >= 0)]
+        marcado[c] = True
+        sin &= ~marcado[codes]
+
+    cat = (si * CAT_SI) | (no * CAT_NO) | (inv * CAT_INVALIDOS) | (sin * CAT_SIN_RESPUESTA)
+    return pd.Series(cat.astype(np.uint8), index=df.index), answered
+
+def contar_intentos(df: pd.DataFrame, scope: str):
+    """Intentos por Phone B y por clave de alcance, a partir de una sola agregación.
+
+    Se agrupa una vez por la unión de columnas y los dos conteos salen de sumar
+    ese resultado (mucho más pequeño que df). Como en groupby(...).size(), las
+    claves con nulos no cuentan.
+    """
+    keys = unique_keys(scope)
+    cols = list(dict.fromkeys(keys + [COL_PHONE_DIALED]))
+    agg = df.groupby(cols, dropna=False, sort=False, observed=True).size()
+    por_num = agg.groupby(level=COL_PHONE_DIALED, observed=True).sum()
+    por_scope = agg.groupby(level=keys, observed=True).sum()
+    return por_num, por_scope
+
+def procesar_reporte(input_path: Path, unique_scope: str = "template", streaming: bool = False,
+                     memory_budget_mb: float = ingesta_streaming.DEFAULT_MEMORY_BUDGET_MB,
+                     chunk_rows: int = None, formatos=("xlsx",), xlsx_engine: str = "auto",
+                     usar_cache: bool = True, swap_accion: str = "corregir",
+                     swap_umbral: float = detector_swap.UMBRAL, max_intentos: int = estado_numeros.MAX_INTENTOS,
+                     estado_previo: bool = True) -> dict:
+    """Lee, clasifica y escribe el consolidado de un reporte.
 
+    No toca el histórico compartido: devuelve los únicos del día (con meta)
+    y los conteos, para que el paso de fusión los agregue en serie.
+    Es una función de nivel de módulo para poder correr en un ProcessPool.
+    Con streaming=True lee por bloques (ver procesar_reporte_streaming).
+    Antes de clasificar revisa si entidad/name vienen cruzados (ver detector_swap.py).
+    REDISCAR se cruza con el estado por número de días anteriores (ver estado_numeros.py);
+    estado_previo=False lo arma solo con el reporte (backfill).
+    """
+    input_path = Path(input_path)
+    etapas = instrumentacion.Etapas()
+    if streaming:
+        res = procesar_reporte_streaming(input_path, unique_scope, memory_budget_mb, chunk_rows,
+                                         formatos, xlsx_engine, etapas, swap_accion, swap_umbral,
+                                         max_intentos, estado_previo)
+        telefonos.guardar_memo()
+        res["etapas"] = etapas.etapas
+        return res
+
+    with etapas.etapa("lectura") as e:
+        df = leer_reporte(input_path, usar_cache)
+        telefonos.guardar_memo()
+        e["filas_out"] = len(df)
+    with etapas.etapa("deteccion_swap", len(df)):
+        df, cruce = revisar_cruce(df, input_path, swap_accion, swap_umbral)
+    with etapas.etapa("estado_numeros", len(df)) as e:
+        numeros = estado_numeros.resumir(df)
+        e["filas_out"] = len(numeros)
+    hojas, counts, unicos = consolidar_df(df, unique_scope, etapas, max_intentos, estado_previo, input_path)
+
+    with etapas.etapa("escritura", sum(len(h) for h in hojas.values())):
+        with EscritorConsolidado(consolidado_path(input_path), formatos, xlsx_engine) as out:
+            for name, hoja in hojas.items():
+                out.write_frame(name, hoja)
+        output_path = out.principal
+
+    res = resultado_reporte(input_path, output_path, unique_scope, counts, *unicos, cruce=cruce, numeros=numeros)
+    res["etapas"] = etapas.etapas
+    return res
+
+def revisar_cruce(df: pd.DataFrame, input_path: Path, accion: str, umbral: float, mover: bool = True) -> tuple:
+    """detector_swap.evaluar sobre el reporte; en cuarentena lo saca de inbox/ antes de fallar.
+
+    mover=False: quien llama todavía tiene el archivo abierto y lo mueve después con cuarentena().
+    """
+    try:
+        return detector_swap.evaluar(df, snapshot_date_from_name(input_path.name), input_path.name, accion, umbral)
+    except detector_swap.ReporteCruzado as e:
+        if mover:
+            cuarentena(input_path, e)
+        raise
+
+def cuarentena(input_path: Path, error: Exception):
+    """Mueve el reporte de inbox/ a QUARANTINE_DIR (ya cerrado) y relanza el error."""
+    if input_path.parent.resolve() == INBOX_DIR.resolve():
+        QUARANTINE_DIR.mkdir(parents=True, exist_ok=True)
+        shutil.move(str(input_path), QUARANTINE_DIR / input_path.name)
+        raise detector_swap.ReporteCruzado(f"{error}; movido a {QUARANTINE_DIR}") from None
+    raise error
+
+def consolidar_df(df: pd.DataFrame, unique_scope: str = "template", etapas=None,
+                  max_intentos: int = estado_numeros.MAX_INTENTOS, estado_previo: bool = True,
+                  reporte: Path = None):
+    """Clasificación y únicos de un reporte ya normalizado, todo en memoria.
+
+    Devuelve (hojas del consolidado en orden, conteos, (u_si, u_no, u_inv, u_sin)).
+    etapas: instrumentacion.Etapas opcional donde medir clasificación y únicos.
+    reporte: archivo de origen, para no contarlo dos veces si ya está en el estado por número.
+    """
     total = len(df)
-    contestaron = (df[COL_RESULT] == "Call answered").sum()
-    df_si = df[df[COL_BTN] == "1"].copy()
-    df_no = df[df[COL_BTN] == "2"].copy()
-    df_invalidos = df[df[COL_RESULT] == "Invalid number"].copy()
-    mask_sinresp = (df[COL_RESULT] == "Call answered") & (df[COL_BTN].isna())
-    exclude = set(df_si[COL_PHONE_DIALED].dropna()) | set(df_no[COL_PHONE_DIALED].dropna())
-    df_sinresp = df[mask_sinresp & (~df[COL_PHONE_DIALED].isin(exclude))].copy()
-
-    base_cols = [
-        COL_FECHA, COL_ENTIDAD, COL_NAME,
-        COL_PHONE_TEMPLATE, COL_PHONE_DIALED,
-        COL_RESULT, COL_BTN, COL_ATTEMPT_NUM, COL_DURATION,
-    ]
-    for sub in (df_si, df_no, df_invalidos, df_sinresp):
-        for c in base_cols:
-            if c not in sub.columns:
-                sub[c] = pd.NA
-        sub.sort_values(by=[COL_FECHA, COL_PHONE_DIALED], inplace=True)
+    base_cols = BASE_COLS
+    with instrumentacion.etapa(etapas, "clasificacion", total) as e:
+        # Clasificación en una sola pasada + una sola agregación de intentos
+        cat, answered = clasificar(df)
+        intentos_num, intentos_scope = contar_intentos(df, unique_scope)
+        contestaron = int(answered.sum())
+
+        # Un solo ordenamiento (fecha, Phone B) de las filas clasificadas; cada
+        # subconjunto conserva el orden estable que tendría ordenado por separado.
+        en_alguna = cat != 0
+        sel = df.loc[en_alguna, base_cols].sort_values(by=[COL_FECHA, COL_PHONE_DIALED])
+        cat_sel = cat[en_alguna][sel.index]
+        df_si = sel[(cat_sel & CAT_SI) != 0]
+        df_no = sel[(cat_sel & CAT_NO) != 0]
+        df_invalidos = sel[(cat_sel & CAT_INVALIDOS) != 0]
+        df_sinresp = sel[(cat_sel & CAT_SIN_RESPUESTA) != 0]
+        e["filas_out"] = len(sel)
 
     # ÚNICOS por categoría (según alcance elegido)
-    u_si_df  = make_unique_by_category(df_si, args.unique_scope)
-    u_no_df  = make_unique_by_category(df_no, args.unique_scope)
-    u_inv_df = make_unique_by_category(df_invalidos, args.unique_scope)
-    u_sin_df = make_unique_by_category(df_sinresp, args.unique_scope)
+    with instrumentacion.etapa(etapas, "unicos", len(df_si) + len(df_no) + len(df_invalidos) + len(df_sinresp)) as e:
+        u_si_df  = make_unique_by_category(df_si, unique_scope)
+        u_no_df  = make_unique_by_category(df_no, unique_scope)
+        u_inv_df = make_unique_by_category(df_invalidos, unique_scope)
+        u_sin_df = make_unique_by_category(df_sinresp, unique_scope)
+        e["filas_out"] = len(u_si_df) + len(u_no_df) + len(u_inv_df) + len(u_sin_df)
 
     u_si, u_no, u_inv, u_sin = len(u_si_df), len(u_no_df), len(u_inv_df), len(u_sin_df)
 
-    # Enriquecimientos
-    df_sinresp["Detalle"] = "Contestó pero no seleccionó opción"
-    intentos_por_num = df.groupby(COL_PHONE_DIALED).size().rename("Intentos totales").reset_index()
-    df_sinresp = df_sinresp.merge(intentos_por_num, how="left", on=COL_PHONE_DIALED)
+    # Enriquecimientos (desde los conteos ya agregados, sin volver a recorrer df)
+    df_sinresp = df_sinresp.assign(**{
+        "Detalle": "Contestó pero no seleccionó opción",
+        "Intentos totales": df_sinresp[COL_PHONE_DIALED].map(intentos_num),
+    })
 
-    keys = unique_keys(args.unique_scope)
-    intentos_scope = df.groupby(keys).size().rename("Intentos totales").reset_index()
-    u_sin_df = u_sin_df.merge(intentos_scope, how="left", on=keys)
+    keys = unique_keys(unique_scope)
+    u_sin_df = u_sin_df.merge(intentos_scope.rename("Intentos totales").reset_index(), how="left", on=keys)
     u_sin_df.sort_values(by=["Intentos totales", COL_FECHA], ascending=[True, True], inplace=True)
+    rediscar_df, info_rediscar = armar_rediscar(u_sin_df, intentos_num, max_intentos, estado_previo,
+                                                reporte, etapas)
 
     resumen_crudo = build_resumen_crudo(total, len(df_si), len(df_no), len(df_invalidos), len(df_sinresp), contestaron)
-    scope_label = "entidad+name+Phone" if args.unique_scope=="template" else "entidad+Phone B"
-    resumen_unicos = build_resumen_unicos(scope_label, u_si, u_no, u_inv, u_sin)
+    resumen_unicos = build_resumen_unicos(scope_label(unique_scope), u_si, u_no, u_inv, u_sin)
     resumen = pd.concat([resumen_crudo, resumen_unicos], ignore_index=True)
 
-    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-    output_path = OUTPUT_DIR / f"{input_path.stem}_consolidado.xlsx"
-    with pd.ExcelWriter(output_path, engine="openpyxl") as writer:
-        resumen.to_excel(writer, sheet_name="RESUMEN", index=False)
-        df_si[base_cols].to_excel(writer, sheet_name="SI", index=False)
-        df_no[base_cols].to_excel(writer, sheet_name="NO", index=False)
-        df_invalidos[base_cols].to_excel(writer, sheet_name="INVALIDOS", index=False)
-        df_sinresp[base_cols + ["Detalle", "Intentos totales"]].to_excel(writer, sheet_name="SIN_RESPUESTA", index=False)
-
-        keep_cols = base_cols
-        u_si_df[keep_cols].to_excel(writer, sheet_name="UNIQUE_SI", index=False)
-        u_no_df[keep_cols].to_excel(writer, sheet_name="UNIQUE_NO", index=False)
-        u_inv_df[keep_cols].to_excel(writer, sheet_name="UNIQUE_INVALIDOS", index=False)
-        u_sin_df[keep_cols + ["Intentos totales"]].to_excel(writer, sheet_name="UNIQUE_SIN_RESPUESTA", index=False)
-        u_sin_df[keep_cols + ["Intentos totales"]].to_excel(writer, sheet_name="REDISCAR", index=False)
-
-    # === Copias automáticas de histórico ===
-    DAILY_DIR = OUTPUT_DIR / "daily"
-    DAILY_DIR.mkdir(parents=True, exist_ok=True)
-
-    ARCHIVE_DIR = BASE_DIR / "archive_raw"
-    ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
-
-    # Copiar el archivo consolidado a DAILY
-    daily_copy = DAILY_DIR / output_path.name
-    import shutil
-    shutil.copy2(output_path, daily_copy)
+    keep_cols = base_cols
+    hojas = {
+        "RESUMEN": resumen,
+        "SI": df_si[base_cols],
+        "NO": df_no[base_cols],
+        "INVALIDOS": df_invalidos[base_cols],
+        "SIN_RESPUESTA": df_sinresp[base_cols + ["Detalle", "Intentos totales"]],
+        "UNIQUE_SI": u_si_df[keep_cols],
+        "UNIQUE_NO": u_no_df[keep_cols],
+        "UNIQUE_INVALIDOS": u_inv_df[keep_cols],
+        "UNIQUE_SIN_RESPUESTA": u_sin_df[keep_cols + ["Intentos totales"]],
+        "REDISCAR": rediscar_df[keep_cols + REDISCAR_COLS],
+    }
+    counts = {
+        "total": total,
+        "contestaron": contestaron,
+        "confirmados": len(df_si),
+        "no_confirmados": len(df_no),
+        "invalidos": len(df_invalidos),
+        "sin_respuesta": len(df_sinresp),
+        **info_rediscar,
+    }
+    return hojas, counts, (u_si_df, u_no_df, u_inv_df, u_sin_df)
 
-    # Mover el archivo original procesado a ARCHIVE_RAW
-    archived_copy = ARCHIVE_DIR / input_path.name
-    try:
-        shutil.move(str(input_path), archived_copy)
-    except Exception as e:
-        print(f"[Aviso] No se pudo mover el archivo original: {e}")
+REDISCAR_COLS = ["Intentos totales", "Intentos acumulados", "Último intento previo"]
 
-    # === HISTÓRICO ÚNICO EN UN SOLO ARCHIVO ===
-    import re, datetime
-    from pandas import ExcelFile
+def armar_rediscar(u_sin_df: pd.DataFrame, intentos_num: pd.Series, max_intentos: int,
+                   estado_previo: bool = True, reporte: Path = None, etapas=None) -> tuple:
+    """REDISCAR = únicos sin respuesta del día cruzados con el estado por número (estado_numeros.py)."""
+    with instrumentacion.etapa(etapas, "rediscar", len(u_sin_df)) as e:
+        previo, ya_aplicado = None, False
+        if estado_previo and len(u_sin_df):
+            previo = estado_numeros.previos(u_sin_df[COL_PHONE_DIALED])
+            if reporte is not None:
+                ya_aplicado = estado_numeros.aplicado(snapshot_date_from_name(reporte.name), reporte.name)
+        rediscar_df, info = estado_numeros.rediscar(u_sin_df, intentos_num, previo, max_intentos, ya_aplicado)
+        e["filas_out"] = len(rediscar_df)
+    return rediscar_df, info
 
-    HISTORY_DIR = OUTPUT_DIR / "history"
-    HISTORY_DIR.mkdir(parents=True, exist_ok=True)
-    HISTORY_PATH = HISTORY_DIR / "HISTORICO_UNIQUE.xlsx"
+def consolidado_path(input_path: Path) -> Path:
+    # El consolidado se escribe directo en output/daily (sin escribir y copiar)
+    return OUTPUT_DIR / "daily" / f"{input_path.stem}_consolidado.xlsx"
 
-    # 1) Fecha del snapshot a partir del nombre de archivo, si no, hoy
+def resultado_reporte(input_path: Path, output_path: Path, unique_scope: str, counts: dict,
+                      u_si_df, u_no_df, u_inv_df, u_sin_df, cruce: dict = None,
+                      numeros: pd.DataFrame = None) -> dict:
     fname = input_path.name
-    m = re.search(r"(\d{4}-\d{2}-\d{2})", fname)
-    snapshot_date = m.group(1) if m else datetime.date.today().isoformat()
+    snapshot_date = snapshot_date_from_name(fname)
 
     def add_meta(df_in: pd.DataFrame) -> pd.DataFrame:
         df_out = df_in.copy()
@@ -254,131 +509,453 @@ def main():
         df_out["source_file"] = fname
         return df_out
 
-    # 2) DataFrames nuevos (únicos del día) + meta
-    keep_cols = base_cols
-    new_SI  = add_meta(u_si_df[keep_cols])
-    new_NO  = add_meta(u_no_df[keep_cols])
-    new_INV = add_meta(u_inv_df[keep_cols])
-    new_SIN = add_meta(u_sin_df[keep_cols + ["Intentos totales"]])
-
-    # 3) Cargar sheets existentes si el histórico ya existe
-    sheets = {
-        "DATA_SI": new_SI.iloc[0:0],
-        "DATA_NO": new_NO.iloc[0:0],
-        "DATA_INVALIDOS": new_INV.iloc[0:0],
-        "DATA_SIN_RESPUESTA": new_SIN.iloc[0:0],
+    # DataFrames nuevos (únicos del día) + meta
+    keep_cols = BASE_COLS
+    res = {
+        "input_path": input_path,
+        "output_path": output_path,
+        "unique_scope": unique_scope,
+        "snapshot_date": snapshot_date,
+        "source_file": fname,
     }
-    if HISTORY_PATH.exists():
-        try:
-            with ExcelFile(HISTORY_PATH) as xf:
-                for sh in sheets.keys():
-                    if sh in xf.sheet_names:
-                        sheets[sh] = pd.read_excel(HISTORY_PATH, sheet_name=sh)
-        except Exception:
-            # si falla la lectura, seguimos con hojas vacías (no debería pasar)
-            pass
+    res.update({k: int(v) for k, v in counts.items()})
+    res.update({
+        "u_confirmados": int(len(u_si_df)),
+        "u_no_confirmados": int(len(u_no_df)),
+        "u_invalidos": int(len(u_inv_df)),
+        "u_sin_respuesta": int(len(u_sin_df)),
+        "historico": {
+            "DATA_SI": add_meta(u_si_df[keep_cols]),
+            "DATA_NO": add_meta(u_no_df[keep_cols]),
+            "DATA_INVALIDOS": add_meta(u_inv_df[keep_cols]),
+            "DATA_SIN_RESPUESTA": add_meta(u_sin_df[keep_cols + ["Intentos totales"]]),
+        },
+        "cruce": cruce,
+        "numeros": numeros,
+    })
+    if cruce and cruce["corregido"]:
+        # El histórico guarda el reporte tal como llegó; el swap va al diario de correcciones
+        res["historico"] = {sh: detector_swap.intercambiar(df) for sh, df in res["historico"].items()}
+    return res
+
+# =========================
+# Ingesta por bloques (reportes muy grandes)
+# =========================
+def _reduce_unique(frames: list, scope: str) -> pd.DataFrame:
+    # Orden global (fecha, Phone B) de los frames concatenados en orden de llegada:
+    # a igual fecha y teléfono queda primero el más antiguo (sort estable).
+    df = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+    df = df.sort_values(by=[COL_FECHA, COL_PHONE_DIALED], kind="stable")
+    return make_unique_by_category(df, scope)
+
+class UnicosPorBloques:
+    """Únicos de una categoría a partir de bloques, sin reordenar todo el estado en cada uno.
+
+    Cada bloque se reduce solo; los reducidos se juntan con el estado cuando ya suman
+    tantas filas como él (costo amortizado lineal) y una última vez al final.
+    """
+
+    def __init__(self, scope: str):
+        self.scope = scope
+        self.estado = None
+        self.pendientes = []
+        self.filas_pendientes = 0
+
+    def add(self, part: pd.DataFrame):
+        if part.empty:
+            return
+        u = _reduce_unique([part], self.scope)
+        self.pendientes.append(u)
+        self.filas_pendientes += len(u)
+        if self.filas_pendientes >= (0 if self.estado is None else len(self.estado)):
+            self._juntar()
+
+    def _juntar(self):
+        previos = [] if self.estado is None else [self.estado]
+        self.estado = _reduce_unique(previos + self.pendientes, self.scope)
+        self.pendientes, self.filas_pendientes = [], 0
+
+    def resultado(self):
+        """Únicos de todos los bloques (None si no hubo filas)."""
+        if self.pendientes:
+            self._juntar()
+        return self.estado
+
+def _add_counts(acc, s: pd.Series):
+    return s if acc is None else acc.add(s, fill_value=0)
+
+def procesar_reporte_streaming(input_path: Path, unique_scope: str = "template",
+                               memory_budget_mb: float = ingesta_streaming.DEFAULT_MEMORY_BUDGET_MB,
+                               chunk_rows: int = None, formatos=("xlsx",), xlsx_engine: str = "auto",
+                               etapas=None, swap_accion: str = "corregir",
+                               swap_umbral: float = detector_swap.UMBRAL,
+                               max_intentos: int = estado_numeros.MAX_INTENTOS,
+                               estado_previo: bool = True) -> dict:
+    """Mismo resultado que procesar_reporte, leyendo el reporte por bloques.
+
+    En memoria solo quedan: un bloque, los únicos por clave de cada categoría,
+    los teléfonos confirmados/no confirmados (exclusión de SIN_RESPUESTA) y los
+    contadores de intentos. Las filas crudas de cada categoría van a disco.
+    """
+    input_path = Path(input_path)
+    if not chunk_rows:
+        chunk_rows = ingesta_streaming.chunk_rows_for_budget(input_path, memory_budget_mb)
+    keys = unique_keys(unique_scope)
+    base_cols = BASE_COLS
+
+    total = contestaron = 0
+    u_state = {name: UnicosPorBloques(unique_scope) for name in ("SI", "NO", "INVALIDOS")}
+    exclude = set()
+    intentos_num = intentos_scope = None
+    cruce = revisado = None
+    numeros = None
+
+    with ingesta_streaming.new_tmp_dir() as tmp:
+        spools = {
+            name: ingesta_streaming.SortedSpool(tmp, name, COL_FECHA, COL_PHONE_DIALED)
+            for name in ("SI", "NO", "INVALIDOS", "SIN_RESPUESTA")
+        }
+        with instrumentacion.etapa(etapas, "lectura_clasificacion") as e:
+            chunks = ingesta_streaming.iter_chunks(input_path, chunk_rows)
+            try:
+                for chunk in chunks:
+                    c = normalizar_reporte(chunk)
+                    if not revisado:
+                        # El cruce se decide con el primer bloque y se aplica igual a todos
+                        _, cruce = revisar_cruce(c, input_path, swap_accion, swap_umbral, mover=False)
+                        revisado = True
+                    if cruce and cruce["corregido"]:
+                        c = detector_swap.intercambiar(c)
+                    total += len(c)
+                    # La exclusión de SIN_RESPUESTA es global: aquí solo candidatos
+                    cat, answered = clasificar(c, excluir_marcados=False)
+                    contestaron += int(answered.sum())
+                    masks = {name: (cat & bit) != 0 for name, bit in CATEGORIAS.items()}
+                    for name, m in masks.items():
+                        sub = c.loc[m, base_cols]
+                        spools[name].add(sub)
+                        if name in u_state:
+                            u_state[name].add(sub)
+                    exclude |= set(c.loc[masks["SI"] | masks["NO"], COL_PHONE_DIALED].dropna())
+                    por_num, por_scope = contar_intentos(c, unique_scope)
+                    intentos_num = _add_counts(intentos_num, por_num)
+                    intentos_scope = _add_counts(intentos_scope, por_scope)
+                    numeros = estado_numeros.combinar(numeros, estado_numeros.resumir(c))
+                    del c, chunk
+            except detector_swap.ReporteCruzado as err:
+                chunks.close()   # cierra el libro read-only antes de moverlo (en Windows sigue bloqueado)
+                cuarentena(input_path, err)
+            finally:
+                chunks.close()
+            e["filas_out"] = total
 
-    # 4) Append + dedupe por clave (tu alcance template: entidad+name+Phone + snapshot/source)
-    KEY_TEMPLATE = [COL_ENTIDAD, COL_NAME, COL_PHONE_TEMPLATE]
-
-    def append_and_dedupe(df_old: pd.DataFrame, df_new: pd.DataFrame, key_cols: list) -> pd.DataFrame:
-        # Alinear columnas entre viejo y nuevo
-        for c in df_new.columns:
-            if c not in df_old.columns:
-                df_old[c] = pd.NA
-        for c in df_old.columns:
-            if c not in df_new.columns:
-                df_new[c] = pd.NA
-        combined = pd.concat([df_old, df_new], ignore_index=True)
-        combined.drop_duplicates(subset=key_cols + ["snapshot_date", "source_file"], keep="last", inplace=True)
-        return combined
-
-    sheets["DATA_SI"]  = append_and_dedupe(sheets["DATA_SI"],  new_SI,  KEY_TEMPLATE)
-    sheets["DATA_NO"]  = append_and_dedupe(sheets["DATA_NO"],  new_NO,  KEY_TEMPLATE)
-    sheets["DATA_INVALIDOS"] = append_and_dedupe(sheets["DATA_INVALIDOS"], new_INV, KEY_TEMPLATE)
-    sheets["DATA_SIN_RESPUESTA"] = append_and_dedupe(sheets["DATA_SIN_RESPUESTA"], new_SIN, KEY_TEMPLATE)
+        # SIN_RESPUESTA: la exclusión depende de todos los bloques → segunda pasada sobre el volcado
+        with instrumentacion.etapa(etapas, "unicos_sin_respuesta", spools["SIN_RESPUESTA"].rows) as e:
+            sin_count = 0
+            u_sin = UnicosPorBloques(unique_scope)
+            for part in spools["SIN_RESPUESTA"].iter_frames():
+                part = part[~part[COL_PHONE_DIALED].isin(exclude)]
+                sin_count += len(part)
+                u_sin.add(part)
+            u_sin_state = u_sin.resultado()
+            e["filas_out"] = 0 if u_sin_state is None else len(u_sin_state)
+
+        empty = pd.DataFrame(columns=base_cols)
+        u_si_df, u_no_df, u_inv_df = (u.resultado() for u in (u_state["SI"], u_state["NO"], u_state["INVALIDOS"]))
+        u_si_df = u_si_df if u_si_df is not None else empty
+        u_no_df = u_no_df if u_no_df is not None else empty
+        u_inv_df = u_inv_df if u_inv_df is not None else empty
+        u_sin_df = u_sin_state if u_sin_state is not None else empty
+
+        intentos_num = (intentos_num if intentos_num is not None else pd.Series(dtype="int64")).astype("int64")
+        intentos_scope = (intentos_scope if intentos_scope is not None else pd.Series(dtype="int64")).astype("int64")
+        u_sin_df = u_sin_df.merge(intentos_scope.rename("Intentos totales").reset_index(), how="left", on=keys) \
+            if len(u_sin_df) else u_sin_df.assign(**{"Intentos totales": pd.Series(dtype="int64")})
+        u_sin_df = u_sin_df.sort_values(by=["Intentos totales", COL_FECHA], ascending=[True, True])
+        rediscar_df, info_rediscar = armar_rediscar(u_sin_df, intentos_num, max_intentos, estado_previo,
+                                                    input_path, etapas)
+
+        counts = {
+            "total": total,
+            "contestaron": contestaron,
+            "confirmados": spools["SI"].rows,
+            "no_confirmados": spools["NO"].rows,
+            "invalidos": spools["INVALIDOS"].rows,
+            "sin_respuesta": sin_count,
+            **info_rediscar,
+        }
+        resumen_crudo = build_resumen_crudo(total, counts["confirmados"], counts["no_confirmados"],
+                                            counts["invalidos"], sin_count, contestaron)
+        resumen_unicos = build_resumen_unicos(scope_label(unique_scope), len(u_si_df), len(u_no_df),
+                                              len(u_inv_df), len(u_sin_df))
+        resumen = pd.concat([resumen_crudo, resumen_unicos], ignore_index=True)
+
+        intentos_map = intentos_num.to_dict()
+        pi = base_cols.index(COL_PHONE_DIALED)
+
+        def sin_rows():
+            for r in spools["SIN_RESPUESTA"].iter_sorted(base_cols):
+                if r[pi] in exclude:
+                    continue
+                yield r + ("Contestó pero no seleccionó opción", intentos_map.get(r[pi]))
+
+        filas_escritas = (len(resumen) + counts["confirmados"] + counts["no_confirmados"] + counts["invalidos"]
+                          + sin_count + len(u_si_df) + len(u_no_df) + len(u_inv_df) + len(u_sin_df) + len(rediscar_df))
+        with instrumentacion.etapa(etapas, "escritura", filas_escritas):
+            with EscritorConsolidado(consolidado_path(input_path), formatos, xlsx_engine) as out:
+                out.write_frame("RESUMEN", resumen)
+                out.write_rows("SI", base_cols, spools["SI"].iter_sorted(base_cols))
+                out.write_rows("NO", base_cols, spools["NO"].iter_sorted(base_cols))
+                out.write_rows("INVALIDOS", base_cols, spools["INVALIDOS"].iter_sorted(base_cols))
+                out.write_rows("SIN_RESPUESTA", base_cols + ["Detalle", "Intentos totales"], sin_rows())
+                out.write_frame("UNIQUE_SI", u_si_df[base_cols])
+                out.write_frame("UNIQUE_NO", u_no_df[base_cols])
+                out.write_frame("UNIQUE_INVALIDOS", u_inv_df[base_cols])
+                out.write_frame("UNIQUE_SIN_RESPUESTA", u_sin_df[base_cols + ["Intentos totales"]])
+                out.write_frame("REDISCAR", rediscar_df[base_cols + REDISCAR_COLS])
+            output_path = out.principal
+
+    return resultado_reporte(input_path, output_path, unique_scope, counts,
+                             u_si_df, u_no_df, u_inv_df, u_sin_df, cruce=cruce,
+                             numeros=numeros)
+
+def archivar_original(input_path: Path) -> Path:
+    # Mover el archivo original procesado a ARCHIVE_RAW
+    ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
+    archived_copy = ARCHIVE_DIR / input_path.name
+    try:
+        shutil.move(str(input_path), archived_copy)
+    except Exception as e:
+        print(f"[Aviso] No se pudo mover el archivo original: {e}")
+        return None
+    return archived_copy
+
+def omitir_repetidos(paths: list, force: bool = False) -> tuple:
+    """Consulta el manifiesto antes de parsear: archiva y salta los reportes ya ingeridos.
+
+    Devuelve (paths pendientes, {str(path): hash}) para registrar luego en el manifiesto.
+    """
+    pendientes, repetidos = manifiesto.planificar(paths, force=force)
+    for p, reg in repetidos:
+        print(f"⏭️  {p.name} ya fue procesado ({reg.get('source_file', '')}, {reg.get('procesado', '')}): "
+              f"se archiva sin reprocesar (--force para reprocesar).")
+        archivar_original(p)
+    return [p for p, _ in pendientes], {str(p): h for p, h in pendientes}
+
+def actualizar_historico(lotes: list, backend: str, history_path: Path, export_xlsx: bool = False,
+                         cache: dict = None):
+    """Agrega los únicos de uno o varios reportes al histórico (en el orden de `lotes`).
+
+    backend='excel'   → lee y reescribe HISTORICO_UNIQUE.xlsx una sola vez para todo el lote.
+    backend='parquet' → escribe solo la partición de cada reporte en output/history/store;
+                        el Excel se regenera desde el almacén únicamente si export_xlsx.
+    backend='sqlite'  → upsert en output/history/historico.sqlite (una transacción);
+                        el Excel se exporta desde la base únicamente si export_xlsx.
+    cache: dict que conserva las hojas del Excel entre llamadas (modo --watch); se
+           relee el libro solo si alguien más lo modificó.
+    """
+    if backend == "sqlite":
+        db_path = history_path.parent / historico_sqlite.DB_PATH.name
+        historico_sqlite.upsert_historico(lotes, KEY_TEMPLATE, db_path)
+        if export_xlsx:
+            historico_sqlite.export_excel(history_path, db_path)
+        return
+
+    if backend == "parquet":
+        store_dir = history_path.parent / "store"
+        for res in lotes:
+            for sh, df_new in res["historico"].items():
+                historico_store.write_partition(sh, df_new, res["snapshot_date"], res["source_file"],
+                                                KEY_TEMPLATE, store_dir)
+        if export_xlsx:
+            historico_store.export_excel(history_path, store_dir)
+        return
+
+    # 3) Cargar sheets existentes si el histórico ya existe (un solo abrir del libro)
+    if cache is not None and cache.get("firma") is not None and cache["firma"] == firma_archivo(history_path):
+        sheets = cache["sheets"]
+    else:
+        sheets = cargar_historico(lotes, "excel", history_path)
+
+    # 4) Append + dedupe por clave
+    sheets = unir_historico(sheets, lotes)
 
     # 5) Guardar todo en un único archivo de histórico
-    with pd.ExcelWriter(HISTORY_PATH, engine="openpyxl") as w:
+    escribir_historico_xlsx(sheets, history_path)
+    if cache is not None:
+        cache.update(firma=firma_archivo(history_path), sheets=sheets)
+
+def firma_archivo(path: Path):
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_size, st.st_mtime_ns)
+
+def cargar_historico(lotes: list, backend: str, history_path: Path) -> dict:
+    """Hojas DATA_* actuales del histórico (vacías con las columnas de `lotes` si no existe)."""
+    sheets = {sh: lotes[0]["historico"][sh].iloc[0:0] for sh in HISTORY_SHEETS}
+    try:
+        if backend == "sqlite":
+            db_path = history_path.parent / historico_sqlite.DB_PATH.name
+            if historico_sqlite.db_exists(db_path):
+                sheets.update({sh: df for sh, df in historico_sqlite.read_all(db_path).items() if len(df.columns)})
+        elif backend == "parquet":
+            store_dir = history_path.parent / "store"
+            if historico_store.store_exists(store_dir):
+                sheets.update({sh: df for sh, df in historico_store.read_all(store_dir).items() if len(df.columns)})
+        elif history_path.exists():
+            sheets.update(lector_excel.leer_hojas(history_path, HISTORY_SHEETS))
+    except Exception:
+        # si falla la lectura, seguimos con hojas vacías (no debería pasar)
+        pass
+    return sheets
+
+def unir_historico(sheets: dict, lotes: list) -> dict:
+    """Append + dedupe por clave de los únicos de cada reporte, en memoria.
+
+    Un solo concat + drop_duplicates(keep="last") por hoja: mismo resultado que
+    agregar los reportes uno por uno (gana la última aparición, en su posición),
+    sin costo cuadrático cuando son muchos (backfill).
+    """
+    out = dict(sheets)
+    for sh in sheets:
+        nuevos = [res["historico"][sh] for res in lotes if sh in res["historico"]]
+        if not nuevos:
+            continue
+        combined = pd.concat([sheets[sh], *nuevos], ignore_index=True)
+        combined.drop_duplicates(subset=KEY_TEMPLATE + historico_store.META_COLS, keep="last", inplace=True)
+        out[sh] = combined
+    return out
+
+def escribir_historico_xlsx(sheets: dict, history_path: Path):
+    with pd.ExcelWriter(history_path, engine="openpyxl") as w:
         for sh, df_sh in sheets.items():
             df_sh.to_excel(w, sheet_name=sh, index=False)
 
+RESUMEN_DIARIO_COLS = [
+    "snapshot_date", "source_file", "total", "contestaron",
+    "confirmados", "no_confirmados", "invalidos", "sin_respuesta",
+    "u_confirmados", "u_no_confirmados", "u_invalidos", "u_sin_respuesta",
+]
+
+def resumen_diario_row(res: dict) -> dict:
+    # KPIs diarios (CRUDO + ÚNICOS)
+    row = {c: res[c] for c in RESUMEN_DIARIO_COLS}
+    row["u_total"] = int(res["u_confirmados"] + res["u_no_confirmados"] + res["u_invalidos"] + res["u_sin_respuesta"])
+    # Calcula tasa inválidos únicos y semáforo (misma lógica que consola)
+    row["invalid_rate_percent"], row["semaforo"] = invalid_semaforo(res["u_invalidos"], row["u_total"])
+    return row
+
+# Función helper para append + dedupe por (snapshot_date, source_file)
+def append_dedupe_table(new_df: pd.DataFrame, path_xlsx: Path, path_csv: Path):
+    # 1) Excel
+    if path_xlsx.exists():
+        try:
+            old = pd.read_excel(path_xlsx, sheet_name="DATA")
+        except Exception:
+            old = pd.DataFrame(columns=new_df.columns)
+    else:
+        old = pd.DataFrame(columns=new_df.columns)
+
+    # Alinear columnas
+    for c in new_df.columns:
+        if c not in old.columns:
+            old[c] = pd.NA
+    for c in old.columns:
+        if c not in new_df.columns:
+            new_df[c] = pd.NA
+
+    combined = pd.concat([old, new_df], ignore_index=True)
+    combined.drop_duplicates(subset=["snapshot_date", "source_file"], keep="last", inplace=True)
+
+    with pd.ExcelWriter(path_xlsx, engine="openpyxl") as w:
+        combined.to_excel(w, sheet_name="DATA", index=False)
+
+    # 2) CSV (mismo contenido), útil para Power BI
+    combined.to_csv(path_csv, index=False, encoding="utf-8-sig")
+
+def actualizar_resumen_diario(lotes: list, backend: str = "excel"):
     # === RESUMEN_DIARIO para histórico plano (Excel + CSV) ===
     RES_DIR = OUTPUT_DIR / "history"
     RES_DIR.mkdir(parents=True, exist_ok=True)
     RES_XLSX = RES_DIR / "HIST_RESUMEN_DIARIO.xlsx"
     RES_CSV  = RES_DIR / "HIST_RESUMEN_DIARIO.csv"
+    rows = pd.DataFrame([resumen_diario_row(res) for res in lotes])
+    if backend == "sqlite":
+        # Upsert por (snapshot_date, source_file); Excel y CSV quedan como vista exportada
+        db_path = RES_DIR / historico_sqlite.DB_PATH.name
+        historico_sqlite.upsert_resumen(rows, db_path)
+        historico_sqlite.export_resumen(RES_XLSX, RES_CSV, db_path)
+        return
+    append_dedupe_table(rows, RES_XLSX, RES_CSV)
 
-    # KPIs diarios (CRUDO + ÚNICOS)
-    resumen_row = pd.DataFrame([{
-        "snapshot_date": snapshot_date,
-        "source_file": fname,
-        "total": total,
-        "contestaron": int((df[COL_RESULT] == "Call answered").sum()),
-        "confirmados": int(len(df_si)),
-        "no_confirmados": int(len(df_no)),
-        "invalidos": int(len(df_invalidos)),
-        "sin_respuesta": int(len(df_sinresp)),
-        "u_confirmados": int(u_si),
-        "u_no_confirmados": int(u_no),
-        "u_invalidos": int(u_inv),
-        "u_sin_respuesta": int(u_sin),
-        "u_total": int(u_si + u_no + u_inv + u_sin),
-    }])
-
-    # Calcula tasa inválidos únicos y semáforo (misma lógica que consola)
-    INVALID_U_THRESHOLD = 5.0
-    invalid_rate = round((u_inv / (u_si + u_no + u_inv + u_sin) * 100), 2) if (u_si + u_no + u_inv + u_sin) else 0.0
-    resumen_row["invalid_rate_percent"] = invalid_rate
-    resumen_row["semaforo"] = (
-        "🔴 ALTO" if invalid_rate > INVALID_U_THRESHOLD
-        else ("🟡 MEDIO" if invalid_rate > (INVALID_U_THRESHOLD * 0.6) else "🟢 OK")
-    )
-
-    # Función helper para append + dedupe por (snapshot_date, source_file)
-    def append_dedupe_table(new_df: pd.DataFrame, path_xlsx: Path, path_csv: Path):
-        # 1) Excel
-        if path_xlsx.exists():
-            try:
-                old = pd.read_excel(path_xlsx, sheet_name="DATA")
-            except Exception:
-                old = pd.DataFrame(columns=new_df.columns)
-        else:
-            old = pd.DataFrame(columns=new_df.columns)
+def fusionar_resultados(lotes: list, args, etapas=None, cache: dict = None, archivar: bool = True):
+    """Paso de fusión en serie: archiva originales y actualiza histórico + resumen diario."""
+    if not lotes:
+        return
+    if archivar:
+        with instrumentacion.etapa(etapas, "archivo"):
+            for res in lotes:
+                res["archivo"] = archivar_original(res["input_path"])
 
-        # Alinear columnas
-        for c in new_df.columns:
-            if c not in old.columns:
-                old[c] = pd.NA
-        for c in old.columns:
-            if c not in new_df.columns:
-                new_df[c] = pd.NA
+    if args.corregir_swap:
+        # El histórico guarda lo que llegó; el swap queda en el diario y se aplica al leer
+        nuevas = sum(nueva for _, _, nueva in corregir_swap_dia.registrar())
+        print(f"🔁 Corrección de swap: {nuevas} entrada(s) nuevas en {correcciones.JOURNAL_PATH.name}")
+    registrar_cruces(lotes)
+    with instrumentacion.etapa(etapas, "estado_numeros", len(lotes)):
+        estado_numeros.registrar(lotes)
 
-        combined = pd.concat([old, new_df], ignore_index=True)
-        combined.drop_duplicates(subset=["snapshot_date", "source_file"], keep="last", inplace=True)
+    # === HISTÓRICO ÚNICO EN UN SOLO ARCHIVO ===
+    HISTORY_DIR = OUTPUT_DIR / "history"
+    HISTORY_DIR.mkdir(parents=True, exist_ok=True)
+    HISTORY_PATH = HISTORY_DIR / "HISTORICO_UNIQUE.xlsx"
+    filas_nuevas = sum(len(df) for res in lotes for df in res["historico"].values())
+    with instrumentacion.etapa(etapas, "historico", filas_nuevas):
+        actualizar_historico(lotes, args.history_backend, HISTORY_PATH, export_xlsx=args.export_history_xlsx,
+                             cache=cache)
 
-        with pd.ExcelWriter(path_xlsx, engine="openpyxl") as w:
-            combined.to_excel(w, sheet_name="DATA", index=False)
+    with instrumentacion.etapa(etapas, "resumen_diario", len(lotes)):
+        actualizar_resumen_diario(lotes, args.history_backend)
 
-        # 2) CSV (mismo contenido), útil para Power BI
-        combined.to_csv(path_csv, index=False, encoding="utf-8-sig")
+    # Recién ahora (histórico al día) quedan registrados como ingeridos
+    manifiesto.registrar(lotes, history_backend=args.history_backend)
 
-    append_dedupe_table(resumen_row, RES_XLSX, RES_CSV)
+def registrar_cruces(lotes: list):
+    """Swaps corregidos al consolidar → diario de correcciones; entidades frecuentes → detector_swap."""
+    for res in lotes:
+        cruce = res.get("cruce")
+        if cruce and cruce["corregido"]:
+            correcciones.agregar("swap", res["snapshot_date"], res["source_file"],
+                                 nota="detectado al consolidar", columnas=list(correcciones.SWAP_COLS))
+    entidades.aprender({e for res in lotes for e in (res.get("cruce") or {}).get("entidades", [])})
 
+def imprimir_resumen(res: dict):
     print("\n=== CONSOLIDACIÓN LISTA ===")
-    print(f"Entrada: {input_path}")
-    print(f"Salida:  {output_path}\n")
+    print(f"Entrada: {res['input_path']}")
+    print(f"Salida:  {res['output_path']}\n")
+
+    cruce = res.get("cruce")
+    if cruce and cruce["cruzado"]:
+        estado = "corregido en el consolidado (swap en el diario de correcciones; el histórico lo guarda crudo)" \
+            if cruce["corregido"] \
+            else "sin corregir (--swap-accion avisar)"
+        print(f"⚠️ entidad/name cruzados: {cruce['pct_name']:.0%} de 'name' son entidades "
+              f"(vs {cruce['pct_entidad']:.0%} en 'entidad') → {estado}\n")
 
     # --- Consola: CRUDO ---
     print("== RESUMEN CRUDO ==")
-    print(f"Total registros:                    {total}")
-    print(f"Contestaron (Call answered):        {(df[COL_RESULT] == 'Call answered').sum()}")
-    print(f"Confirmados (btn=1):               {len(df_si)}")
-    print(f"No confirmados (btn=2):            {len(df_no)}")
-    print(f"Inválidos (Invalid number):        {len(df_invalidos)}")
-    print(f"Sin respuesta (contestó sin btn):  {len(df_sinresp)}")
+    print(f"Total registros:                    {res['total']}")
+    print(f"Contestaron (Call answered):        {res['contestaron']}")
+    print(f"Confirmados (btn=1):               {res['confirmados']}")
+    print(f"No confirmados (btn=2):            {res['no_confirmados']}")
+    print(f"Inválidos (Invalid number):        {res['invalidos']}")
+    print(f"Sin respuesta (contestó sin btn):  {res['sin_respuesta']}")
 
     # --- ÚNICOS por tu método (entidad+name+Phone por defecto) ---
+    u_si, u_no = res["u_confirmados"], res["u_no_confirmados"]
+    u_inv, u_sin = res["u_invalidos"], res["u_sin_respuesta"]
     u_total = u_si + u_no + u_inv + u_sin
     print("\n== RESUMEN ÚNICOS (entidad+name+Phone) ==")
     print(f"Únicos Confirmados (btn=1):        {u_si}")
@@ -387,21 +964,306 @@ def main():
     print(f"Únicos Sin respuesta:              {u_sin}")
     print(f"Total únicos (suma categorías):    {u_total}")
 
+    # --- REDISCAR (cruzado con el estado por número de días anteriores) ---
+    if "rediscar" in res:
+        print("\n== REDISCAR ==")
+        print(f"Para rediscar:                     {res['rediscar']}")
+        print(f"Excluidos (resueltos otro día):    {res['rediscar_resueltos']}")
+        print(f"Excluidos (tope de intentos):      {res['rediscar_tope']}")
+
     # --- Semáforo de calidad (Inválidos únicos) ---
-    INVALID_U_THRESHOLD = 5.0  # % umbral
-    invalid_rate = round((u_inv / u_total) * 100, 2) if u_total else 0.0
-    semaforo = "🟢 OK"
-    if invalid_rate > INVALID_U_THRESHOLD:
-        semaforo = "🔴 ALTO"
-    elif invalid_rate > (INVALID_U_THRESHOLD * 0.6):
-        semaforo = "🟡 MEDIO"
+    invalid_rate, semaforo = invalid_semaforo(u_inv, u_total)
 
     print("\n== SEMÁFORO CALIDAD TELÉFONOS ==")
     print(f"Inválidos únicos: {u_inv} de {u_total}  ({invalid_rate}%)  → {semaforo}")
     print(f"(Umbral: {INVALID_U_THRESHOLD}%)")
 
-    # También dejamos el DataFrame completo por si lo quieres en Excel con dos bloques:
-    # print(resumen.to_string(index=False))
+def procesar_lote(paths: list, unique_scope: str, workers: int, **opciones) -> list:
+    """Procesa varios reportes en un pool de procesos; devuelve los resultados exitosos.
+
+    El orden de salida es determinista (snapshot_date, nombre de archivo), sin
+    importar qué proceso termine primero.
+    """
+    resultados = []
+    if workers <= 1 or len(paths) == 1:
+        for p in paths:
+            try:
+                resultados.append(procesar_reporte(p, unique_scope, **opciones))
+            except Exception as e:
+                print(f"[ERROR] Falló {p.name}: {e}")
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            futuros = {ex.submit(procesar_reporte, p, unique_scope, **opciones): p for p in paths}
+            for fut in as_completed(futuros):
+                p = futuros[fut]
+                try:
+                    resultados.append(fut.result())
+                    print(f"  ✔ {p.name}")
+                except Exception as e:
+                    print(f"[ERROR] Falló {p.name}: {e}")
+    resultados.sort(key=lambda r: (r["snapshot_date"], r["source_file"]))
+    return resultados
+
+HISTORY_BACKUPS = ["HISTORICO_UNIQUE.xlsx", "HIST_RESUMEN_DIARIO.xlsx", "HIST_RESUMEN_DIARIO.csv", "store",
+                   historico_sqlite.DB_PATH.name, historico_sqlite.DB_PATH.name + "-wal",
+                   historico_sqlite.DB_PATH.name + "-shm", manifiesto.MANIFEST_PATH.name,
+                   estado_numeros.DB_PATH.name, estado_numeros.DB_PATH.name + "-wal",
+                   estado_numeros.DB_PATH.name + "-shm"]
+
+def respaldar_historico(history_dir: Path):
+    """Mueve el histórico actual (todos los backends + manifiesto) a history/backups/backfill_<fecha>/."""
+    destino = history_dir / "backups" / f"backfill_{datetime.datetime.now():%Y%m%d_%H%M%S}"
+    movidos = []
+    for nombre in HISTORY_BACKUPS:
+        p = history_dir / nombre
+        if p.exists():
+            destino.mkdir(parents=True, exist_ok=True)
+            shutil.move(str(p), destino / nombre)
+            movidos.append(nombre)
+    if movidos:
+        print(f"📦 Histórico anterior respaldado en {destino} ({', '.join(movidos)})")
+    return destino if movidos else None
+
+def backfill(args, workers: int, opciones: dict, corrida):
+    """Reconstruye el histórico desde archive_raw/: map en el pool, reduce determinista en serie.
+
+    Cada reporte se consolida en paralelo; luego los únicos y las filas del resumen
+    diario se unen en orden (snapshot_date, archivo), igual que si se hubieran
+    procesado uno por uno. Con --solo-faltantes solo procesa lo que no está en el
+    manifiesto y lo agrega al histórico existente (sin respaldar ni reconstruir).
+    """
+    paths = [p for p in ARCHIVE_DIR.glob("*.xlsx") if is_candidate(p)] if ARCHIVE_DIR.exists() else []
+    paths.sort(key=lambda p: (snapshot_date_from_name(p.name), p.name))
+    pendientes, repetidos = manifiesto.planificar(paths, force=not args.solo_faltantes)
+    hashes = {str(p): h for p, h in pendientes}
+    paths = [p for p, _ in pendientes]
+    omitidos = "ya ingeridos" if args.solo_faltantes else "con contenido repetido"
+    print(f"Backfill desde {ARCHIVE_DIR}: {len(paths)} reportes ({len(repetidos)} {omitidos} se omiten), "
+          f"{workers} procesos (unique-scope={args.unique_scope})")
+    if not paths:
+        print("✅ Nada que procesar.")
+        return
+
+    corrida.extra.update(modo="backfill", archivos=len(paths), unique_scope=args.unique_scope,
+                         history_backend=args.history_backend, workers=workers)
+    with corrida.etapa("procesamiento") as e:
+        # El estado por número puede traer días posteriores: REDISCAR de cada día sale solo del reporte
+        opciones = dict(opciones, estado_previo=False)
+        resultados = procesar_lote(paths, args.unique_scope, workers, **opciones)
+        e["filas_in"] = sum(r["total"] for r in resultados)
+    for res in resultados:
+        corrida.agregar(res.pop("etapas", []), prefijo=f"{res['source_file']}/")
+        res["hash"] = hashes.get(str(res["input_path"]))
+        res["archivo"] = res["input_path"]
+    if len(resultados) < len(paths):
+        print(f"[Aviso] {len(paths) - len(resultados)} reporte(s) fallaron; el histórico queda sin ellos.")
+    if not resultados:
+        sys.exit(3)
+
+    HISTORY_DIR = OUTPUT_DIR / "history"
+    HISTORY_DIR.mkdir(parents=True, exist_ok=True)
+    if not args.solo_faltantes:
+        respaldar_historico(HISTORY_DIR)
+    fusionar_resultados(resultados, args, corrida, archivar=False)
+
+    u_total = sum(r["u_confirmados"] + r["u_no_confirmados"] + r["u_invalidos"] + r["u_sin_respuesta"]
+                  for r in resultados)
+    dias = sorted({r["snapshot_date"] for r in resultados})
+    print(f"\n✅ Backfill listo: {len(resultados)} reportes ({dias[0]} → {dias[-1]}), {u_total} únicos agregados.")
+    print("   Corre fusionar_historicos.py (completo, sin --incremental) para regenerar la base unificada.")
+
+def _detener(signum, frame):
+    raise KeyboardInterrupt
+
+def vigilar(args, workers: int, opciones: dict):
+    """Modo --watch: procesa cada reporte de inbox/ en cuanto termina de llegar.
+
+    Los procesos del pool quedan vivos (imports y memo de teléfonos calientes);
+    a lo sumo `workers` reportes a la vez, el resto espera en cola. Lo que termina
+    en una misma vuelta se fusiona junto, en serie y en orden (snapshot_date, archivo).
+    Con el backend excel las hojas del histórico se conservan en memoria entre fusiones.
+    """
+    INBOX_DIR.mkdir(parents=True, exist_ok=True)
+    vigia = vigia_inbox.Vigia(INBOX_DIR, is_candidate, args.stable_seconds)
+    cola, en_curso, cache, hashes = deque(), {}, {}, {}
+    signal.signal(signal.SIGTERM, _detener)  # systemd / kill: salida ordenada como con Ctrl+C
+    print(f"👀 Vigilando {INBOX_DIR} cada {args.poll_seconds:g}s (estable tras {args.stable_seconds:g}s, "
+          f"{workers} proceso(s), unique-scope={args.unique_scope}). Ctrl+C para salir.")
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            while True:
+                listos, nuevos = omitir_repetidos(vigia.listos(), args.force)
+                hashes.update(nuevos)
+                for p in listos:
+                    print(f"📥 Nuevo reporte: {p.name}")
+                    cola.append(p)
+                while cola and len(en_curso) < workers:
+                    p = cola.popleft()
+                    en_curso[ex.submit(procesar_reporte, p, args.unique_scope, **opciones)] = p
+
+                if en_curso:
+                    hechos, _ = wait(list(en_curso), timeout=args.poll_seconds, return_when=FIRST_COMPLETED)
+                else:
+                    hechos = ()
+                    time.sleep(args.poll_seconds)
+                resultados = []
+                for fut in hechos:
+                    p = en_curso.pop(fut)
+                    try:
+                        res = fut.result()
+                        res["hash"] = hashes.pop(str(p), None)
+                        resultados.append(res)
+                    except Exception as e:
+                        hashes.pop(str(p), None)
+                        # Queda en inbox/; se reintenta solo si el archivo cambia
+                        print(f"[ERROR] Falló {p.name}: {e}")
+                if not resultados:
+                    continue
+
+                resultados.sort(key=lambda r: (r["snapshot_date"], r["source_file"]))
+                with instrumentacion.Corrida("voxinplant_consolidador", args.prometheus_dir) as corrida:
+                    corrida.extra.update(modo="watch", archivos=[r["source_file"] for r in resultados],
+                                         unique_scope=args.unique_scope, history_backend=args.history_backend)
+                    for res in resultados:
+                        corrida.agregar(res.pop("etapas", []), prefijo=f"{res['source_file']}/")
+                    fusionar_resultados(resultados, args, corrida, cache)
+                for res in resultados:
+                    imprimir_resumen(res)
+                print(f"\n👀 Esperando reportes en {INBOX_DIR} ...")
+    except KeyboardInterrupt:
+        print("\n🛑 Vigilancia detenida.")
+
+def main():
+    parser = argparse.ArgumentParser(description="Consolida reportes Voximplant con hojas SI/NO/INVALIDOS/SIN_RESPUESTA + ÚNICOS por alcance.")
+    parser.add_argument("input", nargs="?", default=None,
+                        help="Reporte a procesar. Si se omite, se toma el más reciente de inbox/.")
+    parser.add_argument("--unique-scope", choices=["template", "dialed"], default="template",
+                        help="Alcance de deduplicación para hojas UNIQUE_*: 'template' = (entidad,name,Phone) [como lo haces manualmente], 'dialed' = (entidad,Phone B).")
+    parser.add_argument("--history-backend", choices=["excel", "parquet", "sqlite"], default="excel",
+                        help="Dónde guardar el histórico único: 'excel' = reescribe HISTORICO_UNIQUE.xlsx, 'parquet' = solo la partición del día en output/history/store, "
+                             "'sqlite' = upsert en output/history/historico.sqlite (también el resumen diario). "
+                             "En todos el histórico es crudo: el diario de correcciones se aplica al leerlo.")
+    parser.add_argument("--export-history-xlsx", action="store_true",
+                        help="Con --history-backend parquet o sqlite, regenera también HISTORICO_UNIQUE.xlsx desde el almacén "
+                             "(crudo: sin el diario de correcciones).")
+    parser.add_argument("--batch", action="store_true",
+                        help="Procesa todos los reportes candidatos de inbox/ (en paralelo) y fusiona el histórico una sola vez.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Procesos en paralelo para --batch, --watch y --backfill (por defecto: núcleos disponibles).")
+    parser.add_argument("--backfill", action="store_true",
+                        help="Reconstruye HISTORICO_UNIQUE y HIST_RESUMEN_DIARIO consolidando en paralelo todos los reportes "
+                             "de archive_raw/ (el histórico anterior se respalda en output/history/backups/).")
+    parser.add_argument("--solo-faltantes", action="store_true",
+                        help="Con --backfill, procesa solo los reportes que no están en el manifiesto y los agrega al histórico actual.")
+    parser.add_argument("--corregir-swap", action="store_true",
+                        help="Registra en el diario de correcciones el swap entidad/name de corregir_swap_dia.OBJETIVOS "
+                             "(se aplica al leer el histórico).")
+    parser.add_argument("--swap-accion", choices=detector_swap.ACCIONES, default="corregir",
+                        help="Qué hacer si entidad/name vienen cruzados en el reporte: 'corregir' (por defecto) los intercambia "
+                             "antes de clasificar, 'cuarentena' lo mueve a inbox/cuarentena/ sin procesarlo, 'avisar' solo lo "
+                             "informa, 'no' desactiva la detección.")
+    parser.add_argument("--swap-umbral", type=float, default=detector_swap.UMBRAL,
+                        help="Fracción de 'name' con valores de entidad a partir de la cual el reporte se considera cruzado.")
+    parser.add_argument("--max-intentos", type=int, default=estado_numeros.MAX_INTENTOS,
+                        help="Intentos en días anteriores a partir de los cuales un número sale de REDISCAR "
+                             "(por defecto 0 = sin tope; los intentos del reporte no cuentan).")
+    parser.add_argument("--watch", action="store_true",
+                        help="Queda corriendo y procesa cada reporte que llega a inbox/ en cuanto termina de copiarse.")
+    parser.add_argument("--poll-seconds", type=float, default=vigia_inbox.POLL_SECONDS,
+                        help=f"Con --watch, cada cuántos segundos se revisa inbox/ (por defecto {vigia_inbox.POLL_SECONDS:g}).")
+    parser.add_argument("--stable-seconds", type=float, default=vigia_inbox.STABLE_SECONDS,
+                        help=f"Con --watch, segundos sin cambios de tamaño antes de procesar un archivo "
+                             f"(por defecto {vigia_inbox.STABLE_SECONDS:g}).")
+    parser.add_argument("--streaming", action="store_true",
+                        help="Lee el reporte por bloques con memoria acotada (para exportaciones muy grandes).")
+    parser.add_argument("--memory-budget-mb", "--memory-budget", type=float, default=None,
+                        help="Presupuesto de memoria por proceso (MB): antes de procesar informa la memoria estimada de cada reporte "
+                             f"y avisa si no cabe. En --streaming define el tamaño de bloque (por defecto {ingesta_streaming.DEFAULT_MEMORY_BUDGET_MB} MB).")
+    parser.add_argument("--chunk-rows", type=int, default=None,
+                        help="Filas por bloque en modo --streaming (si se da, ignora --memory-budget-mb).")
+    parser.add_argument("--output-formats", default="xlsx",
+                        help="Formatos del consolidado separados por coma: xlsx, parquet, csv (ej. 'xlsx,parquet' o solo 'parquet'). "
+                             "Parquet/CSV se escriben por hoja en output/daily/<reporte>_consolidado/.")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="No usar la caché de reportes parseados (cache/reportes, por hash de contenido).")
+    parser.add_argument("--force", action="store_true",
+                        help="Reprocesa aunque el reporte ya figure en el manifiesto de ingesta "
+                             "(output/history/manifiesto_ingesta.json).")
+    parser.add_argument("--xlsx-engine", choices=["auto", "openpyxl", "xlsxwriter"], default="auto",
+                        help="Motor del xlsx en streaming: 'auto' usa xlsxwriter (constant_memory) si está instalado.")
+    parser.add_argument("--prometheus-dir", type=Path, default=None,
+                        help=f"Carpeta del textfile collector de node-exporter para dejar las métricas de la corrida "
+                             f"(por defecto: variable {instrumentacion.PROM_ENV}, si existe).")
+    args = parser.parse_args()
+    formatos = [f.strip().lower() for f in args.output_formats.split(",") if f.strip()]
+    invalidos = [f for f in formatos if f not in salidas.FORMATOS]
+    if invalidos or not formatos:
+        parser.error(f"--output-formats inválido: {args.output_formats} (opciones: {', '.join(salidas.FORMATOS)})")
+
+    opciones = dict(streaming=args.streaming,
+                    memory_budget_mb=args.memory_budget_mb or ingesta_streaming.DEFAULT_MEMORY_BUDGET_MB,
+                    chunk_rows=args.chunk_rows, formatos=formatos, xlsx_engine=args.xlsx_engine,
+                    usar_cache=not args.no_cache, swap_accion=args.swap_accion, swap_umbral=args.swap_umbral,
+                    max_intentos=args.max_intentos)
+    if args.watch:
+        vigilar(args, max(1, args.workers), opciones)
+        return
+    if args.backfill:
+        with instrumentacion.Corrida("voxinplant_consolidador", args.prometheus_dir) as corrida:
+            backfill(args, max(1, args.workers), opciones, corrida)
+        return
+
+    with instrumentacion.Corrida("voxinplant_consolidador", args.prometheus_dir) as corrida:
+        if args.batch:
+            paths = list_inbox_candidates()
+            if not paths:
+                print_no_files_message()
+                print(f"[ERROR] No se encontraron archivos .xlsx en {INBOX_DIR}")
+                sys.exit(1)
+            workers = args.workers
+        else:
+            if args.input:
+                input_path = Path(args.input).expanduser().resolve()
+            else:
+                input_path = find_latest_inbox_file()
+                if not input_path:
+                    print(f"[ERROR] No se encontraron archivos .xlsx en {INBOX_DIR}")
+                    sys.exit(1)
+            if not input_path.exists():
+                print(f"[ERROR] El archivo no existe: {input_path}")
+                sys.exit(2)
+            paths, workers = [input_path], 1
+            print(f"Procesando archivo: {input_path.name} (unique-scope={args.unique_scope})")
+
+        paths, hashes = omitir_repetidos(paths, args.force)
+        if not paths:
+            print("✅ Nada que procesar: los reportes ya estaban en el manifiesto de ingesta.")
+            return
+        workers = max(1, min(workers, len(paths)))
+        if args.batch:
+            print(f"Procesando {len(paths)} archivos con {workers} procesos (unique-scope={args.unique_scope})")
+
+        if args.memory_budget_mb:
+            reportar_memoria(paths, args.memory_budget_mb, args.streaming)
+
+        corrida.extra.update(archivos=[p.name for p in paths], unique_scope=args.unique_scope,
+                             streaming=args.streaming, history_backend=args.history_backend, workers=workers)
+        with corrida.etapa("procesamiento") as e:
+            resultados = procesar_lote(paths, args.unique_scope, workers, **opciones)
+            e["filas_in"] = sum(r["total"] for r in resultados)
+            e["filas_out"] = sum(r["u_confirmados"] + r["u_no_confirmados"] + r["u_invalidos"]
+                                 + r["u_sin_respuesta"] for r in resultados)
+        # Etapas internas de cada reporte (medidas dentro del worker)
+        for res in resultados:
+            corrida.agregar(res.pop("etapas", []), prefijo=f"{res['source_file']}/")
+            res["hash"] = hashes.get(str(res["input_path"]))
+        if not resultados:
+            sys.exit(3)
+
+        fusionar_resultados(resultados, args, corrida)
+
+        for res in resultados:
+            imprimir_resumen(res)
 
 if __name__ == "__main__":
     main()